@@ -0,0 +1,48 @@
+"""Memory taken by the pending calls of a deferred batch, which keeps compact requests instead of the plans.
+
+Usage (with semantipy installed): python benchmarks/batch_memory.py [--num-calls 100000]
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+from concurrent.futures import Future
+
+from semantipy.impls.lm.batch import _Entry
+from semantipy.ops import select
+
+
+def measure(name, build, num_calls):
+    gc.collect()
+    tracemalloc.start()
+    start_time = time.perf_counter()
+    pending = [build(i) for i in range(num_calls)]
+    elapsed = time.perf_counter() - start_time
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{name:<28} {size / num_calls:>10.1f} bytes/call {size / 2**20:>10.1f} MiB total "
+        f"{elapsed / num_calls * 1e6:>8.2f} us/call"
+    )
+    del pending
+
+
+def plan(i):
+    return select.compile(f"Order {i} was shipped to London.", "order number", int)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--num-calls", type=int, default=100_000)
+    args = parser.parse_args()
+
+    print(f"Holding {args.num_calls} pending calls of `select(f'Order {{i}} was shipped to London.', ..., int)`")
+    # The entries used to keep the plans, along with the future of the result.
+    measure("Plans and future", lambda i: ([plan(i)], Future()), args.num_calls)
+    measure("Batch entries", lambda i: _Entry([plan(i)]), args.num_calls)
+
+
+if __name__ == "__main__":
+    main()
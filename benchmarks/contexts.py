@@ -0,0 +1,54 @@
+"""Overhead of entering and exiting nested contexts, with the context stack and with the dispatch of every context.
+
+Usage (with semantipy installed): python benchmarks/contexts.py [--repeats 2000]
+"""
+
+import argparse
+import timeit
+
+from semantipy.impls.base import BaseBackend, BackendNotImplemented, register_backend, unregister_backend
+from semantipy.ops import context
+
+
+class ContextDispatchBackend(BaseBackend):
+    """Requires the dispatch of ``context_enter`` and ``context_exit``, as every context did before the stack."""
+
+    __semantic_context_dispatch__ = True
+
+    @classmethod
+    def __semantic_function__(cls, request, dispatcher=None, plan=None):
+        raise BackendNotImplemented()
+
+
+def nested(depth):
+    contexts = [f"Context {level}." for level in range(depth)]
+
+    def run():
+        with context(*contexts):
+            pass
+
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'Depth':>6} {'Dispatch (us)':>14} {'Stack (us)':>11} {'Relative':>9}")
+    for depth in (1, 4, 16):
+        run = nested(depth)
+        register_backend(ContextDispatchBackend)
+        try:
+            dispatched = timeit.timeit(run, number=args.repeats)
+        finally:
+            unregister_backend(ContextDispatchBackend)
+        stacked = timeit.timeit(run, number=args.repeats)
+        print(
+            f"{depth:>6} {dispatched / args.repeats * 1e6:>14.1f} {stacked / args.repeats * 1e6:>11.1f} "
+            f"{stacked / dispatched:>9.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Cost of rendering a prompt, compared with the previous render pipeline based on pydantic copies and dumps.
+
+Usage (with semantipy installed): python benchmarks/render.py [--repeats 200]
+"""
+
+import argparse
+import re
+import timeit
+
+from jinja2 import Environment, PackageLoader, Template
+
+from semantipy.impls.lm.template import SemantipyPromptTemplate
+from semantipy.ops import SemanticOperationRequest, select
+from semantipy.semantics import Exemplar, Text
+
+
+def legacy_render(self: SemantipyPromptTemplate):
+    """The render pipeline before the lean rendering, kept here as the reference."""
+
+    def render_input(request):
+        if isinstance(request, str):
+            return Text(request)
+        return Text(Template(source=self.input_template).render(request.model_dump()))
+
+    def render_exemplars(exemplars):
+        if exemplars is None:
+            return None
+        return [Exemplar(input=render_input(exemplar.input), output=exemplar.output) for exemplar in exemplars]
+
+    copy = self.model_copy(
+        update={
+            "exemplars": render_exemplars(self.exemplars),
+            "user_exemplars": render_exemplars(self.user_exemplars),
+            "user_input": render_input(self.user_input),
+        }
+    )
+    env = Environment(loader=PackageLoader("semantipy", "impls/lm/prompts"), trim_blocks=True, lstrip_blocks=True)
+    string = env.get_template("main.jinja2").render(copy.model_dump())
+    regex = re.compile(
+        r"<\|semantipy_chat_(?P<role>system|human|ai)\|>\s*(?P<content>.*?)(?=\s*<\|semantipy_chat_\w+\|>|$)",
+        re.DOTALL,
+    )
+    return [self._create_message(match.group("role"), match.group("content")) for match in regex.finditer(string)]
+
+
+def legacy_input(self: SemantipyPromptTemplate, request: SemanticOperationRequest):
+    return self.model_copy(
+        update={
+            "user_input": request.model_copy(update={"contexts": None}),
+            "user_exemplars": [ctx for ctx in request.contexts if isinstance(ctx, Exemplar)],
+            "user_contexts": [ctx for ctx in request.contexts if not isinstance(ctx, Exemplar)],
+            "parser": self.parser.model_copy(
+                update={"return_type": request.return_type, "multi": request.return_iterable}
+            ),
+        }
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=200)
+    args = parser.parse_args()
+
+    template = SemantipyPromptTemplate.from_file("select.yaml")
+    print(f"{'Exemplars':>10} {'Legacy (us)':>12} {'Current (us)':>13} {'Relative':>9}")
+    for num_exemplars in (0, 5, 50):
+        request = SemanticOperationRequest(
+            operator=select,
+            operand="Natalia sold 48/2 = 24 clips in May.",
+            guest_operand="The number of clips sold in May",
+            return_type=int,
+            contexts=[
+                Exemplar(input=select.bind(f"Amanda has {i} apples.", "Number of apples", int), output=str(i))
+                for i in range(num_exemplars)
+            ],
+        )
+        assert [m.content for m in legacy_render(legacy_input(template, request))] == [
+            m.content for m in template.input(request).render()
+        ]
+        legacy = timeit.timeit(lambda: legacy_render(legacy_input(template, request)), number=args.repeats)
+        current = timeit.timeit(lambda: template.input(request).render(), number=args.repeats)
+        print(
+            f"{num_exemplars:>10} {legacy / args.repeats * 1e6:>12.1f} {current / args.repeats * 1e6:>13.1f} "
+            f"{current / legacy:>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Memory taken by the requests held in memory, e.g., while building a large batch.
+
+Usage (with semantipy installed): python benchmarks/request_memory.py [--num-requests 1000000]
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+
+from semantipy.ops import select
+
+
+def measure(name, build, num_requests):
+    gc.collect()
+    tracemalloc.start()
+    start_time = time.perf_counter()
+    requests = [build(i) for i in range(num_requests)]
+    elapsed = time.perf_counter() - start_time
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{name:<28} {size / num_requests:>10.1f} bytes/request {size / 2**20:>10.1f} MiB total "
+        f"{elapsed / num_requests * 1e6:>8.2f} us/request"
+    )
+    del requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--num-requests", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    print(f"Holding {args.num_requests} requests of `select(f'Order {{i}} was shipped.', 'order number', int)`")
+    measure(
+        "SemanticOperationRequest",
+        lambda i: select.bind(f"Order {i} was shipped.", "order number", int),
+        args.num_requests,
+    )
+    measure(
+        "CompactRequest",
+        lambda i: select.bind_compact(f"Order {i} was shipped.", "order number", int),
+        args.num_requests,
+    )
+
+
+if __name__ == "__main__":
+    main()
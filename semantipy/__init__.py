@@ -7,11 +7,42 @@ from .impls import (
     BackendNotImplemented,
     BaseBackend,
     BaseExecutionPlan,
+    LocalBackend,
+    EmbeddingBackend,
+    configure_embedding,
     configure_lm,
+    configure_prompt_layout,
+    configure_tokenizer,
+    configure_token_budget,
+    TokenBudget,
+    dry_run,
+    deferred_batch,
+    OpenAIBatchClient,
+    RecordReplayChatModel,
+    ExemplarStore,
+    configure_retry_policy,
+    configure_circuit_breaker,
+    configure_prompt_cache,
+    configure_structured_output,
+    configure_generation_policy,
+    GenerationPolicy,
+    configure_strategy,
+    configure_synthesis,
+    configure_cascade,
+    CascadePolicy,
+    SynthesisPolicy,
+    warmup,
+    configure_http_pool,
+    HTTPPoolConfig,
+    RetryPolicy,
+    CircuitBreaker,
+    get_metrics,
+    reset_metrics,
     LMBackend,
     LMExecutionPlan,
 )
 
+from .tracing import configure_tracing, SpanExporter, InMemorySpanExporter, ChromeTraceExporter
 from .logger import init_python_logger
 
 init_python_logger()
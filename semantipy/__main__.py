@@ -0,0 +1,43 @@
+"""Command line interface of semantipy.
+
+python -m semantipy run jobs.jsonl --out results.jsonl
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+
+from semantipy.logger import init_python_logger
+from semantipy.runner import run_jobs
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m semantipy", description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="Run the operations of a JSONL file of jobs.")
+    run.add_argument("jobs", help="The input JSONL file, one job per line.")
+    run.add_argument("--out", required=True, help="The output JSONL file. Existing results are skipped.")
+    run.add_argument("--concurrency", type=int, default=8, help="The maximum number of jobs running at once.")
+    run.add_argument("--checkpoint-every", type=int, default=100, help="Sync the output every N results.")
+    run.add_argument("--checkpoint-interval", type=float, default=10.0, help="Sync the output every N seconds.")
+    run.add_argument("--report-interval", type=float, default=10.0, help="Log the progress every N seconds.")
+    run.add_argument("--retry-errors", action="store_true", help="Run the jobs that failed before again.")
+    args = parser.parse_args(argv)
+
+    init_python_logger()
+    summary = run_jobs(
+        args.jobs,
+        args.out,
+        concurrency=args.concurrency,
+        checkpoint_every=args.checkpoint_every,
+        checkpoint_interval=args.checkpoint_interval,
+        report_interval=args.report_interval,
+        retry_errors=args.retry_errors,
+    )
+    print(summary.model_dump_json())
+    return 1 if summary.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
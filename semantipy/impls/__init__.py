@@ -1,2 +1,6 @@
 from .base import *
+from .metrics import *
+from .local import *
+from .elementwise import *
 from .lm import *
+from .embedding import *
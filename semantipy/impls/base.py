@@ -6,16 +6,20 @@ __all__ = [
     "DummyPlan",
     "LambdaExecutionPlan",
     "BackendNotImplemented",
+    "assemble_outputs",
     "list_backends",
     "register_backend",
     "unregister_backend",
     "register",
 ]
 
-from typing import Type, Callable, TypeVar
+import threading
+from concurrent.futures import Future
+from typing import Any, Type, Callable, TypeVar
 
 from semantipy.semantics import Semantics
 from semantipy.ops.base import Dispatcher, SupportsSemanticFunction, SemanticOperationRequest
+from semantipy.ops.context import _context_dispatch_backends
 
 
 _registered_backends: list[Type[BaseBackend]] = []
@@ -27,6 +31,8 @@ def list_backends():
 
 def register_backend(backend):
     _registered_backends.append(backend)
+    if getattr(backend, "__semantic_context_dispatch__", False):
+        _context_dispatch_backends.append(backend)
     return backend
 
 
@@ -35,12 +41,18 @@ def unregister_backend(backend):
     _registered_backends.reverse()
     _registered_backends.remove(backend)
     _registered_backends.reverse()
+    if backend in _context_dispatch_backends:
+        _context_dispatch_backends.remove(backend)
     return backend
 
 
 class BaseBackend:
     """Backend namespace that implements the operations."""
 
+    # Set to True to receive the ``context_enter`` and ``context_exit`` requests of every ``with ctx:`` block.
+    # Otherwise, the contexts are only pushed on the context stack, see ``semantipy.ops.context``.
+    __semantic_context_dispatch__: bool = False
+
     @classmethod
     def register(cls):
         return register_backend(cls)
@@ -123,6 +135,36 @@ class LambdaExecutionPlan(BaseExecutionPlan):
         return self.lambda_func()
 
 
+def assemble_outputs(outputs: list[Any], assemble: Callable[[list[Any]], Any]) -> Any:
+    """Combine the outputs of several plans with ``assemble``.
+
+    In a deferred batch, some outputs are futures. The result is then a future as well, which is resolved with
+    ``assemble`` once all of them are.
+    """
+    futures = [output for output in outputs if isinstance(output, Future)]
+    if not futures:
+        return assemble(outputs)
+
+    combined: Future = Future()
+    remaining = len(futures)
+    lock = threading.Lock()
+
+    def on_done(_: Future) -> None:
+        nonlocal remaining
+        with lock:
+            remaining -= 1
+            if remaining:
+                return
+        try:
+            combined.set_result(assemble([o.result() if isinstance(o, Future) else o for o in outputs]))
+        except BaseException as error:
+            combined.set_exception(error)
+
+    for future in futures:
+        future.add_done_callback(on_done)
+    return combined
+
+
 class DummyPlan(BaseExecutionPlan):
     """A plan that does nothing."""
 
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+__all__ = ["ElementwisePlan", "elementwise_plan"]
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional
+
+from semantipy.impls.base import BaseExecutionPlan, assemble_outputs
+from semantipy.ops.base import Dispatcher, SemanticOperationRequest
+from semantipy.ops import apply, cast, resolve
+from semantipy.semantics import Semantics, Text
+
+# Operators that are well-defined on each element of a container.
+ELEMENTWISE_OPERATORS = (apply, cast, resolve)
+
+
+class ElementwisePlan(BaseExecutionPlan):
+    """Execute one plan per element concurrently, and reassemble the results into a container."""
+
+    def __init__(
+        self,
+        plans: List[BaseExecutionPlan],
+        assemble: Callable[[List[Any]], Any],
+        max_workers: int = 8,
+    ):
+        self.plans = plans
+        self.assemble = assemble
+        self.max_workers = max_workers
+
+    def execute(self) -> Any:
+        if len(self.plans) <= 1 or self.max_workers <= 1:
+            outputs = [plan.execute() for plan in self.plans]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(self.plans))) as executor:
+                outputs = list(executor.map(lambda plan: plan.execute(), self.plans))
+        # The outputs are futures in a deferred batch.
+        return assemble_outputs(outputs, self.assemble)
+
+
+def elementwise_plan(
+    request: SemanticOperationRequest,
+    elements: List[Any],
+    assemble: Callable[[List[Any]], Any],
+    threshold: int | None,
+    max_workers: int,
+    signer: str,
+) -> Optional[ElementwisePlan]:
+    """Dispatch the request for each element of the operand.
+
+    Return None (i.e., the container should be handled as a whole) if the fan-out is disabled (no threshold),
+    the operator is not element-wise, the container is smaller than the threshold, or the return type is a container.
+    An index (e.g., ``apply(items, "the second item", "remove")``) or a container guest operand refers to
+    the container as a whole, so these requests are never split either.
+    """
+    if threshold is None or request.operator not in ELEMENTWISE_OPERATORS or len(elements) < threshold:
+        return None
+    if isinstance(request.return_type, type) and issubclass(request.return_type, (list, dict)):
+        return None
+    if request.index is not None or isinstance(request.guest_operand, (list, dict)):
+        return None
+
+    plans = []
+    for element in elements:
+        if not isinstance(element, Semantics):
+            element = Text(str(element))
+        element_request = SemanticOperationRequest(
+            operator=request.operator,
+            operand=element,
+            guest_operand=request.guest_operand,
+            index=request.index,
+            other_operands=request.other_operands,
+            return_type=request.return_type,
+            return_iterable=request.return_iterable,
+            contexts=request.contexts,
+        )
+        plans.append(Dispatcher(element_request).dispatch())
+
+    plan = ElementwisePlan(plans, assemble, max_workers=max_workers)
+    plan.sign(signer, f"element-wise over {len(plans)} elements")
+    plan.set_final()
+    return plan
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+__all__ = [
+    "EmbeddingBackend",
+    "configure_embedding",
+    "calibrate_embedding_thresholds",
+    "embedding_similarities",
+    "embedding_decisions",
+]
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from semantipy.impls.base import BaseBackend, BaseExecutionPlan, BackendNotImplemented, LambdaExecutionPlan
+from semantipy.impls.base import list_backends, register_backend, unregister_backend
+from semantipy.impls.local import LocalBackend, _has_active_contexts
+from semantipy.impls.metrics import increment
+from semantipy.ops.base import Dispatcher, SemanticOperationRequest, SupportsSemanticFunction
+from semantipy.ops import contains, equals
+
+EmbedFunction = Callable[[List[str]], Sequence[Sequence[float]]]
+
+_embed: EmbedFunction | None = None
+
+# (reject, accept) thresholds of the cosine similarity by operator.
+# At or above accept, the answer is True. Below reject, it's False. In between, the language model decides.
+_thresholds: Dict[Any, Tuple[float, float]] = {
+    equals: (0.5, 0.95),
+    contains: (0.3, 0.85),
+}
+
+_cache: OrderedDict[str, np.ndarray] = OrderedDict()
+_cache_lock = threading.Lock()
+_CACHE_MAX_SIZE = 4096
+
+
+def _embed_texts(texts: List[str]) -> np.ndarray:
+    """The normalized embeddings of the texts, one row each. Only the texts not in the cache are embedded."""
+    if _embed is None:
+        raise RuntimeError("No embedding function is configured. Use configure_embedding first.")
+    with _cache_lock:
+        vectors = {text: _cache[text] for text in texts if text in _cache}
+    missing = list(dict.fromkeys(text for text in texts if text not in vectors))
+    if missing:
+        embedded = np.asarray(_embed(missing), dtype=np.float32)
+        norms = np.linalg.norm(embedded, axis=1, keepdims=True)
+        embedded = embedded / np.where(norms == 0, 1, norms)
+        vectors.update(zip(missing, embedded))
+        with _cache_lock:
+            _cache.update(zip(missing, embedded))
+            while len(_cache) > _CACHE_MAX_SIZE:
+                _cache.popitem(last=False)
+    return np.stack([vectors[text] for text in texts])
+
+
+def embedding_similarities(pairs: Sequence[Tuple[str, str]]) -> np.ndarray:
+    """The cosine similarities of the pairs of texts, computed in one batch."""
+    if not pairs:
+        return np.zeros(0, dtype=np.float32)
+    left = _embed_texts([str(first) for first, _ in pairs])
+    right = _embed_texts([str(second) for _, second in pairs])
+    return np.einsum("ij,ij->i", left, right)
+
+
+def embedding_decisions(operator: Any, pairs: Sequence[Tuple[str, str]]) -> List[Optional[bool]]:
+    """Decide ``operator(s, t)`` for many pairs ``(s, t)`` at once.
+
+    The answer is None for the pairs in the ambiguous band, which should be asked to the language model.
+    """
+    reject, accept = _thresholds[operator]
+    similarities = embedding_similarities(pairs)
+    return [True if score >= accept else False if score < reject else None for score in similarities.tolist()]
+
+
+def calibrate_embedding_thresholds(
+    operator: Any, examples: Sequence[Tuple[str, str, bool]], precision: float = 0.95
+) -> Tuple[float, float]:
+    """Set the thresholds of an operator from labeled examples ``(s, t, answer)``.
+
+    The accept threshold is the lowest similarity above which at least ``precision`` of the examples are True,
+    and the reject threshold the highest one below which at least ``precision`` of the examples are False.
+    Return ``(reject, accept)``.
+    """
+    similarities = embedding_similarities([(s, t) for s, t, _ in examples])
+    labels = np.asarray([bool(answer) for _, _, answer in examples])
+    order = np.argsort(similarities)
+    similarities, labels = similarities[order], labels[order]
+
+    # The fraction of True among the examples at or above each similarity, from the top.
+    true_above = np.cumsum(labels[::-1]) / np.arange(1, len(labels) + 1)
+    (indices,) = np.nonzero(true_above >= precision)
+    accept = float(similarities[::-1][indices[-1]]) if len(indices) else float("inf")
+    # The fraction of False among the examples at or below each similarity, from the bottom.
+    false_below = np.cumsum(~labels) / np.arange(1, len(labels) + 1)
+    (indices,) = np.nonzero(false_below >= precision)
+    reject = float(np.nextafter(similarities[indices[-1]], np.float32(np.inf))) if len(indices) else float("-inf")
+    reject = min(reject, accept)
+    _thresholds[operator] = (reject, accept)
+    return reject, accept
+
+
+class EmbeddingBackend(BaseBackend):
+    """Answer ``equals`` and ``contains`` on texts with the similarity of their embeddings.
+
+    The answer is True if the similarity is at least the accept threshold, and False below the reject threshold.
+    In between, the backend raises ``BackendNotImplemented`` and the language model decides.
+    The saved calls are counted in the ``embedding.calls_saved`` metric, the others in ``embedding.ambiguous``.
+    """
+
+    @classmethod
+    def __semantic_dependencies__(cls) -> list[type[SupportsSemanticFunction]]:
+        # The exact answers of the local backend are preferred.
+        return [LocalBackend]
+
+    @classmethod
+    def __semantic_function__(
+        cls,
+        request: SemanticOperationRequest,
+        dispatcher: Dispatcher | None = None,
+        plan: BaseExecutionPlan | None = None,
+    ) -> BaseExecutionPlan:
+        if _embed is None or request.operator not in (equals, contains):
+            raise BackendNotImplemented()
+        if not isinstance(request.operand, str) or not isinstance(request.guest_operand, str):
+            raise BackendNotImplemented("only texts are compared with embeddings")
+        if _has_active_contexts(request):
+            raise BackendNotImplemented("the contexts are not reflected in the embeddings")
+
+        (decision,) = embedding_decisions(request.operator, [(request.operand, request.guest_operand)])
+        if decision is None:
+            increment("embedding.ambiguous", operator=request.operator.__name__)
+            raise BackendNotImplemented("the similarity is in the ambiguous band")
+
+        increment("embedding.calls_saved", operator=request.operator.__name__)
+        plan = LambdaExecutionPlan(lambda: decision)
+        plan.sign(cls.__name__, "answered by embedding similarity")
+        plan.set_final()
+        return plan
+
+
+def configure_embedding(
+    embed: EmbedFunction | Any | None,
+    *,
+    thresholds: Dict[Any, Tuple[float, float]] | None = None,
+) -> None:
+    """Enable the :class:`EmbeddingBackend` with an embedding function, or disable it with None.
+
+    The function maps a list of texts to their vectors. A langchain ``Embeddings`` object is accepted as well.
+    ``thresholds`` maps ``equals`` and ``contains`` to their ``(reject, accept)`` similarity thresholds,
+    see also :func:`calibrate_embedding_thresholds`.
+    """
+    global _embed
+    if embed is not None and hasattr(embed, "embed_documents"):
+        embed = embed.embed_documents
+    _embed = embed
+    with _cache_lock:
+        _cache.clear()
+    if thresholds is not None:
+        _thresholds.update(thresholds)
+    if embed is not None and EmbeddingBackend not in list_backends():
+        # Registered after the language model backend, so it's tried before it.
+        register_backend(EmbeddingBackend)
+    if embed is None and EmbeddingBackend in list_backends():
+        unregister_backend(EmbeddingBackend)
@@ -1,2 +1,18 @@
 from .backend import *
 from .template import *
+from .tokens import *
+from .dryrun import *
+from .replay import *
+from .retry import *
+from .exemplars import *
+from .prompt_cache import *
+from .warmup import *
+from .http_pool import *
+from .structured import *
+from .generation import *
+from .strategy import *
+from .edits import *
+from .spans import *
+from .synthesis import *
+from .cascade import *
+from .batch import *
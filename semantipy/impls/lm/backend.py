@@ -1,3 +1,5 @@
+from __future__ import annotations
+
 __all__ = [
     "configure_lm",
     "LMExecutionPlan",
@@ -6,20 +8,28 @@ __all__ = [
 ]
 
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Optional, TypeVar
 
-from pydantic import ConfigDict
-from langchain.schema import BaseMessage
+from pydantic import BaseModel, ConfigDict, Field
+from langchain.schema import BaseMessage, AIMessage, HumanMessage
 from langchain.chat_models.base import BaseChatModel
+from semantipy import tracing
 from semantipy.impls.base import BaseExecutionPlan, register, BaseBackend
-from semantipy.ops.base import SemanticOperationRequest, Dispatcher
+from semantipy.impls.local import LocalBackend
+from semantipy.impls.metrics import increment
+from semantipy.ops.base import SemanticOperationRequest, Dispatcher, SupportsSemanticFunction
 from semantipy.ops import context_enter, context_exit
+from semantipy.ops.context import _context_stack, pop_context, push_context
 from semantipy.semantics import SemanticModel, Text, Semantics
 
 from .template import SemantipyPromptTemplate
+from .generation import GenerationPolicy
+from . import batch, cascade, dryrun, generation, http_pool, retry, strategy, structured, tokens
 
 _lm: BaseChatModel | None = None
 
+T = TypeVar("T")
+
 
 def _get_or_load_global_lm() -> BaseChatModel:
     global _lm
@@ -27,7 +37,7 @@ def _get_or_load_global_lm() -> BaseChatModel:
     if _lm is None:
         from langchain_openai import ChatOpenAI
 
-        _lm = ChatOpenAI(model="gpt-4o", temperature=0.0)
+        _lm = ChatOpenAI(model="gpt-4o", temperature=0.0, http_client=http_pool.get_http_client())
 
     return _lm
 
@@ -37,39 +47,199 @@ def configure_lm(lm: BaseChatModel) -> None:
     global _lm
     if not isinstance(lm, BaseChatModel):
         raise TypeError("lm must be an instance of BaseChatModel")
+    http_pool.use_shared_http_client(lm)
     _lm = lm
 
 
+def get_prompt_file(operator: Any, strategy_name: str | None = None) -> Path:
+    """The prompt config of an operator: ``prompts/<func_name>.yaml``, or the universal prompt if there is none.
+
+    With a strategy, it's ``prompts/<func_name>_<strategy>.yaml``."""
+    if strategy_name is not None:
+        return strategy.strategy_prompt_file(operator, strategy_name)
+    if hasattr(operator, "__name__"):
+        prompt_config_path = Path(__file__).parent / "prompts" / f"{operator.__name__}.yaml"
+        if prompt_config_path.exists():
+            return prompt_config_path
+    # fallback to universal prompt
+    return Path(__file__).parent / "prompts" / "universal.yaml"
+
+
 class LMExecutionPlan(BaseExecutionPlan, SemanticModel):
     """A plan to execute a language model operation."""
 
     prompt: SemantipyPromptTemplate
+    generation: Optional[GenerationPolicy] = Field(default=None)
+    # The plan to run instead, if the output fails to parse, e.g., with the default prompt of a strategy.
+    fallback: Optional[LMExecutionPlan] = Field(default=None)
+    # The language model (BaseChatModel) to call instead of the configured one, e.g., the cheap model of a cascade.
+    # Not validated by pydantic, as the chat models of langchain may be pydantic v1 models.
+    lm: Optional[Any] = Field(default=None, exclude=True)
+    # The prompt last rendered and its messages, so that the token budget and the run render only once.
+    _rendered: tuple[SemantipyPromptTemplate, list[BaseMessage]]
+
+    def get_lm(self) -> BaseChatModel:
+        return self.lm if self.lm is not None else _get_or_load_global_lm()
 
     def parse_output(self, output: Any) -> Any:
         if self.prompt.parser is None:
             return Text(output)
         return self.prompt.parser.parse(output)
 
+    def with_prompt(self, prompt: SemantipyPromptTemplate) -> LMExecutionPlan:
+        """Fork the plan with a different prompt. The signs are inherited."""
+        plan = self.model_copy(update={"prompt": prompt})
+        plan._signs = self.list_signs().copy()
+        return plan
+
+    def estimate_tokens(self) -> int:
+        """Estimate the number of tokens in the rendered prompt."""
+        return tokens.count_message_tokens(self.lm_input())
+
     def lm_input(self) -> list[BaseMessage]:
         """Use this method to debug the input to the language model."""
-        return self.prompt.render()
+        # Keyed by the prompt object, as forks of the plan (e.g., ``with_prompt``) copy the private attributes.
+        if not hasattr(self, "_rendered") or self._rendered[0] is not self.prompt:
+            self._rendered = (self.prompt, self.prompt.render())
+        return list(self._rendered[1])
 
     def lm_output(self) -> Text:
         """Use this method to debug the output from the language model."""
-        llm = _get_or_load_global_lm()
-        response = llm.invoke(self.lm_input())
+        return self.invoke(self.lm_input())
+
+    @property
+    def request(self) -> SemanticOperationRequest | None:
+        """The request being executed, if the user input is a request."""
+        if isinstance(self.prompt.user_input, SemanticOperationRequest):
+            return self.prompt.user_input
+        return None
+
+    def invoke(self, messages: list[BaseMessage]) -> Text:
+        """Invoke the language model with the configured retry policy and circuit breaker."""
+        return self._call(lambda: self._invoke_once(messages))
+
+    def _call(self, func: Callable[[], T]) -> T:
+        operator = self.request.operator if self.request is not None else None
+        policy = retry.get_retry_policy(operator)
+        if policy is None:
+            return retry._call_with_circuit_breaker(func)
+        return policy.call(func, plan=self, operator=dryrun.operator_name(operator))
+
+    def _invoke_once(self, messages: list[BaseMessage]) -> Text:
+        llm = self.get_lm()
+        kwargs = self.generation.invoke_kwargs() if self.generation is not None else {}
+        response = llm.invoke(messages, **kwargs)
         if response is None or response.content is None:
             raise ValueError("No response from the language model.")
+        if self.generation is not None and self.generation.logprobs:
+            decision = generation.boolean_from_logprobs(response)
+            if decision is not None:
+                return Text(str(decision[0]))
         return Text(response.content)  # type: ignore
 
+    def run(self) -> Any:
+        """Invoke the language model and parse the output.
+        Re-ask the language model if the output fails to parse and the retry policy allows.
+        Finally, run the fallback plan if there is one.
+
+        If a cascade is configured for the operator, the cheap model is tried first."""
+        if self.lm is None:
+            policy = cascade.get_cascade_policy(self.request.operator if self.request is not None else None)
+            if policy is not None:
+                return policy.run(self)
+        return self._run_with_fallback()
+
+    def _run_with_fallback(self) -> Any:
+        if self.fallback is None:
+            return self._run()
+        try:
+            return self._run()
+        except (ValueError, SyntaxError, TypeError) as error:
+            operator = self.request.operator if self.request is not None else None
+            increment("lm.strategy.fallbacks", operator=dryrun.operator_name(operator))
+            self.sign(self.__class__.__name__, f"output failed to parse ({error}), running the fallback plan")
+            return self.fallback.run()
+
+    def _run(self) -> Any:
+        parser = self.prompt.parser
+        if structured._structured_output and parser is not None and parser.structured_output:
+            schema = structured.output_schema(parser.return_type, parser.multi)
+            if schema is not None:
+                try:
+                    return self.run_structured(schema)
+                except NotImplementedError:
+                    operator = self.request.operator if self.request is not None else None
+                    increment("lm.structured_output.fallbacks", operator=dryrun.operator_name(operator))
+                    self.sign(self.__class__.__name__, "structured output not supported, falling back to the parser")
+
+        with tracing.span("lm.render"):
+            messages = self.lm_input()
+        with tracing.span("lm.invoke", messages=len(messages)):
+            output = self.invoke(messages)
+        operator = self.request.operator if self.request is not None else None
+        policy = retry.get_retry_policy(operator)
+        parse_retries = policy.parse_retries if policy is not None else 0
+        for attempt in range(parse_retries + 1):
+            try:
+                with tracing.span("lm.parse", attempt=attempt):
+                    return self.parse_output(output)
+            except (ValueError, SyntaxError, TypeError) as error:
+                if attempt >= parse_retries:
+                    raise
+                increment("lm.parse_retries", operator=dryrun.operator_name(operator))
+                self.sign(retry.RetryPolicy.__name__, f"output failed to parse ({error}), re-asking")
+                messages = messages + [
+                    AIMessage(content=output),
+                    HumanMessage(
+                        content=f"Your answer could not be parsed: {error}\n"
+                        "Please answer again, strictly following the formatting instructions."
+                    ),
+                ]
+                with tracing.span("lm.invoke", messages=len(messages)):
+                    output = self.invoke(messages)
+
+    def run_structured(self, schema: type[BaseModel]) -> Any:
+        """Invoke the language model with a structured output of the schema, and validate the output.
+
+        Raise NotImplementedError if the language model does not support structured outputs."""
+        with tracing.span("lm.render"):
+            messages = self.lm_input()
+        runnable = self.get_lm().with_structured_output(schema.model_json_schema())
+        operator = self.request.operator if self.request is not None else None
+        policy = retry.get_retry_policy(operator)
+        parse_retries = policy.parse_retries if policy is not None else 0
+        for attempt in range(parse_retries + 1):
+            with tracing.span("lm.invoke", messages=len(messages), structured=True):
+                output = self._call(lambda: runnable.invoke(messages))
+            try:
+                with tracing.span("lm.parse", attempt=attempt, structured=True):
+                    return structured.to_value(schema, output, self.prompt.parser.return_type)
+            except (ValueError, TypeError) as error:
+                if attempt >= parse_retries:
+                    raise
+                increment("lm.parse_retries", operator=dryrun.operator_name(operator))
+                self.sign(retry.RetryPolicy.__name__, f"structured output failed to validate ({error}), retrying")
+
     def execute(self) -> Any:
-        return self.parse_output(self.lm_output())
+        plans = [self] if tokens._token_budget is None else tokens._token_budget.fit(self)
+        if dryrun._dry_run_report is not None:
+            return dryrun._dry_run_report.record(plans)
+        if batch._deferred_batch is not None:
+            return batch._deferred_batch.add(plans)
+        outputs = [plan.run() for plan in plans]
+        if len(outputs) == 1:
+            return outputs[0]
+        # Chunked execution. The results of all chunks are concatenated.
+        return [item for output in outputs for item in output]
 
 
-_contexts: list[Semantics] = []
+# The context stack, shared with ``semantipy.ops.context``.
+_contexts: list[Semantics] = _context_stack
 
 
 class LMContextPlan(BaseExecutionPlan, SemanticModel):
+    """A plan to enter or exit a context, for the explicit calls of ``context_enter`` and ``context_exit``."""
+
     context: Semantics
     pop: bool
 
@@ -77,15 +247,18 @@ class LMContextPlan(BaseExecutionPlan, SemanticModel):
 
     def execute(self) -> Any:
         if not self.pop:
-            _contexts.append(self.context)
+            push_context(self.context)
         else:
-            _contexts.remove(self.context)
+            pop_context(self.context)
 
 
 @register
 class LMBackend(BaseBackend):
 
-    _contexts: list[Semantics] = []
+    @classmethod
+    def __semantic_dependencies__(cls) -> list[type[SupportsSemanticFunction]]:
+        # Deterministic fast paths are attempted before calling the language model.
+        return [LocalBackend]
 
     @classmethod
     def __semantic_function__(
@@ -109,15 +282,20 @@ class LMBackend(BaseBackend):
         if _contexts:
             request = request.model_copy(update={"contexts": request.contexts + _contexts})
 
-        if hasattr(request.operator, "__name__"):
-            func_name = request.operator.__name__
-            prompt_config_path = Path(__file__).parent / "prompts" / f"{func_name}.yaml"
-            if not prompt_config_path.exists():
-                # fallback to universal prompt
-                prompt_config_path = Path(__file__).parent / "prompts" / "universal.yaml"
-        else:
-            prompt_config_path = Path(__file__).parent / "prompts" / "universal.yaml"
-        prompt = SemantipyPromptTemplate.from_file(prompt_config_path).input(request)
-        plan = LMExecutionPlan(prompt=prompt)
+        prompt = SemantipyPromptTemplate.from_file(get_prompt_file(request.operator)).input(request)
+        policy = generation.get_generation_policy(request.operator, request.return_type)
+        if policy is not None:
+            prompt = policy.apply(prompt)
+        plan = LMExecutionPlan(prompt=prompt, generation=policy)
+
+        strategy_name = strategy.get_strategy(request)
+        if strategy_name is not None:
+            # The generation policy is made for the default prompt, which remains as the fallback.
+            strategy_prompt = SemantipyPromptTemplate.from_file(get_prompt_file(request.operator, strategy_name))
+            plan.sign(cls.__name__, "created as fallback")
+            plan = LMExecutionPlan(prompt=strategy_prompt.input(request), fallback=plan)
+            plan.sign(cls.__name__, f"created with strategy {strategy_name}")
+            return plan
+
         plan.sign(cls.__name__, "created")
         return plan
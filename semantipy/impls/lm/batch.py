@@ -0,0 +1,334 @@
+from __future__ import annotations
+
+__all__ = [
+    "BatchClient",
+    "OpenAIBatchClient",
+    "LocalBatchClient",
+    "DeferredBatch",
+    "deferred_batch",
+]
+
+import json
+import logging
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, TYPE_CHECKING
+
+from langchain.chat_models.base import BaseChatModel
+from langchain.schema import AIMessage, BaseMessage, HumanMessage, SystemMessage
+
+from semantipy.impls.metrics import increment
+from semantipy.ops.base import CompactRequest
+from semantipy.ops.memoize import results_not_cacheable
+from semantipy.semantics import Text
+
+from . import dryrun, generation
+
+if TYPE_CHECKING:
+    from .backend import LMExecutionPlan
+
+_logger = logging.getLogger(__name__)
+
+_deferred_batch: DeferredBatch | None = None
+
+_ENDPOINT = "/v1/chat/completions"
+_TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+_roles = {"system": "system", "human": "user", "ai": "assistant"}
+_message_types = {"system": SystemMessage, "user": HumanMessage, "assistant": AIMessage}
+
+
+def message_to_dict(message: BaseMessage) -> dict:
+    return {"role": _roles.get(message.type, message.type), "content": message.content}
+
+
+def message_from_dict(message: dict) -> BaseMessage:
+    return _message_types[message["role"]](content=message["content"])
+
+
+class BatchClient:
+    """Submit the batch files of a provider's batch API, in the OpenAI format, and fetch their results.
+
+    Each line of a batch file is a request, ``{"custom_id": ..., "method": "POST", "url": ..., "body": ...}``,
+    and each result is ``{"custom_id": ..., "response": {"status_code": ..., "body": ...}, "error": ...}``.
+    """
+
+    def submit(self, path: Path) -> str:
+        """Submit the batch file. Return the id of the batch."""
+        raise NotImplementedError()
+
+    def poll(self, batch_id: str) -> str:
+        """The status of the batch, e.g., ``in_progress`` or ``completed``."""
+        raise NotImplementedError()
+
+    def results(self, batch_id: str) -> Iterator[dict]:
+        """The results of a completed batch."""
+        raise NotImplementedError()
+
+
+class OpenAIBatchClient(BatchClient):
+    """The batch API of OpenAI. The results are available within the completion window, usually 24 hours."""
+
+    def __init__(self, client: Any = None, completion_window: str = "24h"):
+        if client is None:
+            from openai import OpenAI
+
+            client = OpenAI()
+        self.client = client
+        self.completion_window = completion_window
+
+    def submit(self, path: Path) -> str:
+        with open(path, "rb") as file:
+            input_file = self.client.files.create(file=file, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=input_file.id, endpoint=_ENDPOINT, completion_window=self.completion_window
+        )
+        return batch.id
+
+    def poll(self, batch_id: str) -> str:
+        return self.client.batches.retrieve(batch_id).status
+
+    def results(self, batch_id: str) -> Iterator[dict]:
+        batch = self.client.batches.retrieve(batch_id)
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id is None:
+                continue
+            for line in self.client.files.content(file_id).text.splitlines():
+                if line.strip():
+                    yield json.loads(line)
+
+
+class LocalBatchClient(BatchClient):
+    """A stand-in batch service, which processes the batch files with a chat model, e.g., for tests.
+
+    The batches are processed in a background thread when they are submitted.
+    """
+
+    def __init__(self, lm: BaseChatModel):
+        self.lm = lm
+        self._batches: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, path: Path) -> str:
+        batch_id = f"batch-{uuid.uuid4().hex}"
+        requests = [json.loads(line) for line in Path(path).read_text(encoding="utf-8").splitlines() if line.strip()]
+        with self._lock:
+            self._batches[batch_id] = {"status": "in_progress", "results": []}
+        threading.Thread(target=self._process, args=(batch_id, requests), daemon=True).start()
+        return batch_id
+
+    def _process(self, batch_id: str, requests: List[dict]) -> None:
+        results = []
+        for request in requests:
+            body = dict(request["body"])
+            messages = [message_from_dict(message) for message in body.pop("messages")]
+            body.pop("model", None)
+            try:
+                response = self.lm.invoke(messages, **body)
+                choice = {"index": 0, "message": {"role": "assistant", "content": response.content}}
+                if response.response_metadata.get("logprobs") is not None:
+                    choice["logprobs"] = response.response_metadata["logprobs"]
+                result = {"status_code": 200, "body": {"object": "chat.completion", "choices": [choice]}}
+                results.append({"custom_id": request["custom_id"], "response": result, "error": None})
+            except Exception as error:
+                error_body = {"code": type(error).__name__, "message": str(error)}
+                results.append({"custom_id": request["custom_id"], "response": None, "error": error_body})
+        with self._lock:
+            self._batches[batch_id] = {"status": "completed", "results": results}
+
+    def poll(self, batch_id: str) -> str:
+        with self._lock:
+            return self._batches[batch_id]["status"]
+
+    def results(self, batch_id: str) -> Iterator[dict]:
+        with self._lock:
+            return iter(list(self._batches[batch_id]["results"]))
+
+
+class _Entry:
+    """The request of one operator call, the parsers of its outputs (several if the request is chunked),
+    and the future of its result.
+
+    The plans are not kept: only the compact request and what parsing the outputs needs,
+    so that a large batch takes little memory until its results are available.
+    """
+
+    def __init__(self, plans: List[LMExecutionPlan]):
+        request = plans[0].request
+        self.request = CompactRequest.from_request(request) if request is not None else None
+        self.parsers = [plan.prompt.parser for plan in plans]
+        self.logprobs = [plan.generation is not None and plan.generation.logprobs for plan in plans]
+        self.future: Future = Future()
+        self.outputs: List[Any] = [None] * len(plans)
+        self.remaining = len(plans)
+
+    def parse_output(self, index: int, output: Text) -> Any:
+        parser = self.parsers[index]
+        return Text(output) if parser is None else parser.parse(output)
+
+
+class DeferredBatch:
+    """Collect the language model plans into a batch file instead of invoking the language model.
+
+    Each collected operator call returns a ``Future`` of its result. The results are available once the batch
+    is submitted and completed, see :func:`deferred_batch`.
+    """
+
+    def __init__(
+        self,
+        client: BatchClient,
+        model: str | None = None,
+        directory: str | Path | None = None,
+        poll_interval: float = 30.0,
+    ):
+        self.client = client
+        self.model = model
+        self.directory = directory
+        self.poll_interval = poll_interval
+        self.path: Path | None = None
+        self.batch_id: str | None = None
+        self._requests: List[dict] = []
+        # The entry and the chunk index by custom id.
+        self._pending: Dict[str, tuple[_Entry, int]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._requests)
+
+    def _model_name(self) -> str:
+        if self.model is not None:
+            return self.model
+        from .backend import _get_or_load_global_lm
+
+        lm = _get_or_load_global_lm()
+        return getattr(lm, "model_name", None) or getattr(lm, "model", None) or "gpt-4o"
+
+    def add(self, plans: List[LMExecutionPlan]) -> Future:
+        """Add the plans of an operator call to the batch. Return the future of the result."""
+        entry = _Entry(plans)
+        model = self._model_name()
+        with self._lock:
+            if self.batch_id is not None:
+                raise RuntimeError("The batch is already submitted.")
+            for index, plan in enumerate(plans):
+                custom_id = f"request-{len(self._requests)}"
+                body: Dict[str, Any] = {"model": model, "messages": [message_to_dict(m) for m in plan.lm_input()]}
+                if plan.generation is not None:
+                    body.update(plan.generation.invoke_kwargs())
+                self._requests.append({"custom_id": custom_id, "method": "POST", "url": _ENDPOINT, "body": body})
+                self._pending[custom_id] = (entry, index)
+        request = entry.request
+        increment("lm.batch.requests", len(plans), operator=dryrun.operator_name(request and request.operator))
+        return entry.future
+
+    def submit(self) -> Optional[str]:
+        """Write the batch file and submit it. Return the id of the batch, or None if the batch is empty."""
+        with self._lock:
+            if self.batch_id is not None or not self._requests:
+                return self.batch_id
+            with tempfile.NamedTemporaryFile(
+                "w", suffix=".jsonl", prefix="semantipy-batch-", dir=self.directory, delete=False, encoding="utf-8"
+            ) as file:
+                for request in self._requests:
+                    file.write(json.dumps(request, ensure_ascii=False) + "\n")
+            self.path = Path(file.name)
+            self.batch_id = self.client.submit(self.path)
+        _logger.info("Submitted batch %s with %d requests (%s).", self.batch_id, len(self._requests), self.path)
+        return self.batch_id
+
+    def wait(self, timeout: float | None = None) -> None:
+        """Poll the batch until it is finished, and resolve the futures with the results."""
+        if self.batch_id is None:
+            return
+        deadline = None if timeout is None else time.monotonic() + timeout
+        status = self.client.poll(self.batch_id)
+        while status not in _TERMINAL_STATUSES:
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(f"The batch {self.batch_id} is still {status}.")
+            time.sleep(self.poll_interval)
+            status = self.client.poll(self.batch_id)
+        if status == "completed":
+            for result in self.client.results(self.batch_id):
+                self._resolve(result)
+        # The requests without a result.
+        for custom_id in list(self._pending):
+            self._fail(custom_id, RuntimeError(f"No result for {custom_id} in the batch {self.batch_id} ({status})."))
+
+    def _resolve(self, result: dict) -> None:
+        custom_id = result.get("custom_id")
+        if custom_id not in self._pending:
+            return
+        response = result.get("response") or {}
+        if result.get("error") or response.get("status_code") != 200:
+            self._fail(custom_id, RuntimeError(f"The request {custom_id} failed: {result.get('error') or response}"))
+            return
+        entry, index = self._pending[custom_id]
+        choice = response["body"]["choices"][0]
+        output = Text(choice["message"]["content"])
+        if entry.logprobs[index]:
+            message = AIMessage(content=output, response_metadata={"logprobs": choice.get("logprobs")})
+            decision = generation.boolean_from_logprobs(message)
+            if decision is not None:
+                output = Text(str(decision[0]))
+        try:
+            value = entry.parse_output(index, output)
+        except Exception as error:
+            self._fail(custom_id, error)
+            return
+        del self._pending[custom_id]
+        entry.outputs[index] = value
+        entry.remaining -= 1
+        if entry.remaining == 0 and not entry.future.done():
+            outputs = entry.outputs
+            # Chunked requests. The results of all chunks are concatenated.
+            entry.future.set_result(outputs[0] if len(outputs) == 1 else [item for out in outputs for item in out])
+
+    def _fail(self, custom_id: str, error: BaseException) -> None:
+        entry, _ = self._pending.pop(custom_id)
+        increment("lm.batch.failures")
+        if not entry.future.done():
+            entry.future.set_exception(error)
+
+
+@contextmanager
+def deferred_batch(
+    client: BatchClient,
+    *,
+    model: str | None = None,
+    directory: str | Path | None = None,
+    poll_interval: float = 30.0,
+    wait: bool = True,
+) -> Iterator[DeferredBatch]:
+    """Within the context, the operator calls that need the language model are deferred to a batch.
+
+    They return a ``Future`` instead of the result. When the context exits, the batch file is written
+    and submitted with the client. With ``wait``, the batch is polled until it is finished and the futures are
+    resolved. Otherwise, call ``batch.wait()`` later. ::
+
+        with semantipy.deferred_batch(OpenAIBatchClient()) as batch:
+            futures = [contains("intention to order a flight", message) for message in messages]
+        answers = [future.result() for future in futures]
+
+    The calls answered without the language model, e.g., by the local backend, return their results directly.
+    The calls split into several requests, e.g., element-wise on a ``SemanticList``, return one future.
+
+    The plans are sent as they are: the outputs failing to parse are not re-asked, the fallback plans of the
+    prompt strategies are not run, and the cascade (see :func:`configure_cascade`) is skipped, so the requests
+    go to the batch model only. The futures of the outputs failing to parse raise the parse errors.
+    """
+    global _deferred_batch
+    previous = _deferred_batch
+    batch = _deferred_batch = DeferredBatch(client, model=model, directory=directory, poll_interval=poll_interval)
+    try:
+        with results_not_cacheable():
+            yield batch
+    finally:
+        _deferred_batch = previous
+    batch.submit()
+    if wait:
+        batch.wait()
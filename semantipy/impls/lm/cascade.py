@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+__all__ = [
+    "CascadePolicy",
+    "configure_cascade",
+    "get_escalation_rate",
+]
+
+import math
+from typing import Any, Dict, List, Literal, Optional, TYPE_CHECKING
+
+from langchain.schema import BaseMessage
+from pydantic import Field
+
+from semantipy import tracing
+from semantipy.impls.metrics import get_metrics, increment
+from semantipy.semantics import SemanticModel, Text
+
+from . import dryrun, generation, http_pool
+
+if TYPE_CHECKING:
+    from .backend import LMExecutionPlan
+
+# Cascade policies by operator. None matches any.
+_cascades: Dict[Any, CascadePolicy] = {}
+
+
+def mean_token_probability(response: BaseMessage) -> Optional[float]:
+    """The geometric mean of the probabilities of the output tokens (OpenAI format), or None if not available."""
+    logprobs = (getattr(response, "response_metadata", None) or {}).get("logprobs") or {}
+    content = [token["logprob"] for token in logprobs.get("content") or [] if token.get("logprob") is not None]
+    if not content:
+        return None
+    return math.exp(sum(content) / len(content))
+
+
+class CascadePolicy(SemanticModel):
+    """Answer with a cheap language model first, and escalate to the configured model only if it is uncertain.
+
+    - ``lm``: the cheap language model.
+    - ``confidence``: how the confidence of the cheap model is estimated:
+
+      - ``"parse"``: 1 if the output parses, 0 otherwise.
+      - ``"logprobs"``: the probability of the answer for the boolean answers in a single token
+        (see :meth:`GenerationPolicy.short_boolean`), or the geometric mean of the probabilities of the output
+        tokens otherwise. 0 if the model does not return the log-probabilities.
+      - ``"consistency"``: the fraction of ``samples`` answers that agree with the most frequent one.
+        The cheap model should sample with a positive temperature.
+
+    - ``threshold``: the minimum confidence to accept the answer of the cheap model.
+    """
+
+    # BaseChatModel. Not validated by pydantic, as the chat models of langchain may be pydantic v1 models.
+    lm: Any
+    confidence: Literal["parse", "logprobs", "consistency"] = "parse"
+    threshold: float = Field(default=0.9, ge=0.0, le=1.0)
+    samples: int = Field(default=3, ge=2)
+
+    def estimate(self, plan: LMExecutionPlan) -> tuple[Any, float]:
+        """Run the plan with the cheap model. Return the answer and its confidence."""
+        if self.confidence == "logprobs":
+            return self._estimate_logprobs(plan)
+        if self.confidence == "consistency":
+            return self._estimate_consistency(plan)
+        try:
+            return plan._run(), 1.0
+        except (ValueError, SyntaxError, TypeError):
+            return None, 0.0
+
+    def _estimate_logprobs(self, plan: LMExecutionPlan) -> tuple[Any, float]:
+        messages = plan.lm_input()
+        kwargs = plan.generation.invoke_kwargs() if plan.generation is not None else {}
+        kwargs.update(logprobs=True, top_logprobs=5)
+        response = plan._call(lambda: self.lm.invoke(messages, **kwargs))
+        if response is None or response.content is None:
+            return None, 0.0
+        output, confidence = Text(response.content), None
+        if plan.generation is not None and plan.generation.logprobs:
+            decision = generation.boolean_from_logprobs(response)
+            if decision is not None:
+                output, confidence = Text(str(decision[0])), decision[1]
+        if confidence is None:
+            confidence = mean_token_probability(response)
+        try:
+            answer = plan.parse_output(output)
+        except (ValueError, SyntaxError, TypeError):
+            return None, 0.0
+        return answer, confidence or 0.0
+
+    def _estimate_consistency(self, plan: LMExecutionPlan) -> tuple[Any, float]:
+        answers: List[Any] = []
+        for _ in range(self.samples):
+            try:
+                answers.append(plan._run())
+            except (ValueError, SyntaxError, TypeError):
+                continue
+        if not answers:
+            return None, 0.0
+        # The answers are not necessarily hashable.
+        counts = [sum(other == answer for other in answers) for answer in answers]
+        best = max(range(len(answers)), key=counts.__getitem__)
+        return answers[best], counts[best] / self.samples
+
+    def run(self, plan: LMExecutionPlan) -> Any:
+        operator = dryrun.operator_name(plan.request.operator if plan.request is not None else None)
+        increment("lm.cascade.calls", operator=operator)
+        cheap = plan.model_copy(update={"lm": self.lm})
+        cheap._signs = plan.list_signs().copy()
+        with tracing.span("lm.cascade", confidence=self.confidence) as cascade_span:
+            answer, confidence = self.estimate(cheap)
+            escalated = confidence < self.threshold
+            cascade_span.set(score=confidence, escalated=escalated)
+        if not escalated:
+            plan.sign(self.__class__.__name__, f"answered by the cheap model (confidence {confidence:.2f})")
+            return answer
+        increment("lm.cascade.escalations", operator=operator)
+        plan.sign(self.__class__.__name__, f"escalated (confidence {confidence:.2f})")
+        return plan._run_with_fallback()
+
+
+def get_cascade_policy(operator: Any = None) -> CascadePolicy | None:
+    for key in (operator, None):
+        try:
+            if key in _cascades:
+                return _cascades[key]
+        except TypeError:
+            continue
+    return None
+
+
+def configure_cascade(policy: CascadePolicy | None, operator: Any = None) -> None:
+    """Configure the cascade for an operator, or for all the operators without one.
+
+    The thresholds are set per operator by configuring a policy for each, e.g.::
+
+        cheap = CascadePolicy(lm=ChatOpenAI(model="gpt-4o-mini"), confidence="logprobs", threshold=0.95)
+        configure_cascade(cheap)
+        configure_cascade(cheap.model_copy(update={"threshold": 0.8}), operator=contains)
+
+    Set the policy to None to remove it.
+    """
+    if policy is None:
+        _cascades.pop(operator, None)
+    else:
+        http_pool.use_shared_http_client(policy.lm)
+        _cascades[operator] = policy
+
+
+def get_escalation_rate(operator: Any = None) -> float | None:
+    """The fraction of the cascaded calls escalated to the configured model, for an operator or in total.
+
+    None if no call is cascaded yet."""
+    suffix = "" if operator is None else "{operator=" + dryrun.operator_name(operator) + "}"
+    metrics = get_metrics("lm.cascade.")
+    calls = metrics.get("lm.cascade.calls" + suffix, 0)
+    if not calls:
+        return None
+    return metrics.get("lm.cascade.escalations" + suffix, 0) / calls
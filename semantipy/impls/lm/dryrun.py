@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+__all__ = [
+    "dry_run",
+    "DryRunReport",
+    "OperatorUsage",
+    "placeholder_value",
+]
+
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, TYPE_CHECKING
+
+from pydantic import BaseModel, Field, PrivateAttr
+
+from semantipy.ops.base import SemanticOperationRequest
+from semantipy.ops.memoize import results_not_cacheable
+from semantipy.semantics import SemanticModel, Text
+
+if TYPE_CHECKING:
+    from .backend import LMExecutionPlan
+
+_logger = logging.getLogger(__name__)
+
+_dry_run_report: DryRunReport | None = None
+
+
+def placeholder_value(return_type: Any, return_iterable: bool = False) -> Any:
+    """Create a value of the expected return type without calling the language model."""
+    if return_iterable:
+        return []
+    if not isinstance(return_type, type) or issubclass(return_type, str):
+        return Text("")
+    if issubclass(return_type, BaseModel):
+        return return_type.model_construct()
+    try:
+        return return_type()
+    except Exception:
+        return None
+
+
+def operator_name(operator: Any) -> str:
+    return getattr(operator, "__name__", None) or str(operator)
+
+
+class OperatorUsage(SemanticModel):
+    """Usage statistics of one operator collected in a dry run."""
+
+    calls: int = 0
+    prompt_tokens: int = 0
+
+
+class DryRunReport(SemanticModel):
+    """Calls and estimated prompt tokens of all the LM plans executed in a dry run, grouped by operator."""
+
+    usage: Dict[str, OperatorUsage] = Field(default_factory=dict)
+
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    @property
+    def total_calls(self) -> int:
+        return sum(usage.calls for usage in self.usage.values())
+
+    @property
+    def total_prompt_tokens(self) -> int:
+        return sum(usage.prompt_tokens for usage in self.usage.values())
+
+    def record(self, plans: List[LMExecutionPlan]) -> Any:
+        """Record the plans (possibly chunks of one request) and return a placeholder result."""
+        request = plans[0].prompt.user_input
+        if isinstance(request, SemanticOperationRequest):
+            name = operator_name(request.operator)
+            result = placeholder_value(request.return_type, request.return_iterable)
+        else:
+            name = "<prompt>"
+            result = Text("")
+
+        prompt_tokens = sum(plan.estimate_tokens() for plan in plans)
+        with self._lock:
+            usage = self.usage.setdefault(name, OperatorUsage())
+            usage.calls += len(plans)
+            usage.prompt_tokens += prompt_tokens
+        return result
+
+    def summary(self) -> str:
+        lines = [f"{'Operator':<30} {'Calls':>8} {'Prompt tokens':>14}"]
+        for name, usage in sorted(self.usage.items()):
+            lines.append(f"{name[:30]:<30} {usage.calls:>8} {usage.prompt_tokens:>14}")
+        lines.append(f"{'Total':<30} {self.total_calls:>8} {self.total_prompt_tokens:>14}")
+        return "\n".join(lines)
+
+
+@contextmanager
+def dry_run() -> Iterator[DryRunReport]:
+    """Within the context, LM plans are rendered but not sent to the language model.
+
+    Every operator call returns a placeholder value of the expected return type,
+    and the calls and estimated prompt tokens are recorded in the yielded report.
+    The summary is logged when the context exits. ::
+
+        with semantipy.dry_run() as report:
+            run_pipeline()
+        print(report.total_prompt_tokens)
+    """
+    global _dry_run_report
+    previous = _dry_run_report
+    report = _dry_run_report = DryRunReport()
+    try:
+        with results_not_cacheable():
+            yield report
+    finally:
+        _dry_run_report = previous
+        _logger.info("Dry run finished.\n%s", report.summary())
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+__all__ = ["EditScriptError", "parse_edit_script", "apply_edit_script"]
+
+import re
+from typing import List, Tuple
+
+_edit_block_regex = re.compile(
+    r"^<{5,} ?SEARCH[ \t]*\n(?P<search>.*?)\n?^={5,}[ \t]*\n(?P<replace>.*?)\n?^>{5,} ?REPLACE[ \t]*$",
+    re.DOTALL | re.MULTILINE,
+)
+
+
+class EditScriptError(ValueError):
+    """The edit script is malformed or does not apply to the original content."""
+
+    pass
+
+
+def parse_edit_script(script: str) -> List[Tuple[str, str]]:
+    """Parse the search/replace blocks of an edit script.
+
+    Each block is a ``<<<<<<< SEARCH`` line, the text to find, a ``=======`` line,
+    the text to replace it with, and a ``>>>>>>> REPLACE`` line.
+    """
+    blocks = [(match.group("search"), match.group("replace")) for match in _edit_block_regex.finditer(script)]
+    if not blocks:
+        raise EditScriptError(f"No edit block found in the output: {script}")
+    return blocks
+
+
+def _locate(text: str, search: str) -> Tuple[int, int]:
+    # Exact match first, then tolerate the leading and trailing whitespace of the search text.
+    for candidate in (search, search.strip()):
+        if not candidate:
+            continue
+        start = text.find(candidate)
+        if start < 0:
+            continue
+        if text.find(candidate, start + 1) >= 0:
+            raise EditScriptError(f"The search text is ambiguous, found more than once: {candidate!r}")
+        return start, start + len(candidate)
+    raise EditScriptError(f"The search text is not found in the original content: {search!r}")
+
+
+def apply_edit_script(original: str, script: str) -> str:
+    """Apply the blocks of an edit script in order. Each search text must be found exactly once."""
+    text = original
+    for search, replace in parse_edit_script(script):
+        start, end = _locate(text, search)
+        if search != text[start:end]:
+            # The whitespace around the search text was tolerated. Keep the original one.
+            replace = replace.strip()
+        text = text[:start] + replace + text[end:]
+    return text
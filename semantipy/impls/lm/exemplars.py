@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+__all__ = ["ExemplarStore"]
+
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Callable, Iterable, List
+
+import numpy as np
+
+from semantipy.ops.base import SemanticOperationRequest
+from semantipy.semantics import Semantics, Exemplar
+
+_token_regex = re.compile(r"\w+")
+
+
+def _tokenize(text: str) -> List[str]:
+    return _token_regex.findall(text.lower())
+
+
+def _request_text(request: Semantics | str) -> str:
+    """The text used to measure the similarity between requests."""
+    if isinstance(request, SemanticOperationRequest):
+        parts = request.operands()
+        if request.index is not None:
+            parts.append(request.index)
+        return "\n".join(str(part) for part in parts)
+    return str(request)
+
+
+class ExemplarStore(Semantics):
+    """A library of exemplars, of which only the ``k`` most relevant to the current request are put in the prompt.
+
+    Attach the store to an operator like any other context, e.g., ``select.context(store)``,
+    or ``with semantipy.context(store): ...``.
+
+    The relevance is measured between the operands of the exemplar input and those of the current request.
+    By default, it's the lexical BM25 score.
+    If ``embedding`` is provided (a function mapping a list of texts to a matrix of vectors),
+    the cosine similarity of the embeddings is used instead.
+    The selected exemplars are ordered by increasing relevance, so that the most relevant one is the closest to the user input.
+    """
+
+    def __init__(
+        self,
+        exemplars: Iterable[Exemplar] = (),
+        k: int = 3,
+        embedding: Callable[[List[str]], np.ndarray] | None = None,
+        bm25_k1: float = 1.5,
+        bm25_b: float = 0.75,
+    ):
+        self.exemplars: List[Exemplar] = list(exemplars)
+        self.k = k
+        self.embedding = embedding
+        self.bm25_k1 = bm25_k1
+        self.bm25_b = bm25_b
+
+        self._lock = threading.Lock()
+        self._indexed = 0
+        self._postings: dict[str, list[tuple[int, int]]] = defaultdict(list)
+        self._doc_lengths: list[int] = []
+        self._vectors: np.ndarray | None = None
+
+    def __len__(self) -> int:
+        return len(self.exemplars)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({len(self.exemplars)} exemplars, k={self.k})"
+
+    def add(self, input: Semantics | str, output: Semantics | str) -> None:
+        self.exemplars.append(Exemplar(input=input, output=output))
+
+    def _update_index(self) -> None:
+        # Index the exemplars added since the last update.
+        with self._lock:
+            new_exemplars = self.exemplars[self._indexed :]
+            if not new_exemplars:
+                return
+            texts = [_request_text(exemplar.input) for exemplar in new_exemplars]
+            if self.embedding is not None:
+                vectors = self._normalize(np.asarray(self.embedding(texts), dtype=np.float32))
+                self._vectors = vectors if self._vectors is None else np.concatenate([self._vectors, vectors])
+            else:
+                for doc_id, text in enumerate(texts, start=self._indexed):
+                    tokens = _tokenize(text)
+                    for term, frequency in Counter(tokens).items():
+                        self._postings[term].append((doc_id, frequency))
+                    self._doc_lengths.append(len(tokens))
+            self._indexed = len(self.exemplars)
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def scores(self, request: Semantics | str) -> np.ndarray:
+        """Relevance of each exemplar to the request."""
+        self._update_index()
+        query = _request_text(request)
+        terms = set(_tokenize(query)) if self.embedding is None else set()
+        # Score against a snapshot of the index, which other threads may be extending.
+        with self._lock:
+            vectors = self._vectors
+            doc_lengths = np.asarray(self._doc_lengths, dtype=np.float32)
+            term_postings = {term: list(self._postings[term]) for term in terms if term in self._postings}
+
+        if self.embedding is not None:
+            if vectors is None:
+                return np.zeros(0, dtype=np.float32)
+            query_vector = self._normalize(np.asarray(self.embedding([query]), dtype=np.float32))[0]
+            return vectors @ query_vector
+
+        scores = np.zeros(len(doc_lengths), dtype=np.float32)
+        if not len(doc_lengths):
+            return scores
+        average_length = max(float(doc_lengths.mean()), 1.0)
+        for postings in term_postings.values():
+            if not postings:
+                continue
+            idf = math.log(1 + (len(doc_lengths) - len(postings) + 0.5) / (len(postings) + 0.5))
+            doc_ids, frequencies = np.asarray(postings, dtype=np.int64).T
+            normalizer = self.bm25_k1 * (1 - self.bm25_b + self.bm25_b * doc_lengths[doc_ids] / average_length)
+            scores[doc_ids] += idf * frequencies * (self.bm25_k1 + 1) / (frequencies + normalizer)
+        return scores
+
+    def select(self, request: Semantics | str, k: int | None = None) -> List[Exemplar]:
+        """Select the ``k`` exemplars most relevant to the request."""
+        k = self.k if k is None else k
+        if k <= 0 or not self.exemplars:
+            return []
+        scores = self.scores(request)
+        # Rank by decreasing score. Ties are broken by insertion order.
+        ranking = np.lexsort((np.arange(len(scores)), -scores))[:k]
+        return [self.exemplars[index] for index in reversed(ranking.tolist())]
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+__all__ = [
+    "GenerationPolicy",
+    "configure_generation_policy",
+]
+
+import math
+from typing import Any, Dict, List, Optional
+
+from langchain.schema import BaseMessage
+from pydantic import Field
+
+from semantipy.semantics import SemanticModel, Text
+
+from .template import RegexOutputParser, SemantipyPromptTemplate
+
+# Generation policies by (operator, return type). None matches any.
+_generation_policies: Dict[tuple, GenerationPolicy] = {}
+
+
+class GenerationPolicy(SemanticModel):
+    """How the language model generates the answer of a request.
+
+    - ``max_tokens``: limit of the output tokens.
+    - ``stop``: stop sequences.
+    - ``formatting``: if set, a terse answer is asked instead: it replaces the instructions, the formatting
+      instructions and the exemplars of the prompt, which usually ask the model to reason before answering.
+    - ``pattern``: if set, replaces the pattern of the output parser, e.g., to match the terse answer.
+    - ``logprobs``: for boolean answers, decide between ``True`` and ``False`` with the log-probabilities
+      of the first output token, when the model returns them.
+
+    See :meth:`short_boolean` and :meth:`short_number` for the policies of short-answer operators.
+    """
+
+    max_tokens: Optional[int] = Field(default=None)
+    stop: Optional[List[str]] = Field(default=None)
+    formatting: Optional[str] = Field(default=None)
+    pattern: Optional[str] = Field(default=None)
+    logprobs: bool = False
+
+    @classmethod
+    def short_boolean(cls, logprobs: bool = True) -> GenerationPolicy:
+        """Answer ``True`` or ``False`` in a single token."""
+        return cls(
+            max_tokens=1,
+            stop=["\n"],
+            formatting="Answer with a single word: True or False. Output nothing else.",
+            pattern=r"(True|False)",
+            logprobs=logprobs,
+        )
+
+    @classmethod
+    def short_number(cls, max_tokens: int = 16) -> GenerationPolicy:
+        """Answer a single number."""
+        return cls(
+            max_tokens=max_tokens,
+            stop=["\n"],
+            formatting="Answer with the number only. Output nothing else.",
+            pattern=r"([-+]?\d+(?:\.\d+)?)",
+        )
+
+    def apply(self, prompt: SemantipyPromptTemplate) -> SemantipyPromptTemplate:
+        """Adapt the prompt to the policy."""
+        update: Dict[str, Any] = {}
+        if self.formatting is not None:
+            update.update(instructions=None, formatting=Text(self.formatting), exemplars=None)
+        if self.pattern is not None and isinstance(prompt.parser, RegexOutputParser):
+            update["parser"] = prompt.parser.model_copy(update={"pattern": self.pattern, "giveup": False})
+        return prompt.model_copy(update=update) if update else prompt
+
+    def invoke_kwargs(self) -> Dict[str, Any]:
+        """The arguments of ``BaseChatModel.invoke``."""
+        kwargs: Dict[str, Any] = {}
+        if self.max_tokens is not None:
+            kwargs["max_tokens"] = self.max_tokens
+        if self.stop is not None:
+            kwargs["stop"] = self.stop
+        if self.logprobs:
+            kwargs["logprobs"] = True
+            kwargs["top_logprobs"] = 5
+        return kwargs
+
+
+def boolean_from_logprobs(response: BaseMessage) -> Optional[tuple[bool, float]]:
+    """Decide a boolean answer from the top log-probabilities of the first output token (OpenAI format).
+
+    Return the answer and its probability among ``True`` and ``False``, or None if they are not available.
+    """
+    logprobs = (getattr(response, "response_metadata", None) or {}).get("logprobs") or {}
+    content = logprobs.get("content") or []
+    if not content:
+        return None
+    probabilities = {True: 0.0, False: 0.0}
+    for candidate in content[0].get("top_logprobs") or []:
+        token = candidate["token"].strip().lower()
+        if token in ("true", "false"):
+            probabilities[token == "true"] += math.exp(candidate["logprob"])
+    total = probabilities[True] + probabilities[False]
+    if total == 0:
+        return None
+    answer = probabilities[True] >= probabilities[False]
+    return answer, probabilities[answer] / total
+
+
+def get_generation_policy(operator: Any = None, return_type: Any = None) -> GenerationPolicy | None:
+    for key in ((operator, return_type), (operator, None), (None, return_type), (None, None)):
+        try:
+            if key in _generation_policies:
+                return _generation_policies[key]
+        except TypeError:
+            # Unhashable return types, e.g., in exemplars.
+            continue
+    return None
+
+
+def configure_generation_policy(policy: GenerationPolicy | None, operator: Any = None, return_type: Any = None) -> None:
+    """Configure the generation policy for an operator, a return type, or an operator with a return type.
+
+    The most specific policy applies: the one of the operator with the return type, then the one of the operator,
+    then the one of the return type, then the one configured without operator or return type.
+    For example, to answer all the boolean questions in a single token::
+
+        configure_generation_policy(GenerationPolicy.short_boolean(), return_type=bool)
+
+    Set the policy to None to remove it.
+    """
+    if policy is None:
+        _generation_policies.pop((operator, return_type), None)
+    else:
+        _generation_policies[(operator, return_type)] = policy
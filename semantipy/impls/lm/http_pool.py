@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+__all__ = [
+    "HTTPPoolConfig",
+    "configure_http_pool",
+    "get_http_client",
+    "get_http_pool_stats",
+    "use_shared_http_client",
+]
+
+import importlib.util
+import logging
+import threading
+import weakref
+from typing import Any, Dict
+
+import httpx
+from langchain.chat_models.base import BaseChatModel
+
+from semantipy.impls.metrics import increment
+from semantipy.semantics import SemanticModel
+
+_logger = logging.getLogger(__name__)
+
+_http_pool_config: HTTPPoolConfig | None = None
+_http_client: httpx.Client | None = None
+_lock = threading.Lock()
+
+# The models connected to the shared pool, by id, re-connected when the pool is reconfigured.
+_connected_models: weakref.WeakValueDictionary[int, BaseChatModel] = weakref.WeakValueDictionary()
+
+
+class HTTPPoolConfig(SemanticModel):
+    """The HTTP connection pool shared by the language models.
+
+    - ``max_connections``: connections open at the same time, in total.
+    - ``max_keepalive_connections`` and ``keepalive_expiry``: idle connections kept open, and for how many seconds.
+    - ``http2``: use HTTP/2 if the ``h2`` package is installed.
+    - ``timeout``: seconds for each request, unless the model sets its own.
+    """
+
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    http2: bool = True
+    timeout: float = 60.0
+
+    @property
+    def http2_enabled(self) -> bool:
+        return self.http2 and importlib.util.find_spec("h2") is not None
+
+
+def _trace(event_name: str, info: dict) -> None:
+    # Called by httpcore for each step of a request.
+    if event_name == "connection.connect_tcp.complete":
+        increment("http.connections_opened")
+    elif event_name == "connection.start_tls.complete":
+        increment("http.tls_handshakes")
+
+
+def _on_request(request: httpx.Request) -> None:
+    increment("http.requests", host=request.url.host)
+    request.extensions["trace"] = _trace
+
+
+def _create_client(config: HTTPPoolConfig) -> httpx.Client:
+    limits = httpx.Limits(
+        max_connections=config.max_connections,
+        max_keepalive_connections=config.max_keepalive_connections,
+        keepalive_expiry=config.keepalive_expiry,
+    )
+    return httpx.Client(
+        limits=limits,
+        http2=config.http2_enabled,
+        timeout=config.timeout,
+        event_hooks={"request": [_on_request]},
+    )
+
+
+def get_http_client() -> httpx.Client | None:
+    """The shared HTTP client, or None if no pool is configured."""
+    global _http_client
+    if _http_pool_config is None:
+        return None
+    with _lock:
+        if _http_client is None:
+            _http_client = _create_client(_http_pool_config)
+        return _http_client
+
+
+def configure_http_pool(config: HTTPPoolConfig | None) -> None:
+    """Share one pool of HTTP connections among all the language models.
+
+    The pool is injected into the configured model (see :func:`configure_lm`) and into the default model.
+    Other models, e.g., those of a router, can be connected with :func:`use_shared_http_client`.
+    When the pool is reconfigured, all the connected models are moved to the new pool, and the previous pool
+    is closed. The pool is counted in the ``http.requests``, ``http.connections_opened``
+    and ``http.tls_handshakes`` metrics.
+
+    Set the config to None to stop sharing. The models already using the pool keep it.
+    """
+    global _http_pool_config, _http_client
+    with _lock:
+        previous = _http_client
+        _http_pool_config = config
+        if config is None:
+            # The connected models keep using the previous client, which is closed when a pool is configured again.
+            return
+        _http_client = None
+        models = list(_connected_models.values())
+
+    from .backend import _lm
+
+    if _lm is not None:
+        models.append(_lm)
+    for model in models:
+        use_shared_http_client(model)
+    if previous is not None:
+        previous.close()
+
+
+def use_shared_http_client(lm: BaseChatModel) -> bool:
+    """Make the model send its requests through the shared pool.
+
+    The OpenAI-compatible models (e.g., ``ChatOpenAI`` and ``AzureChatOpenAI``) are supported,
+    as well as models wrapping one in their ``model`` attribute (e.g., ``RecordReplayChatModel``).
+    Only the synchronous client is replaced. Return whether the model is supported.
+    """
+    client = get_http_client()
+    if client is None:
+        return False
+    root_client = getattr(lm, "root_client", None)
+    if root_client is not None and hasattr(root_client, "with_options"):
+        if root_client._client is not client:
+            lm.root_client = root_client.with_options(http_client=client)
+            lm.client = lm.root_client.chat.completions
+            lm.http_client = client
+        with _lock:
+            _connected_models[id(lm)] = lm
+        return True
+    wrapped = getattr(lm, "model", None)
+    if isinstance(wrapped, BaseChatModel):
+        return use_shared_http_client(wrapped)
+    _logger.debug("%s does not support a shared HTTP client.", type(lm).__name__)
+    return False
+
+
+def get_http_pool_stats() -> Dict[str, Any]:
+    """The connections currently in the shared pool."""
+    client = _http_client if _http_pool_config is not None else None
+    pool = getattr(getattr(client, "_transport", None), "_pool", None)
+    if pool is None:
+        return {"connections": 0, "idle": 0, "active": 0}
+    connections = list(pool.connections)
+    idle = sum(1 for connection in connections if connection.is_idle())
+    return {"connections": len(connections), "idle": idle, "active": len(connections) - idle}
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+__all__ = [
+    "PromptCache",
+    "configure_prompt_cache",
+    "get_prompt_cache",
+    "schema_fingerprint",
+]
+
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+from importlib import metadata
+from pathlib import Path
+from typing import Any
+
+from jinja2 import FileSystemBytecodeCache
+
+_logger = logging.getLogger(__name__)
+
+# Bump when the layout of the entries changes in a way the schema fingerprint does not capture.
+CACHE_FORMAT = 1
+
+
+def semantipy_version() -> str:
+    try:
+        return metadata.version("semantipy")
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+def schema_fingerprint(*classes: type) -> str:
+    """A hash of the fields of the pydantic classes, which changes whenever a field is added, removed or retyped."""
+    digest = hashlib.sha256()
+    for cls in classes:
+        fields = getattr(cls, "model_fields", {})
+        private = getattr(cls, "__private_attributes__", {})
+        digest.update(f"{cls.__module__}.{cls.__qualname__}".encode())
+        for name, field in fields.items():
+            digest.update(f"|{name}:{field.annotation!r}".encode())
+        for name in private:
+            digest.update(f"|_{name}".encode())
+        digest.update(b";")
+    return digest.hexdigest()[:16]
+
+
+class PromptCache:
+    """An on-disk cache that lets a fresh process skip the preparation of the prompt templates.
+
+    It stores the prompt templates loaded from the YAML files, including the exemplar requests
+    and their pre-rendered inputs, under ``<directory>/templates``,
+    and the compiled jinja2 templates under ``<directory>/jinja``.
+    The entries are keyed by the semantipy version, the cache format, the schema fingerprint of the cached classes
+    and the hash of the prompt file, so that editing a prompt, changing the classes or upgrading semantipy
+    never picks up a stale entry. The entries failing to unpickle are treated as missing.
+
+    The entries are pickled. Only point the cache to a directory that you trust.
+    """
+
+    def __init__(self, directory: Path | str):
+        self.directory = Path(directory)
+        (self.directory / "templates").mkdir(parents=True, exist_ok=True)
+        (self.directory / "jinja").mkdir(parents=True, exist_ok=True)
+        self.bytecode_cache = FileSystemBytecodeCache(str(self.directory / "jinja"))
+        self.version = semantipy_version()
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({str(self.directory)!r})"
+
+    def key(self, name: str, source: bytes, schema: str = "") -> str:
+        digest = hashlib.sha256()
+        for part in (self.version.encode(), str(CACHE_FORMAT).encode(), schema.encode(), name.encode(), source):
+            digest.update(len(part).to_bytes(8, "little"))
+            digest.update(part)
+        return digest.hexdigest()[:32]
+
+    def _path(self, name: str, source: bytes, schema: str) -> Path:
+        return self.directory / "templates" / f"{Path(name).stem}-{self.key(name, source, schema)}.pkl"
+
+    def load(self, name: str, source: bytes, schema: str = "") -> Any | None:
+        """Load the entry of a prompt file. Return None if it's missing or unreadable.
+
+        ``schema`` identifies the layout of the cached classes, see :func:`schema_fingerprint`.
+        """
+        path = self._path(name, source, schema)
+        try:
+            with path.open("rb") as file:
+                return pickle.load(file)
+        except FileNotFoundError:
+            return None
+        except Exception as error:
+            _logger.warning("Ignoring the broken prompt cache entry %s: %s", path, error)
+            return None
+
+    def store(self, name: str, source: bytes, value: Any, schema: str = "") -> None:
+        """Store the entry of a prompt file. The file is replaced atomically so that concurrent workers can share the cache."""
+        path = self._path(name, source, schema)
+        try:
+            fd, temp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "wb") as file:
+                pickle.dump(value, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, path)
+        except Exception as error:
+            _logger.warning("Failed to write the prompt cache entry %s: %s", path, error)
+
+    def clear(self) -> None:
+        for path in (self.directory / "templates").glob("*.pkl"):
+            path.unlink(missing_ok=True)
+        self.bytecode_cache.clear()
+
+
+_prompt_cache: PromptCache | None = (
+    PromptCache(os.environ["SEMANTIPY_PROMPT_CACHE"]) if os.environ.get("SEMANTIPY_PROMPT_CACHE") else None
+)
+
+
+def get_prompt_cache() -> PromptCache | None:
+    return _prompt_cache
+
+
+def configure_prompt_cache(directory: Path | str | None) -> PromptCache | None:
+    """Cache the prepared prompt templates in a directory, shared by all the processes that use it.
+
+    The cache can also be enabled with the ``SEMANTIPY_PROMPT_CACHE`` environment variable.
+    Set the directory to None to disable it.
+    """
+    global _prompt_cache
+    _prompt_cache = PromptCache(directory) if directory is not None else None
+    return _prompt_cache
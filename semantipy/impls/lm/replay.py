@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+__all__ = [
+    "RecordReplayChatModel",
+    "TranscriptStore",
+    "prompt_fingerprint",
+]
+
+import hashlib
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Literal, Optional, Union
+
+from langchain.schema import BaseMessage, AIMessage
+from langchain.chat_models.base import BaseChatModel
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+
+def prompt_fingerprint(messages: List[BaseMessage], stop: Optional[List[str]] = None, **kwargs: Any) -> str:
+    """A stable fingerprint of the rendered messages and the generation arguments."""
+    payload = json.dumps(
+        {
+            "messages": [[message.type, message.content] for message in messages],
+            "stop": stop,
+            "kwargs": kwargs,
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+class TranscriptStore:
+    """An append-only JSONL file of recorded responses, indexed by prompt fingerprint.
+
+    Each line is ``{"key": ..., "response": ..., "latency": ...}``,
+    plus the rendered ``messages`` if ``store_messages`` is enabled.
+    When a fingerprint is recorded several times, the latest record wins.
+    """
+
+    def __init__(self, path: Path | str, store_messages: bool = False):
+        self.path = Path(path)
+        self.store_messages = store_messages
+        self._records: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+        if self.path.exists():
+            with self.path.open(encoding="utf-8") as file:
+                for line in file:
+                    if line.strip():
+                        record = json.loads(line)
+                        self._records[record["key"]] = record
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def get(self, key: str) -> dict | None:
+        return self._records.get(key)
+
+    def append(self, key: str, response: str, latency: float, messages: List[BaseMessage] | None = None) -> None:
+        record: Dict[str, Any] = {"key": key, "response": response, "latency": round(latency, 4)}
+        if self.store_messages and messages is not None:
+            record["messages"] = [[message.type, message.content] for message in messages]
+        with self._lock:
+            self._records[key] = record
+            with self.path.open("a", encoding="utf-8") as file:
+                file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+_stores: Dict[str, TranscriptStore] = {}
+_stores_lock = threading.Lock()
+
+
+class RecordReplayChatModel(BaseChatModel):
+    """A chat model that records the responses of another chat model and serves them back offline.
+
+    Modes:
+
+    - ``record``: always call the wrapped model and append the response to the transcript.
+    - ``replay``: only serve the recorded responses. Raise ``LookupError`` on a missing prompt.
+    - ``auto``: serve the recorded response if present, otherwise call the wrapped model and record it.
+
+    In replay, ``simulated_latency`` can be set to a number of seconds,
+    or to ``"recorded"`` to sleep for as long as the original call took.
+    """
+
+    model: Optional[BaseChatModel] = None
+    path: str
+    mode: Literal["record", "replay", "auto"] = "auto"
+    simulated_latency: Union[float, Literal["recorded"], None] = None
+    store_messages: bool = False
+
+    @property
+    def _llm_type(self) -> str:
+        return "record-replay"
+
+    @property
+    def store(self) -> TranscriptStore:
+        # Models pointing to the same file share one store, so that appends are serialized.
+        key = str(Path(self.path).resolve())
+        with _stores_lock:
+            if key not in _stores:
+                _stores[key] = TranscriptStore(self.path, store_messages=self.store_messages)
+            return _stores[key]
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        key = prompt_fingerprint(messages, stop, **kwargs)
+
+        record = self.store.get(key) if self.mode != "record" else None
+        if record is not None:
+            if self.simulated_latency == "recorded":
+                time.sleep(record["latency"])
+            elif self.simulated_latency:
+                time.sleep(self.simulated_latency)
+            response = record["response"]
+        elif self.mode == "replay":
+            raise LookupError(f"No recorded response for the prompt (fingerprint {key}) in {self.path}")
+        else:
+            if self.model is None:
+                raise ValueError(f"A model is required to record responses in {self.mode} mode.")
+            start_time = time.perf_counter()
+            response = self.model.invoke(messages, stop=stop, **kwargs).content
+            self.store.append(key, response, time.perf_counter() - start_time, messages)
+
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=response))])
@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+__all__ = [
+    "RetryPolicy",
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "configure_retry_policy",
+    "configure_circuit_breaker",
+]
+
+import logging
+import random
+import threading
+import time
+from typing import Any, Callable, Optional, TypeVar
+
+from pydantic import Field
+
+from semantipy.impls.base import BaseExecutionPlan
+from semantipy.impls.metrics import increment
+from semantipy.semantics import SemanticModel
+
+_logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_RETRYABLE_ERROR_NAMES = {
+    "APIConnectionError",
+    "APITimeoutError",
+    "RateLimitError",
+    "InternalServerError",
+    "ServiceUnavailableError",
+}
+_RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+# Retry policies by operator. The policy under key None applies to all the other operators.
+_retry_policies: dict[Any, RetryPolicy] = {}
+_circuit_breaker: CircuitBreaker | None = None
+
+
+def is_retryable_error(error: BaseException) -> bool:
+    """Transient errors: timeouts, connection errors, rate limits and server-side errors."""
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    if type(error).__name__ in _RETRYABLE_ERROR_NAMES:
+        return True
+    return getattr(error, "status_code", None) in _RETRYABLE_STATUS_CODES
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised without calling the language model when the circuit breaker is open."""
+
+    pass
+
+
+class RetryPolicy(SemanticModel):
+    """How to retry the invocation of the language model.
+
+    - ``max_attempts``: attempts in total for retryable errors (see ``is_retryable_error``).
+    - ``initial_backoff``, ``backoff_multiplier`` and ``max_backoff``: exponential backoff in seconds between attempts.
+    - ``jitter``: randomly vary each backoff by up to this fraction.
+    - ``timeout``: seconds to wait for each attempt. The attempt is abandoned (and retried) after that.
+    - ``parse_retries``: times to re-ask the language model when its output fails to parse.
+    """
+
+    max_attempts: int = 3
+    initial_backoff: float = 1.0
+    backoff_multiplier: float = 2.0
+    max_backoff: float = 30.0
+    jitter: float = 0.5
+    timeout: Optional[float] = Field(default=None)
+    parse_retries: int = 1
+
+    def backoff(self, attempt: int) -> float:
+        """Seconds to wait after the given attempt (starting from 1) fails."""
+        delay = min(self.initial_backoff * self.backoff_multiplier ** (attempt - 1), self.max_backoff)
+        return delay * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def call(self, func: Callable[[], T], plan: BaseExecutionPlan | None = None, operator: str = "") -> T:
+        """Call the function with timeout and retries.
+
+        Retries are signed on the plan so that they appear in the dispatch log.
+        """
+        attempt = 1
+        while True:
+            try:
+                return _call_with_circuit_breaker(lambda: _call_with_timeout(func, self.timeout))
+            except Exception as error:
+                if isinstance(error, TimeoutError):
+                    increment("lm.timeouts", operator=operator)
+                if attempt >= self.max_attempts or not is_retryable_error(error):
+                    raise
+                delay = self.backoff(attempt)
+                increment("lm.retries", operator=operator)
+                message = f"attempt {attempt} failed with {type(error).__name__}, retrying in {delay:.2f}s"
+                _logger.warning("%s: %s", operator, message)
+                if plan is not None:
+                    plan.sign(self.__class__.__name__, message)
+                time.sleep(delay)
+                attempt += 1
+
+
+class CircuitBreaker:
+    """Fail fast when the language model keeps failing.
+
+    After ``failure_threshold`` consecutive transient failures (see ``is_retryable_error``), the circuit opens and all the calls
+    raise :class:`CircuitOpenError` immediately. After ``reset_timeout`` seconds,
+    one trial call is let through (half-open): the circuit closes if it succeeds, and reopens otherwise.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def before_call(self) -> None:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return
+            if state == "half_open" and not self._trial_running:
+                self._trial_running = True
+                return
+        increment("lm.circuit_breaker.rejected")
+        raise CircuitOpenError(f"Circuit breaker is open after {self._failures} consecutive failures.")
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._trial_running or self._failures >= self.failure_threshold:
+                if self._opened_at is None or self._trial_running:
+                    increment("lm.circuit_breaker.opened")
+                self._opened_at = time.monotonic()
+            self._trial_running = False
+
+
+def _call_with_timeout(func: Callable[[], T], timeout: float | None) -> T:
+    if timeout is None:
+        return func()
+
+    result: list = []
+    errors: list = []
+
+    def target():
+        try:
+            result.append(func())
+        except BaseException as error:
+            errors.append(error)
+
+    # A hung request can not be cancelled. It's left running in a daemon thread.
+    thread = threading.Thread(target=target, name="semantipy-lm-call", daemon=True)
+    thread.start()
+    thread.join(timeout)
+    if thread.is_alive():
+        raise TimeoutError(f"The language model did not respond in {timeout} seconds.")
+    if errors:
+        raise errors[0]
+    return result[0]
+
+
+def _call_with_circuit_breaker(func: Callable[[], T]) -> T:
+    breaker = _circuit_breaker
+    if breaker is None:
+        return func()
+    breaker.before_call()
+    try:
+        result = func()
+    except Exception as error:
+        if is_retryable_error(error):
+            breaker.record_failure()
+        else:
+            # The language model answered, e.g., with an invalid request error, so it's available.
+            breaker.record_success()
+        raise
+    breaker.record_success()
+    return result
+
+
+def get_retry_policy(operator: Any = None) -> RetryPolicy | None:
+    if operator is not None and operator in _retry_policies:
+        return _retry_policies[operator]
+    return _retry_policies.get(None)
+
+
+def configure_retry_policy(policy: RetryPolicy | None, operator: Any = None) -> None:
+    """Configure the retry policy of the language model calls, for one operator or (by default) all operators.
+
+    Without any policy configured, the errors are raised immediately and the calls never time out.
+    Set the policy to None to remove it.
+    """
+    if policy is None:
+        _retry_policies.pop(operator, None)
+    else:
+        _retry_policies[operator] = policy
+
+
+def configure_circuit_breaker(breaker: CircuitBreaker | None) -> None:
+    """Configure a circuit breaker shared by all the language model calls. Set to None to disable it."""
+    global _circuit_breaker
+    _circuit_breaker = breaker
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+__all__ = ["segment_text", "number_segments", "parse_segment_ranges", "slice_segments"]
+
+import functools
+import re
+from typing import List, Tuple
+
+_line_regex = re.compile(r"[^\n]+")
+_sentence_end_regex = re.compile(r"(?<=[.!?])\s+(?=\S)")
+_range_regex = re.compile(r"(\d+)\s*(?:-|–|to)\s*(\d+)|(\d+)")
+
+
+@functools.lru_cache(maxsize=32)
+def segment_text(text: str) -> Tuple[Tuple[int, int], ...]:
+    """Split the text into segments, i.e., the sentences of each line, as ``(start, end)`` offsets.
+
+    Blank lines and the whitespace around the segments are not covered.
+    """
+    segments = []
+    for line in _line_regex.finditer(text):
+        start = line.start()
+        boundaries = [match.span() for match in _sentence_end_regex.finditer(line.group())]
+        for boundary_start, boundary_end in boundaries + [(len(line.group()), len(line.group()))]:
+            segment = text[start : line.start() + boundary_start]
+            stripped = segment.strip()
+            if stripped:
+                offset = start + segment.index(stripped)
+                segments.append((offset, offset + len(stripped)))
+            start = line.start() + boundary_end
+    return tuple(segments)
+
+
+def number_segments(text: str) -> str:
+    """The text with one numbered segment per line, e.g., ``[1] First sentence.``"""
+    return "\n".join(f"[{index}] {text[start:end]}" for index, (start, end) in enumerate(segment_text(text), 1))
+
+
+def parse_segment_ranges(output: str, count: int) -> List[Tuple[int, int]]:
+    """Parse the segment numbers in the output, e.g., ``3-5, 8``, into inclusive 1-based ranges."""
+    ranges = []
+    for match in _range_regex.finditer(output):
+        if match.group(3) is not None:
+            first = last = int(match.group(3))
+        else:
+            first, last = int(match.group(1)), int(match.group(2))
+        if not 1 <= first <= last <= count:
+            raise ValueError(f"Invalid segment range {match.group()} for {count} segments.")
+        ranges.append((first, last))
+    return ranges
+
+
+def slice_segments(text: str, ranges: List[Tuple[int, int]]) -> List[str]:
+    """The substrings of the text covered by the segment ranges, from the first segment to the last one."""
+    segments = segment_text(text)
+    return [text[segments[first - 1][0] : segments[last - 1][1]] for first, last in ranges]
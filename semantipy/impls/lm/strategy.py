@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+__all__ = ["configure_strategy"]
+
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+from semantipy.ops.base import SemanticOperationRequest
+
+# Strategies by operator: (strategy, min_operand_length).
+_strategies: Dict[Any, Tuple[str, int]] = {}
+
+
+def strategy_prompt_file(operator: Any, strategy: str) -> Path:
+    return Path(__file__).parent / "prompts" / f"{operator.__name__}_{strategy}.yaml"
+
+
+def get_strategy(request: SemanticOperationRequest) -> str | None:
+    """The strategy configured for the request, if its operand is long enough."""
+    try:
+        strategy, min_operand_length = _strategies[request.operator]
+    except (KeyError, TypeError):
+        return None
+    if not isinstance(request.operand, str) or len(request.operand) < min_operand_length:
+        return None
+    # The strategies are made for text outputs.
+    if request.return_type is not None and not (
+        isinstance(request.return_type, type) and issubclass(request.return_type, str)
+    ):
+        return None
+    return strategy
+
+
+def configure_strategy(operator: Any, strategy: str | None, *, min_operand_length: int = 0) -> None:
+    """Use an alternative prompt for an operator, namely ``prompts/<operator>_<strategy>.yaml``.
+
+    The strategy only applies to the text operands of at least ``min_operand_length`` characters.
+    If the output of the alternative prompt fails to parse, the request falls back to the default prompt.
+    The available strategies are:
+
+    - ``apply``, ``"edit"``: the model writes search/replace blocks, which are applied to the operand locally,
+      instead of rewriting the whole operand.
+    - ``select`` and ``select_iter``, ``"span"``: the operand is presented as numbered segments (sentences of each line),
+      the model answers the segment numbers, and the segments are sliced from the operand locally.
+      The results are exact substrings of the operand.
+
+    The strategies only apply to the requests returning text.
+
+    Set the strategy to None to use the default prompt again.
+    """
+    if strategy is None:
+        _strategies.pop(operator, None)
+        return
+    if not strategy_prompt_file(operator, strategy).exists():
+        raise ValueError(f"Strategy {strategy!r} is not available for {operator}.")
+    _strategies[operator] = (strategy, min_operand_length)
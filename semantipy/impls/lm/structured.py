@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+__all__ = [
+    "configure_structured_output",
+    "output_schema",
+]
+
+from typing import Any, Dict, List, Optional, Type
+
+from pydantic import BaseModel, Field, create_model
+
+from semantipy.semantics import Text
+
+_structured_output: bool = False
+
+_schema_cache: Dict[tuple, Optional[Type[BaseModel]]] = {}
+
+
+def configure_structured_output(enabled: bool = True) -> None:
+    """Ask the language model for a structured output (i.e., tool calling) instead of free text,
+    when the expected return type is not plain text.
+
+    The output is validated with pydantic against the JSON schema derived from the return type.
+    The models that do not support structured outputs fall back to the regex parsers.
+    """
+    global _structured_output
+    _structured_output = enabled
+
+
+def _value_type(return_type: Any) -> Any:
+    if return_type is None or (isinstance(return_type, type) and issubclass(return_type, str)):
+        return str
+    if return_type in (int, float, bool, list, dict):
+        return return_type
+    if isinstance(return_type, type) and issubclass(return_type, BaseModel):
+        return return_type
+    return None
+
+
+def output_schema(return_type: Any, multi: bool = False) -> Optional[Type[BaseModel]]:
+    """The model of the structured output for a return type: ``{"value": <return_type>}``,
+    or ``{"value": [<return_type>, ...]}`` if multiple values are expected.
+
+    Return None if a structured output is useless (a single text) or not supported for the return type.
+    """
+    key = (return_type, multi)
+    if key not in _schema_cache:
+        value_type = _value_type(return_type)
+        if value_type is None or (value_type is str and not multi):
+            _schema_cache[key] = None
+        else:
+            _schema_cache[key] = create_model(
+                "Answer",
+                __doc__="The answer to the request.",
+                value=(List[value_type] if multi else value_type, Field(...)),  # type: ignore
+            )
+    return _schema_cache[key]
+
+
+def to_value(schema: Type[BaseModel], output: Any, return_type: Any) -> Any:
+    """Validate the structured output and convert it to the return type."""
+    if output is None:
+        raise ValueError("The language model did not return a structured output.")
+    value = schema.model_validate(output).value
+    if return_type is None or (isinstance(return_type, type) and issubclass(return_type, str)):
+        text_type = return_type or Text
+        return [text_type(item) for item in value] if isinstance(value, list) else text_type(value)
+    return value
@@ -0,0 +1,277 @@
+from __future__ import annotations
+
+__all__ = [
+    "SynthesisPolicy",
+    "SynthesisBackend",
+    "configure_synthesis",
+    "get_synthesized_programs",
+]
+
+import logging
+import random
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Tuple
+
+from pydantic import Field
+
+from semantipy.code import PythonFunction
+from semantipy.impls.base import BaseBackend, BaseExecutionPlan, BackendNotImplemented, LambdaExecutionPlan
+from semantipy.impls.base import list_backends, register_backend, unregister_backend
+from semantipy.impls.metrics import increment
+from semantipy.ops import cast
+from semantipy.ops.base import Dispatcher, SemanticOperationRequest, SupportsSemanticFunction
+from semantipy.ops.memoize import _global_contexts, canonical_key
+from semantipy.semantics import SemanticModel
+
+from . import batch, dryrun
+from .backend import LMBackend, LMExecutionPlan
+
+_logger = logging.getLogger(__name__)
+
+_policy: SynthesisPolicy | None = None
+
+_ENTRYPOINT = "solve"
+
+
+class SynthesisPolicy(SemanticModel):
+    """When to replace the language model with a synthesized program.
+
+    - ``min_observations``: the number of answers of the language model to observe for an operator,
+      with the same guest operand and return type, before a program is synthesized.
+    - ``min_accuracy``: the fraction of the observed answers the program must reproduce to be accepted.
+    - ``spot_check_rate``: the fraction of the calls still answered by the language model once a program is used.
+      The program is dropped as soon as it disagrees with the language model.
+    - ``max_attempts``: the number of syntheses attempted per operator, guest operand and return type.
+    - ``max_observations``: the number of answers kept per operator, guest operand and return type.
+    """
+
+    min_observations: int = 20
+    min_accuracy: float = 1.0
+    spot_check_rate: float = Field(default=0.05, ge=0.0, le=1.0)
+    max_attempts: int = 2
+    max_observations: int = 100
+
+
+class _Task:
+    """The observed answers of one operator, guest operand and return type, and the program replacing them."""
+
+    def __init__(self, request: SemanticOperationRequest):
+        self.request = request
+        self.observations: List[Tuple[str, Any]] = []
+        self.attempts = 0
+        # The answers observed since the last synthesis attempt.
+        self.pending = 0
+        self.function: PythonFunction | None = None
+        self.program: Callable[[str], Any] | None = None
+        self.lock = threading.Lock()
+
+    def observe(self, operand: str, answer: Any, policy: SynthesisPolicy) -> bool:
+        """Record an answer. Return whether it is time to synthesize a program."""
+        with self.lock:
+            self.observations.append((operand, answer))
+            del self.observations[: -policy.max_observations]
+            self.pending += 1
+            return (
+                self.program is None and self.attempts < policy.max_attempts and self.pending >= policy.min_observations
+            )
+
+    def describe(self) -> str:
+        request = self.request
+        lines = [
+            f"Write a Python function `{_ENTRYPOINT}(operand: str)` which computes "
+            f"`{getattr(request.operator, '__name__', request.operator)}(operand"
+            + (f", {request.guest_operand!r}" if request.guest_operand is not None else "")
+            + ")`"
+            + (f" at index {request.index!r}" if request.index is not None else "")
+            + ".",
+        ]
+        if request.return_type is not None:
+            lines.append(f"It returns {'a list of ' if request.return_iterable else ''}{request.return_type}.")
+        lines.append("Use the standard library only. It must reproduce the following examples:")
+        for operand, answer in self.observations:
+            lines.append(f"{_ENTRYPOINT}({operand!r}) == {answer!r}")
+        lines.append(
+            f"Answer a JSON object with the keys `entrypoint` (namely `{_ENTRYPOINT}`), "
+            "`content` (the code of the function) and `intent` (what the function does)."
+        )
+        return "\n".join(lines)
+
+    def synthesize(self, policy: SynthesisPolicy) -> None:
+        with self.lock:
+            if self.program is not None or self.attempts >= policy.max_attempts:
+                return
+            self.attempts += 1
+            self.pending = 0
+            observations = list(self.observations)
+            description = self.describe()
+        increment("synthesis.attempts")
+        try:
+            function = cast(description, PythonFunction)
+            program = PythonFunction._execute_code(function.content, function.entrypoint)
+        except Exception as error:
+            _logger.warning("Failed to synthesize a program for %s: %s", self.request.operator, error)
+            increment("synthesis.rejected")
+            return
+        correct = 0
+        for operand, answer in observations:
+            try:
+                correct += _agrees(program(operand), answer)
+            except Exception:
+                pass
+        if correct < policy.min_accuracy * len(observations):
+            _logger.info(
+                "Rejected the program synthesized for %s: %d/%d answers reproduced.",
+                self.request.operator,
+                correct,
+                len(observations),
+            )
+            increment("synthesis.rejected")
+            return
+        with self.lock:
+            self.function, self.program = function, program
+        increment("synthesis.accepted")
+
+    def drop(self) -> None:
+        with self.lock:
+            self.function = self.program = None
+            self.pending = 0
+
+
+def _agrees(result: Any, answer: Any) -> bool:
+    if isinstance(answer, str) and isinstance(result, str):
+        return result.strip() == answer.strip()
+    return result == answer
+
+
+_tasks: Dict[Hashable, _Task] = {}
+_tasks_lock = threading.Lock()
+
+
+def _task_key(request: SemanticOperationRequest) -> Hashable | None:
+    if not isinstance(request.operand, str) or request.other_operands or request.contexts or _global_contexts():
+        return None
+    if request.return_type is PythonFunction:
+        # The synthesis requests themselves.
+        return None
+    try:
+        return (
+            request.operator,
+            canonical_key(request.guest_operand),
+            canonical_key(request.index),
+            request.return_type,
+            request.return_iterable,
+        )
+    except TypeError:
+        return None
+
+
+def _get_task(request: SemanticOperationRequest) -> _Task | None:
+    key = _task_key(request)
+    if key is None:
+        return None
+    try:
+        with _tasks_lock:
+            if key not in _tasks:
+                _tasks[key] = _Task(request)
+            return _tasks[key]
+    except TypeError:
+        # Unhashable operators or return types.
+        return None
+
+
+class SynthesisBackend(BaseBackend):
+    """Answer the repeated requests with programs synthesized from the answers of the language model.
+
+    The requests of the same operator, guest operand and return type, on text operands, form a task.
+    After enough answers of the language model are observed for a task, a program is synthesized with
+    ``cast(..., PythonFunction)`` and validated against them. Later requests of the task call the program instead
+    of the language model, except for the spot checks.
+
+    The synthesized programs are executed in the current process. Enable the backend with
+    :func:`configure_synthesis` only if the code written by the language model is trusted.
+    """
+
+    @classmethod
+    def __semantic_dependencies__(cls) -> list[type[SupportsSemanticFunction]]:
+        # The plan of the language model is observed, and replaced once a program is available.
+        return [LMBackend]
+
+    @classmethod
+    def __semantic_function__(
+        cls,
+        request: SemanticOperationRequest,
+        dispatcher: Dispatcher | None = None,
+        plan: BaseExecutionPlan | None = None,
+    ) -> BaseExecutionPlan:
+        policy = _policy
+        if policy is None or not isinstance(plan, LMExecutionPlan):
+            raise BackendNotImplemented("Only the plans of the language model are replaced.")
+        task = _get_task(request)
+        if task is None:
+            raise BackendNotImplemented("The request is not eligible for synthesis.")
+        operand = str(request.operand)
+        lm_plan = plan
+
+        program = task.program
+        if program is not None and random.random() >= policy.spot_check_rate:
+
+            def run_program() -> Any:
+                try:
+                    result = program(operand)
+                except Exception as error:
+                    _logger.info("The program synthesized for %s failed: %s", request.operator, error)
+                    increment("synthesis.program_errors")
+                    return lm_plan.execute()
+                increment("synthesis.calls_saved")
+                return result
+
+            plan = LambdaExecutionPlan(run_program)
+            plan.sign(cls.__name__, "replaced with the synthesized program")
+            plan.set_final()
+            return plan
+
+        def run_and_observe() -> Any:
+            answer = lm_plan.execute()
+            if dryrun._dry_run_report is not None or batch._deferred_batch is not None:
+                # Placeholders or futures, not answers.
+                return answer
+            if program is not None:
+                increment("synthesis.spot_checks")
+                try:
+                    agrees = _agrees(program(operand), answer)
+                except Exception:
+                    agrees = False
+                if not agrees:
+                    _logger.info("The program synthesized for %s is dropped after a spot check.", request.operator)
+                    increment("synthesis.spot_check_failures")
+                    task.drop()
+            if task.observe(operand, answer, policy):
+                task.synthesize(policy)
+            return answer
+
+        plan = LambdaExecutionPlan(run_and_observe)
+        plan.sign(cls.__name__, "spot check" if program is not None else "observed")
+        return plan
+
+
+def get_synthesized_programs() -> Dict[Any, PythonFunction]:
+    """The programs in use, by (operator, guest operand, index, return type, return iterable)."""
+    with _tasks_lock:
+        return {key: task.function for key, task in _tasks.items() if task.function is not None}
+
+
+def configure_synthesis(policy: SynthesisPolicy | None = None, *, clear: bool = False) -> None:
+    """Enable the :class:`SynthesisBackend` with a policy, or disable it with None.
+
+    With ``clear``, the observed answers and the synthesized programs are discarded.
+    The synthesized programs run in the current process, so only enable it with a trusted language model.
+    """
+    global _policy
+    _policy = policy
+    if policy is not None and SynthesisBackend not in list_backends():
+        register_backend(SynthesisBackend)
+    if policy is None and SynthesisBackend in list_backends():
+        unregister_backend(SynthesisBackend)
+    if clear:
+        with _tasks_lock:
+            _tasks.clear()
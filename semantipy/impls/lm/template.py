@@ -1,18 +1,23 @@
 from __future__ import annotations
 
 __all__ = [
+    "OutputParser",
     "RegexOutputParser",
+    "EditScriptParser",
+    "SpanOutputParser",
     "SemantipyPromptTemplate",
+    "configure_prompt_layout",
 ]
 
 import ast
+import functools
 import re
 from pathlib import Path
-from typing import List, Optional, Any, Union
+from typing import ClassVar, List, Optional, Any, Union, Literal
 
 import yaml
 from jinja2 import Template, Environment, PackageLoader
-from pydantic import Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, PrivateAttr
 
 from langchain.prompts import ChatPromptTemplate
 from langchain.schema import BaseMessage, ChatMessage, SystemMessage, HumanMessage, AIMessage
@@ -20,23 +25,124 @@ from langchain.schema import BaseMessage, ChatMessage, SystemMessage, HumanMessa
 from semantipy.ops.base import SemanticOperationRequest
 from semantipy.semantics import Semantics, SemanticModel, Text, Exemplar
 
+from .exemplars import ExemplarStore
+from .edits import apply_edit_script
+from .prompt_cache import get_prompt_cache, schema_fingerprint
+from .spans import number_segments, parse_segment_ranges, segment_text, slice_segments
+
+PromptLayout = Literal["interleaved", "stable_prefix"]
+
+_prompt_layout: PromptLayout = "interleaved"
+
+_layout_templates: dict[str, str] = {
+    "interleaved": "main.jinja2",
+    "stable_prefix": "main_stable_prefix.jinja2",
+}
+
+
+def configure_prompt_layout(layout: PromptLayout) -> None:
+    """Configure the layout of the rendered prompts globally.
+
+    The ``interleaved`` layout (default) folds the system exemplars into the system message
+    when the user provides exemplars of their own.
+    The ``stable_prefix`` layout always renders the system message and the system exemplars first,
+    and appends all the per-request content (user exemplars, contexts and input) at the end,
+    so that the leading messages are byte-identical across calls of the same operator.
+    That allows the prompt-prefix caching of LM providers to kick in.
+    """
+    global _prompt_layout
+    if layout not in _layout_templates:
+        raise ValueError(f"Unknown prompt layout: {layout}")
+    _prompt_layout = layout
+
+
+_environment: Environment | None = None
+
+# The input templates are rendered with the default settings of jinja2, same as ``Template(source)``.
+_input_environment = Environment()
+_input_environment.filters["numbered_segments"] = number_segments
+
+_message_regex = re.compile(
+    r"<\|semantipy_chat_(?P<role>system|human|ai)\|>\s*(?P<content>.*?)(?=\s*<\|semantipy_chat_\w+\|>|$)",
+    re.DOTALL,
+)
+
+
+# Prompt templates loaded from files, by (class, path, modification time, size).
+_loaded_templates: dict[tuple, SemantipyPromptTemplate] = {}
+
+
+def get_environment() -> Environment:
+    global _environment
+    prompt_cache = get_prompt_cache()
+    bytecode_cache = prompt_cache.bytecode_cache if prompt_cache is not None else None
+    if _environment is None or _environment.bytecode_cache is not bytecode_cache:
+        _environment = Environment(
+            loader=PackageLoader("semantipy", "impls/lm/prompts"),
+            trim_blocks=True,
+            lstrip_blocks=True,
+            bytecode_cache=bytecode_cache,
+        )
+    return _environment
+
 
 def get_template(name: str) -> Template:
-    env = Environment(loader=PackageLoader("semantipy", "impls/lm/prompts"), trim_blocks=True, lstrip_blocks=True)
-    return env.get_template(name)
+    # The environment caches the compiled templates.
+    return get_environment().get_template(name)
 
 
-class RegexOutputParser(SemanticModel):
-    """Use a regular expression to parse the output."""
+@functools.lru_cache(maxsize=256)
+def get_input_template(source: str) -> Template:
+    return _input_environment.from_string(source)
+
+
+def _dump(value: Any) -> Any:
+    """Dump the pydantic models in a value, like ``model_dump`` does on the fields, without copying the rest."""
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    if isinstance(value, list):
+        return [_dump(item) for item in value]
+    return value
+
+
+class OutputParser(SemanticModel):
+    """Parse the output of the language model into the return value.
+
+    The parsers which post-process the output (e.g., with the original operand) set ``structured_output``
+    to False, so that the output is never asked as a structured output (see :func:`configure_structured_output`).
+    """
+
+    structured_output: ClassVar[bool] = True
 
-    pattern: str
     return_type: Optional[type] = Field(default=None)
     multi: bool = Field(default=False)
+
+    def bind(self, request: SemanticOperationRequest) -> OutputParser:
+        """Fork the parser for the request."""
+        if (self.return_type, self.multi) == (request.return_type, request.return_iterable):
+            return self
+        return self.model_copy(update={"return_type": request.return_type, "multi": request.return_iterable})
+
+    def parse(self, output: Text) -> Any:
+        raise NotImplementedError()
+
+
+class RegexOutputParser(OutputParser):
+    """Use a regular expression to parse the output."""
+
+    pattern: str
     giveup: bool = Field(default=False)  # The parser will return the original output if it fails to parse.
 
     def to_return_type(self, value: Any) -> Any:
         if self.return_type is None:
             return value
+        if isinstance(self.return_type, type) and issubclass(self.return_type, BaseModel):
+            if isinstance(value, str):
+                try:
+                    return self.return_type.model_validate_json(value)
+                except ValueError:
+                    value = ast.literal_eval(value.strip())
+            return self.return_type.model_validate(value)
         if isinstance(value, str) and not issubclass(self.return_type, str):
             value = ast.literal_eval(value)
         return self.return_type(value)  # type: ignore
@@ -56,6 +162,65 @@ class RegexOutputParser(SemanticModel):
         return all_matches
 
 
+class EditScriptParser(OutputParser):
+    """Apply the edit script in the output (search/replace blocks) to the original operand."""
+
+    structured_output: ClassVar[bool] = False
+
+    original: Optional[str] = Field(default=None)
+
+    def bind(self, request: SemanticOperationRequest) -> EditScriptParser:
+        return self.model_copy(update={"original": str(request.operand)})
+
+    def parse(self, output: Text) -> Text:
+        if self.original is None:
+            raise ValueError("The original content is required to apply the edit script.")
+        return Text(apply_edit_script(self.original, output))
+
+
+class SpanOutputParser(OutputParser):
+    """Slice the segments numbered in the output (e.g., ``3-5``) from the original operand.
+
+    The operand is presented to the model with the ``numbered_segments`` filter of the input template.
+    """
+
+    structured_output: ClassVar[bool] = False
+
+    original: Optional[str] = Field(default=None)
+
+    def bind(self, request: SemanticOperationRequest) -> SpanOutputParser:
+        return self.model_copy(update={"original": str(request.operand), "multi": request.return_iterable})
+
+    def parse(self, output: Text) -> Text | List[Text]:
+        if self.original is None:
+            raise ValueError("The original content is required to slice the segments.")
+        # Only read the numbers after the **Segments:** marker, if any.
+        marker = output.rfind("Segments:")
+        if marker >= 0:
+            output = Text(output[marker + len("Segments:") :])
+        ranges = parse_segment_ranges(output, len(segment_text(self.original)))
+        pieces = [Text(piece) for piece in slice_segments(self.original, ranges)]
+        if self.multi:
+            return pieces
+        if not pieces:
+            raise ValueError(f"No segment number found in the output: {output}")
+        return pieces[0] if len(pieces) == 1 else Text("\n".join(pieces))
+
+
+# Parser types by the ``type`` in the prompt config.
+_parser_types: dict[str, type[OutputParser]] = {
+    "regex": RegexOutputParser,
+    "edit_script": EditScriptParser,
+    "span": SpanOutputParser,
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _cache_schema(template_type: type) -> str:
+    # The classes pickled in the prompt cache entries.
+    return schema_fingerprint(template_type, Exemplar, SemanticOperationRequest, *_parser_types.values())
+
+
 class SemantipyPromptTemplate(SemanticModel):
     """The general prompt template used by semantipy to implement the operators."""
 
@@ -69,29 +234,43 @@ class SemantipyPromptTemplate(SemanticModel):
     exemplars: Optional[List[Exemplar]] = Field(default=None)
 
     input_template: Optional[Text] = Field(default=None)
-    parser: Optional[RegexOutputParser] = Field(default=None)
+    parser: Optional[OutputParser] = Field(default=None)
 
     # User inputs provided by users.
     user_input: Union[Text, Semantics, None] = Field(default=None)
     user_exemplars: Optional[List[Exemplar]] = Field(default=None)
     user_contexts: Optional[List[Text]] = Field(default=None)
 
+    # Use the globally configured layout if not specified.
+    layout: Optional[PromptLayout] = Field(default=None)
+
+    # The rendered system exemplars, along with the exemplars and the input template they are rendered from.
+    _rendered_exemplars: Optional[tuple] = PrivateAttr(default=None)
+
+    @property
+    def effective_layout(self) -> PromptLayout:
+        return self.layout or _prompt_layout
+
     def input(self, request: SemanticOperationRequest | Text | str) -> SemantipyPromptTemplate:
         # Fork the current prompt template with the new user input.
         if isinstance(request, str):
             return self.model_copy(update={"user_input": Text(request)})
+        parser = self.parser.bind(request) if self.parser is not None else None
+        user_exemplars, user_contexts = [], []
+        for ctx in request.contexts:
+            if isinstance(ctx, ExemplarStore):
+                user_exemplars.extend(ctx.select(request))
+            elif isinstance(ctx, Exemplar):
+                user_exemplars.append(ctx)
+            else:
+                user_contexts.append(ctx)
         return self.model_copy(
             update={
-                "user_input": request.model_copy(update={"contexts": None}),
-                "user_exemplars": [ctx for ctx in request.contexts if isinstance(ctx, Exemplar)],
-                "user_contexts": [ctx for ctx in request.contexts if not isinstance(ctx, Exemplar)],
-                "parser": (
-                    self.parser.model_copy(
-                        update={"return_type": request.return_type, "multi": request.return_iterable}
-                    )
-                    if self.parser is not None
-                    else None
-                ),
+                # The contexts are kept in the request, but not rendered as a part of the user input.
+                "user_input": request,
+                "user_exemplars": user_exemplars,
+                "user_contexts": user_contexts,
+                "parser": parser,
             }
         )
 
@@ -99,40 +278,57 @@ class SemantipyPromptTemplate(SemanticModel):
         if isinstance(request, str):
             return Text(request)
         elif isinstance(request, SemanticOperationRequest) and self.input_template is not None:
-            return Text(Template(source=self.input_template).render(request.model_dump()))
+            variables = {name: _dump(getattr(request, name)) for name in SemanticOperationRequest.model_fields}
+            variables["contexts"] = None
+            return Text(get_input_template(self.input_template).render(variables))
         else:
             raise ValueError(f"Failed to render the input: {request}")
 
+    def _render_exemplars(self, exemplars: List[Exemplar] | None) -> List[dict] | None:
+        if exemplars is None:
+            return None
+        return [
+            {"input": self.render_exemplar_or_user_input(exemplar.input), "output": _dump(exemplar.output)}
+            for exemplar in exemplars
+        ]
+
+    def rendered_exemplars(self) -> List[dict] | None:
+        """The system exemplars rendered for the main template. They are static, hence rendered only once."""
+        rendered = self._rendered_exemplars
+        if rendered is None or rendered[0] is not self.exemplars or rendered[1] != self.input_template:
+            rendered = (self.exemplars, self.input_template, self._render_exemplars(self.exemplars))
+            self._rendered_exemplars = rendered
+        return rendered[2]
+
     def render(self) -> List[BaseMessage]:
         if self.user_input is None:
             raise ValueError("The user input is required to render the prompt.")
-        copy = self.model_copy(
-            update={
-                "exemplars": (
-                    [
-                        Exemplar(input=self.render_exemplar_or_user_input(exemplar.input), output=exemplar.output)
-                        for exemplar in self.exemplars
-                    ]
-                    if self.exemplars is not None
-                    else None
-                ),
-                "user_exemplars": (
-                    [
-                        Exemplar(input=self.render_exemplar_or_user_input(exemplar.input), output=exemplar.output)
-                        for exemplar in self.user_exemplars
-                    ]
-                    if self.user_exemplars is not None
-                    else None
-                ),
-                "user_input": self.render_exemplar_or_user_input(self.user_input),
-            }
-        )
-        string = get_template("main.jinja2").render(copy.model_dump())
-        regex = re.compile(
-            r"<\|semantipy_chat_(?P<role>system|human|ai)\|>\s*(?P<content>.*?)(?=\s*<\|semantipy_chat_\w+\|>|$)",
-            re.DOTALL,
-        )
-        return [self._create_message(match.group("role"), match.group("content")) for match in regex.finditer(string)]
+        # Build the variables of the main template directly, without copying and dumping the whole template.
+        variables = {
+            "task": self.task,
+            "instructions": self.instructions,
+            "formatting": self.formatting,
+            "exemplars": self.rendered_exemplars(),
+            "user_exemplars": self._render_exemplars(self.user_exemplars),
+            "user_contexts": _dump(self.user_contexts),
+            "user_input": self.render_exemplar_or_user_input(self.user_input),
+        }
+        string = get_template(_layout_templates[self.effective_layout]).render(variables)
+        return [
+            self._create_message(match.group("role"), match.group("content"))
+            for match in _message_regex.finditer(string)
+        ]
+
+    def stable_prefix_length(self) -> int:
+        """Number of leading messages in :meth:`render` that are identical for all the requests
+        sharing the same operator, template and system exemplars.
+
+        Only the ``stable_prefix`` layout gives such a guarantee beyond the system message.
+        In the ``interleaved`` layout, the system message itself changes when user exemplars are present.
+        """
+        if self.effective_layout == "stable_prefix":
+            return 1 + 2 * len(self.exemplars or [])
+        return 0 if self.exemplars else 1
 
     def _create_message(self, role: str, content: str) -> BaseMessage:
         if role == "system":
@@ -146,7 +342,11 @@ class SemantipyPromptTemplate(SemanticModel):
 
     @classmethod
     def from_config(cls, config: dict) -> SemantipyPromptTemplate:
-        config["parser"] = RegexOutputParser(**config["parser"]) if "parser" in config else None
+        if "parser" in config:
+            parser_config = dict(config["parser"])
+            config["parser"] = _parser_types[parser_config.pop("type", "regex")](**parser_config)
+        else:
+            config["parser"] = None
         if "exemplars" in config:
             config["exemplars"] = [
                 Exemplar(
@@ -159,8 +359,43 @@ class SemantipyPromptTemplate(SemanticModel):
 
     @classmethod
     def from_file(cls, filename: Path | str) -> SemantipyPromptTemplate:
+        """Load the prompt template from a YAML file.
+
+        The loaded templates are kept in memory, and also on disk if a prompt cache is configured
+        (see :func:`configure_prompt_cache`).
+        """
         # Treat the filename as a simple name if it is a string.
         if isinstance(filename, str):
             filename = Path(__file__).parent / "prompts" / filename
-        with filename.open() as file:
-            return cls.from_config(yaml.safe_load(file))
+        stat = filename.stat()
+        key = (cls, str(filename), stat.st_mtime_ns, stat.st_size)
+        template = _loaded_templates.get(key)
+        if template is None:
+            template = cls._load(filename)._freeze()
+            _loaded_templates[key] = template
+        # Callers get their own copy, so that the cached template is never modified.
+        # The copies share the lists of the cached template, which are frozen into tuples.
+        return template.model_copy()
+
+    def _freeze(self) -> SemantipyPromptTemplate:
+        if self.exemplars is not None:
+            self.exemplars = tuple(self.exemplars)  # type: ignore
+        if self.instructions is not None:
+            self.instructions = tuple(self.instructions)  # type: ignore
+        # The exemplars are rendered for the frozen tuple, once for all the copies.
+        self.rendered_exemplars()
+        return self
+
+    @classmethod
+    def _load(cls, filename: Path) -> SemantipyPromptTemplate:
+        source = filename.read_bytes()
+        prompt_cache = get_prompt_cache()
+        if prompt_cache is not None:
+            template = prompt_cache.load(f"{cls.__qualname__}/{filename.name}", source, _cache_schema(cls))
+            if isinstance(template, cls):
+                return template
+        template = cls.from_config(yaml.safe_load(source))
+        template.rendered_exemplars()
+        if prompt_cache is not None:
+            prompt_cache.store(f"{cls.__qualname__}/{filename.name}", source, template, _cache_schema(cls))
+        return template
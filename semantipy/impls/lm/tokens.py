@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+__all__ = [
+    "estimate_tokens",
+    "count_message_tokens",
+    "configure_tokenizer",
+    "configure_token_budget",
+    "TokenBudget",
+    "PromptTooLarge",
+]
+
+import re
+from typing import Callable, List, Literal, TYPE_CHECKING
+
+from pydantic import Field
+from langchain.schema import BaseMessage
+
+from semantipy.ops.base import SemanticOperationRequest
+from semantipy.semantics import SemanticModel, Text
+
+if TYPE_CHECKING:
+    from .backend import LMExecutionPlan
+
+# Roughly the per-message overhead of chat formats (role markers, separators).
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_word_regex = re.compile(r"\w+|[^\w\s]")
+
+_tokenizer: Callable[[str], int] | None = None
+_token_budget: TokenBudget | None = None
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens in a text.
+
+    Use the configured tokenizer if any. Otherwise, a fast heuristic is used:
+    about 4 characters per token, but at least one token per word or punctuation.
+    """
+    if _tokenizer is not None:
+        return _tokenizer(text)
+    return max((len(text) + 3) // 4, len(_word_regex.findall(text)))
+
+
+def count_message_tokens(messages: List[BaseMessage]) -> int:
+    """Estimate the number of tokens of a list of chat messages."""
+    return sum(estimate_tokens(str(message.content)) + MESSAGE_OVERHEAD_TOKENS for message in messages)
+
+
+def configure_tokenizer(tokenizer: Callable[[str], int] | None) -> None:
+    """Configure the function counting the tokens in a text globally.
+
+    For example, ``configure_tokenizer(lambda text: len(tiktoken.encoding_for_model("gpt-4o").encode(text)))``.
+    Set to None to fall back to the heuristic estimation.
+    """
+    global _tokenizer
+    _tokenizer = tokenizer
+
+
+def configure_token_budget(budget: TokenBudget | None) -> None:
+    """Configure the prompt-size budget enforced before the language model is invoked.
+
+    Set to None to disable the budget.
+    """
+    global _token_budget
+    _token_budget = budget
+
+
+class PromptTooLarge(ValueError):
+    """Raised when a prompt can not be fitted into the token budget."""
+
+    pass
+
+
+class TokenBudget(SemanticModel):
+    """A policy that shrinks the prompts exceeding a token limit.
+
+    The strategies are attempted in order until the prompt fits:
+
+    - ``drop_exemplars``: drop the exemplars one by one, system exemplars first, starting from the last one.
+    - ``drop_contexts``: drop the contexts one by one, starting from the earliest one.
+    - ``chunk``: split the operand by lines and execute the request chunk by chunk.
+      Only applicable to requests returning an iterable, whose results are concatenated.
+    """
+
+    max_prompt_tokens: int
+    strategies: List[Literal["drop_exemplars", "drop_contexts", "chunk"]] = Field(
+        default_factory=lambda: ["drop_exemplars", "drop_contexts", "chunk"]
+    )
+
+    def fit(self, plan: LMExecutionPlan) -> List[LMExecutionPlan]:
+        """Return one plan that fits into the budget, or multiple plans in case the request is chunked.
+
+        Raise :class:`PromptTooLarge` if all the strategies fail.
+        """
+        tokens = plan.estimate_tokens()
+        if tokens <= self.max_prompt_tokens:
+            return [plan]
+
+        # The plan whose tokens are estimated last, which keeps its rendered prompt for the run.
+        fitted = plan
+        prompt = plan.prompt
+        for strategy in self.strategies:
+            if strategy == "drop_exemplars":
+                while tokens > self.max_prompt_tokens and (prompt.exemplars or prompt.user_exemplars):
+                    if prompt.exemplars:
+                        prompt = prompt.model_copy(update={"exemplars": prompt.exemplars[:-1]})
+                    else:
+                        prompt = prompt.model_copy(update={"user_exemplars": prompt.user_exemplars[:-1]})
+                    fitted = plan.with_prompt(prompt)
+                    tokens = fitted.estimate_tokens()
+            elif strategy == "drop_contexts":
+                while tokens > self.max_prompt_tokens and prompt.user_contexts:
+                    prompt = prompt.model_copy(update={"user_contexts": prompt.user_contexts[1:]})
+                    fitted = plan.with_prompt(prompt)
+                    tokens = fitted.estimate_tokens()
+            elif strategy == "chunk":
+                chunks = self._chunk(fitted)
+                if chunks is not None:
+                    return chunks
+            if tokens <= self.max_prompt_tokens:
+                fitted.sign(self.__class__.__name__, f"shrunk with {strategy} to {tokens} tokens")
+                return [fitted]
+
+        raise PromptTooLarge(
+            f"The prompt takes about {tokens} tokens, which exceeds the budget of {self.max_prompt_tokens} tokens."
+        )
+
+    def _chunk(self, plan: LMExecutionPlan) -> List[LMExecutionPlan] | None:
+        request = plan.prompt.user_input
+        if not isinstance(request, SemanticOperationRequest) or not request.return_iterable:
+            return None
+        if not isinstance(request.operand, str):
+            return None
+
+        def with_operand(operand: str) -> LMExecutionPlan:
+            return plan.with_prompt(
+                plan.prompt.model_copy(update={"user_input": request.model_copy(update={"operand": Text(operand)})})
+            )
+
+        available = self.max_prompt_tokens - with_operand("").estimate_tokens()
+        if available <= 0:
+            return None
+
+        chunks: list[str] = []
+        current = ""
+        for line in request.operand.splitlines(keepends=True):
+            while estimate_tokens(line) > available:
+                # A single line is too long. Cut it by characters.
+                line_head, line = line[:available], line[available:]
+                if current:
+                    chunks.append(current)
+                    current = ""
+                chunks.append(line_head)
+            if current and estimate_tokens(current + line) > available:
+                chunks.append(current)
+                current = ""
+            current += line
+        if current:
+            chunks.append(current)
+
+        plans = [with_operand(chunk) for chunk in chunks]
+        for chunk_plan in plans:
+            chunk_plan.sign(self.__class__.__name__, f"chunked into {len(plans)} parts")
+        return plans
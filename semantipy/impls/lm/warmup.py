@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+__all__ = ["warmup", "WarmupStatus", "get_warmup_status"]
+
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterable, List
+
+from langchain.chat_models.base import BaseChatModel
+
+from semantipy.ops.base import SemanticOperator, SemanticOperationRequest
+from semantipy.semantics import Text
+
+from . import backend
+from .template import SemantipyPromptTemplate
+
+_logger = logging.getLogger(__name__)
+
+_warmup_status: WarmupStatus | None = None
+
+
+class WarmupStatus:
+    """Progress of a warm-up. ``ready`` is set when it has finished, successfully or not.
+
+    The failed steps are collected in ``errors`` rather than raised, so that a worker can still serve
+    (at the cost of a slower first call). ``durations`` has the seconds spent in each step.
+    """
+
+    def __init__(self):
+        self.errors: Dict[str, BaseException] = {}
+        self.durations: Dict[str, float] = {}
+        self._done = threading.Event()
+
+    @property
+    def ready(self) -> bool:
+        return self._done.is_set()
+
+    @property
+    def ok(self) -> bool:
+        return self.ready and not self.errors
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Wait for the warm-up to finish. Return whether it has finished."""
+        return self._done.wait(timeout)
+
+    def __repr__(self) -> str:
+        state = "ready" if self.ready else "running"
+        return f"{self.__class__.__name__}({state}, errors={list(self.errors)})"
+
+
+def _default_operators() -> List[SemanticOperator]:
+    import semantipy.ops as ops
+
+    return [
+        value
+        for value in vars(ops).values()
+        if isinstance(value, SemanticOperator) and value not in (ops.context_enter, ops.context_exit)
+    ]
+
+
+def _warmup_prompts(operators: Iterable[SemanticOperator]) -> None:
+    # Load the templates and render them once, which compiles the jinja2 templates.
+    for operator in operators:
+        template = SemantipyPromptTemplate.from_file(backend.get_prompt_file(operator))
+        template.input(SemanticOperationRequest(operator=operator, operand=Text("warm-up"))).render()
+
+
+def _open_connection(lm: BaseChatModel) -> bool:
+    """Open a connection to the API endpoint of an OpenAI-compatible model, which is then kept alive in its pool.
+
+    Return False if the model is not supported.
+    """
+    root_client = getattr(lm, "root_client", None)
+    http_client = getattr(root_client, "_client", None)
+    if http_client is None:
+        return False
+    # Any response will do, even unauthorized. The point is the TCP and TLS handshakes.
+    response = http_client.get(str(root_client.base_url).rstrip("/") + "/models", timeout=10.0)
+    response.close()
+    return True
+
+
+def _run(status: WarmupStatus, operators: List[SemanticOperator], connect: bool) -> None:
+    steps: list[tuple[str, Any]] = [
+        ("prompts", lambda: _warmup_prompts(operators)),
+        ("model", backend._get_or_load_global_lm),
+    ]
+    if connect:
+        steps.append(("connection", lambda: _open_connection(backend._get_or_load_global_lm())))
+    try:
+        for name, step in steps:
+            start = time.perf_counter()
+            try:
+                step()
+            except Exception as error:
+                _logger.warning("Warm-up step %s failed: %s", name, error)
+                status.errors[name] = error
+            status.durations[name] = time.perf_counter() - start
+    finally:
+        status._done.set()
+    _logger.debug("Warm-up finished in %.3fs: %s", sum(status.durations.values()), status.durations)
+
+
+def warmup(
+    operators: Iterable[SemanticOperator] | None = None,
+    *,
+    connect: bool = False,
+    background: bool = False,
+) -> WarmupStatus:
+    """Prepare the process to serve the first operator call at steady-state latency.
+
+    It loads and compiles the prompt templates of the operators (all the operators by default),
+    and instantiates the configured language model.
+    With ``connect``, it also opens a connection to the API endpoint of the model, when the model is supported.
+
+    With ``background``, the warm-up runs in a daemon thread and the returned status is not ready yet.
+    Use ``status.wait()`` or ``status.ready`` (e.g., in a readiness probe) to know when it finishes.
+    """
+    global _warmup_status
+    status = WarmupStatus()
+    _warmup_status = status
+    operators = list(operators) if operators is not None else _default_operators()
+    if background:
+        threading.Thread(target=_run, args=(status, operators, connect), name="semantipy-warmup", daemon=True).start()
+    else:
+        _run(status, operators, connect)
+    return status
+
+
+def get_warmup_status() -> WarmupStatus | None:
+    """The status of the latest warm-up, or None if it has never been started."""
+    return _warmup_status
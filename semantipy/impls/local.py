@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+__all__ = ["LocalBackend"]
+
+import re
+from typing import Any, Callable
+
+from semantipy.impls.base import BaseBackend, BaseExecutionPlan, BackendNotImplemented, LambdaExecutionPlan, register
+from semantipy.impls.metrics import increment
+from semantipy.ops.base import SemanticOperationRequest, SemanticOperator, Dispatcher
+from semantipy.ops import cast, combine, contains, equals, select
+from semantipy.ops.context import _context_stack
+from semantipy.semantics import SemanticDict, SemanticList
+
+_number_regex = re.compile(r"(?<![\w.])[-+]?\d+(?:\.\d+)?(?![\w]|\.\d)")
+_int_literal_regex = re.compile(r"[-+]?\d+")
+_float_literal_regex = re.compile(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+
+
+def _has_active_contexts(request: SemanticOperationRequest) -> bool:
+    return bool(request.contexts or _context_stack)
+
+
+def _equals(request: SemanticOperationRequest) -> Any:
+    if not isinstance(request.operand, str) or not isinstance(request.guest_operand, str):
+        return NotImplemented
+    if _has_active_contexts(request):
+        return NotImplemented
+    if request.operand == request.guest_operand:
+        return True
+    return NotImplemented
+
+
+def _contains(request: SemanticOperationRequest) -> Any:
+    # The operand as whole words of the guest operand, e.g., not "cat" in "concatenate".
+    if not isinstance(request.operand, str) or not isinstance(request.guest_operand, str):
+        return NotImplemented
+    if _has_active_contexts(request) or not request.operand.strip():
+        return NotImplemented
+    pattern = r"(?<!\w)" + re.escape(request.operand.strip().casefold()) + r"(?!\w)"
+    if re.search(pattern, request.guest_operand.casefold()):
+        return True
+    return NotImplemented
+
+
+def _combine(request: SemanticOperationRequest) -> Any:
+    operands = request.operands()
+    if len(operands) < 2:
+        return NotImplemented
+    if all(isinstance(operand, SemanticList) for operand in operands):
+        return SemanticList(item for operand in operands for item in operand)
+    if all(isinstance(operand, SemanticDict) for operand in operands):
+        combined = SemanticDict()
+        for operand in operands:
+            combined.update(operand)
+        return combined
+    return NotImplemented
+
+
+def _select(request: SemanticOperationRequest) -> Any:
+    # select(s, int) or select(s, float) with exactly one number in s.
+    if request.guest_operand is not None or request.return_iterable or request.return_type not in (int, float):
+        return NotImplemented
+    if not isinstance(request.operand, str) or _has_active_contexts(request):
+        return NotImplemented
+    numbers = _number_regex.findall(request.operand)
+    if len(numbers) != 1:
+        return NotImplemented
+    if request.return_type is int and not _int_literal_regex.fullmatch(numbers[0]):
+        return NotImplemented
+    return request.return_type(numbers[0])
+
+
+def _cast(request: SemanticOperationRequest) -> Any:
+    # Cast of a literal to int, float or bool.
+    if not isinstance(request.operand, str) or _has_active_contexts(request):
+        return NotImplemented
+    value = request.operand.strip()
+    if request.return_type is int and _int_literal_regex.fullmatch(value):
+        return int(value)
+    if request.return_type is float and _float_literal_regex.fullmatch(value):
+        return float(value)
+    if request.return_type is bool and value in ("True", "False"):
+        return value == "True"
+    return NotImplemented
+
+
+_fast_paths: dict[Any, Callable[[SemanticOperationRequest], Any]] = {
+    equals: _equals,
+    contains: _contains,
+    combine: _combine,
+    select: _select,
+    cast: _cast,
+}
+
+
+@register
+class LocalBackend(BaseBackend):
+    """Deterministic fast paths for requests that can be answered without a language model.
+
+    For example, ``equals`` on identical strings, ``contains`` on whole words of the text,
+    ``combine`` on lists or dicts, and ``select(s, int)`` when ``s`` has exactly one number.
+    The backend returns a final plan in such cases and raises ``BackendNotImplemented`` otherwise.
+    The saved calls are counted in the ``local.calls_saved`` metric.
+    """
+
+    @classmethod
+    def __semantic_function__(
+        cls,
+        request: SemanticOperationRequest,
+        dispatcher: Dispatcher | None = None,
+        plan: BaseExecutionPlan | None = None,
+    ) -> BaseExecutionPlan:
+        if not isinstance(request.operator, SemanticOperator) or request.operator not in _fast_paths:
+            raise BackendNotImplemented()
+        result = _fast_paths[request.operator](request)
+        if result is NotImplemented:
+            raise BackendNotImplemented(f"no deterministic path for {request.operator}")
+
+        increment("local.calls_saved", operator=request.operator.__name__)
+        plan = LambdaExecutionPlan(lambda: result)
+        plan.sign(cls.__name__, "answered locally")
+        plan.set_final()
+        return plan
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+__all__ = [
+    "increment",
+    "get_metrics",
+    "reset_metrics",
+]
+
+import threading
+from collections import defaultdict
+from typing import Dict
+
+_counters: Dict[str, float] = defaultdict(float)
+_lock = threading.Lock()
+
+
+def _metric_key(name: str, labels: Dict[str, str]) -> str:
+    if not labels:
+        return name
+    return name + "{" + ",".join(f"{key}={value}" for key, value in sorted(labels.items())) + "}"
+
+
+def increment(name: str, value: float = 1, **labels: str) -> None:
+    """Increase a counter. The counter is kept both in total and per label set (if labels are given),
+    e.g., ``lm.retries`` and ``lm.retries{operator=select}``."""
+    with _lock:
+        _counters[name] += value
+        if labels:
+            _counters[_metric_key(name, labels)] += value
+
+
+def get_metrics(prefix: str = "") -> Dict[str, float]:
+    """Get a snapshot of the counters whose names start with the prefix."""
+    with _lock:
+        return {key: value for key, value in _counters.items() if key.startswith(prefix)}
+
+
+def reset_metrics() -> None:
+    with _lock:
+        _counters.clear()
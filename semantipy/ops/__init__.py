@@ -2,3 +2,4 @@ from .base import *
 from .context import *
 from .logical import *
 from .manipulate import *
+from .memoize import *
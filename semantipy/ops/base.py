@@ -4,17 +4,20 @@ __all__ = [
     "SemanticOperator",
     "semantipy_op",
     "SemanticOperationRequest",
+    "CompactRequest",
     "Dispatcher",
     "SupportsSemanticFunction",
 ]
 
 import functools
+import inspect
 import textwrap
 from collections import defaultdict
 from typing import Callable, Protocol, Dict, List, Union, Any, TYPE_CHECKING, overload, Generic, TypeVar
 from typing_extensions import Self, ParamSpec
 
 from pydantic import Field, ConfigDict
+from semantipy import tracing
 from semantipy.semantics import Semantics, Exemplar, Text, SemanticModel
 
 if TYPE_CHECKING:
@@ -54,8 +57,20 @@ class SemanticOperator(Semantics, Generic[ParamSpecType, ReturnType]):
     def bind(self, *args, **kwargs) -> SemanticOperationRequest:
         return self.preprocessor(self.identifier, *args, **kwargs)
 
+    def bind_compact(self, *args, **kwargs) -> CompactRequest:
+        """Bind the arguments into a memory-compact request.
+
+        The contexts attached to the operator are kept in the request,
+        so that it can be dispatched later with ``Dispatcher(request)``.
+        """
+        request = CompactRequest.from_request(self.bind(*args, **kwargs))
+        if self._contexts:
+            request.contexts = request.contexts + tuple(self._contexts)
+        return request
+
     def compile(self, *args, **kwargs) -> BaseExecutionPlan:  # type: ignore
-        arguments = self.bind(*args, **kwargs)
+        with tracing.span("bind", operator=self.func.__name__):
+            arguments = self.bind(*args, **kwargs)
         dispatcher = Dispatcher(arguments)
         if not self._contexts:
             return dispatcher.dispatch()
@@ -85,9 +100,19 @@ class SemanticOperator(Semantics, Generic[ParamSpecType, ReturnType]):
         exemplar = Exemplar(input=input, output=output)
         return self.context(exemplar)
 
+    def memoize(
+        self, ttl: float | None = None, maxsize: int | None = 128
+    ) -> SemanticOperator[ParamSpecType, ReturnType]:
+        """Fork the operator with its results cached. See :func:`semantipy.memoize`."""
+        from .memoize import memoize
+
+        return memoize(self, ttl=ttl, maxsize=maxsize)
+
     def __call__(self, *args, **kwargs):  # type: ignore
-        plan = self.compile(*args, **kwargs)
-        return plan.execute()
+        with tracing.span("operator", operator=self.func.__name__):
+            plan = self.compile(*args, **kwargs)
+            with tracing.span("execute", plan=type(plan).__name__):
+                return plan.execute()
 
     if TYPE_CHECKING:
 
@@ -164,6 +189,110 @@ class SemanticOperationRequest(SemanticModel):
         return operands
 
 
+_interned: dict[Any, Any] = {}
+_INTERN_MAX_SIZE = 65536
+
+
+def _intern(value: Any) -> Any:
+    # Share the equal strings across requests. Other objects are kept as is.
+    if type(value) is not Text:
+        return value
+    interned = _interned.get(value)
+    if interned is not None:
+        return interned
+    if len(_interned) < _INTERN_MAX_SIZE:
+        _interned[value] = value
+    return value
+
+
+class CompactRequest:
+    """A memory-compact form of :class:`SemanticOperationRequest`, for holding a large number of requests in memory.
+
+    It takes a small fraction of the memory of the pydantic model:
+    the fields are stored in slots, the lists are stored as tuples (all the empty ones share the same tuple),
+    and the secondary operands, which are usually repeated across requests (e.g., selectors), are interned.
+    The values are expected to be already validated, e.g., with :meth:`from_request`.
+    Use :meth:`to_request` to recover the full model. The calls pending in a deferred batch are kept in this form.
+    """
+
+    __slots__ = (
+        "operator",
+        "operand",
+        "guest_operand",
+        "index",
+        "other_operands",
+        "return_type",
+        "return_iterable",
+        "contexts",
+    )
+
+    def __init__(
+        self,
+        operator: Any,
+        operand: Any,
+        guest_operand: Any = None,
+        index: Any = None,
+        other_operands: tuple = (),
+        return_type: Any = None,
+        return_iterable: bool = False,
+        contexts: tuple = (),
+    ):
+        self.operator = operator
+        self.operand = operand
+        self.guest_operand = _intern(guest_operand)
+        self.index = _intern(index)
+        self.other_operands = tuple(_intern(operand) for operand in other_operands) if other_operands else ()
+        self.return_type = return_type
+        self.return_iterable = return_iterable
+        self.contexts = tuple(contexts) if contexts else ()
+
+    @classmethod
+    def from_request(cls, request: SemanticOperationRequest) -> CompactRequest:
+        return cls(
+            request.operator,
+            request.operand,
+            request.guest_operand,
+            request.index,
+            request.other_operands,
+            request.return_type,
+            request.return_iterable,
+            request.contexts,
+        )
+
+    @staticmethod
+    def clear_interned() -> None:
+        """Forget the interned operands, e.g., once a large batch is done. Up to 65536 operands are interned."""
+        _interned.clear()
+
+    def to_request(self) -> SemanticOperationRequest:
+        # Skip the validation, which has been done when the compact request was created.
+        return SemanticOperationRequest.model_construct(
+            operator=self.operator,
+            operand=self.operand,
+            guest_operand=self.guest_operand,
+            index=self.index,
+            other_operands=list(self.other_operands),
+            return_type=self.return_type,
+            return_iterable=self.return_iterable,
+            contexts=list(self.contexts),
+        )
+
+    def operands(self) -> List[Semantics]:
+        operands = [self.operand]
+        if self.guest_operand is not None:
+            operands.append(self.guest_operand)
+        operands.extend(self.other_operands)
+        return operands
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, CompactRequest):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(operator={self.operator!r}, operand={self.operand!r})"
+
+
 class SupportsSemanticFunction(Protocol):
     """A protocol for objects that support the __semantic_function__ protocol,
     which implements the logic of executing the operators on specific objects.
@@ -223,9 +352,21 @@ def semantipy_op(func=None, *, preprocessor=None) -> Any:
     return decorator
 
 
+def _operator_name(operator: Any) -> str:
+    return getattr(operator, "__name__", None) or str(operator)
+
+
+def _semantic_function_of(operand_type: type) -> Any:
+    # The underlying function, whether ``__semantic_function__`` is a classmethod, a staticmethod or a plain function.
+    function = inspect.getattr_static(operand_type, "__semantic_function__", None)
+    return getattr(function, "__func__", function)
+
+
 class Dispatcher:
 
-    def __init__(self, request: SemanticOperationRequest):
+    def __init__(self, request: SemanticOperationRequest | CompactRequest):
+        if isinstance(request, CompactRequest):
+            request = request.to_request()
         self.request = request
 
         self.handlers: list[type[SupportsSemanticFunction]] = []
@@ -233,6 +374,16 @@ class Dispatcher:
     def _init_handler_list(self) -> None:
         from semantipy.impls.base import list_backends, BaseBackend, BaseExecutionPlan
 
+        for operand in self.request.operands():
+            # Types of the operands implementing __semantic_function__ are more specific than backends.
+            operand_type = type(operand)
+            if (
+                isinstance(operand, Semantics)
+                and _semantic_function_of(operand_type) is not _semantic_function_of(Semantics)
+                and operand_type not in self.handlers
+            ):
+                self.handlers.append(operand_type)
+
         for backend in reversed(list_backends()):
             # Assume the later backends are more specific and should be executed first.
             # Execute the backends in reverse order.
@@ -274,6 +425,10 @@ class Dispatcher:
         self.handlers = sorted_nodes
 
     def dispatch(self) -> BaseExecutionPlan:
+        with tracing.span("dispatch", operator=_operator_name(self.request.operator)):
+            return self._dispatch()
+
+    def _dispatch(self) -> BaseExecutionPlan:
         from semantipy.impls.base import BackendNotImplemented, DummyPlan
 
         self._init_handler_list()
@@ -284,38 +439,45 @@ class Dispatcher:
             self._sort_dependencies()
             handler = self.handlers.pop(0)
 
-            try:
-                dispatch_logs.append(f"handler {handler.__name__} invoked")
-                candidate_plan = handler.__semantic_function__(self.request, self, plan)
-
-                if candidate_plan is NotImplemented:
-                    # Returns not implemented is considered BackendNotImplemented
-                    raise BackendNotImplemented()
-
-                if isinstance(candidate_plan, DummyPlan):
-                    # DummyPlan is used to indicate that the handler has handled the request,
-                    # but didn't generate any useful plan.
-                    dispatch_logs[-1] += ", handled but no plan generated"
-
-                # Update the plan
-                plan = candidate_plan
-
-            except BackendNotImplemented as error:
-                if len(error.args) > 0:
-                    dispatch_logs[-1] += f", but raises not implemented: {error.args}"
-                else:
-                    dispatch_logs[-1] += ", but raises not implemented"
-
-            except Exception as error:
-                message = " [while dispatching {!r}]\n{}".format(
-                    self.request.operator, self._render_dispatch_log(dispatch_logs)
-                )
-                new_error = self._attempt_augmented_error_message(error, message)
-                raise new_error.with_traceback(error.__traceback__) from None
-
-            if plan is not None and plan.final:
-                dispatch_logs.append(", final plan found")
-                break
+            with tracing.span(f"handler.{handler.__name__}", handler=handler.__name__) as handler_span:
+                try:
+                    dispatch_logs.append(f"handler {handler.__name__} invoked")
+                    candidate_plan = handler.__semantic_function__(self.request, self, plan)
+
+                    if candidate_plan is NotImplemented:
+                        # Returns not implemented is considered BackendNotImplemented
+                        raise BackendNotImplemented()
+
+                    if isinstance(candidate_plan, DummyPlan):
+                        # DummyPlan is used to indicate that the handler has handled the request,
+                        # but didn't generate any useful plan.
+                        dispatch_logs[-1] += ", handled but no plan generated"
+
+                    if plan is None:
+                        handler_span.set(plan="created")
+                    else:
+                        handler_span.set(plan="modified" if candidate_plan is not plan else "unchanged")
+                    # Update the plan
+                    plan = candidate_plan
+
+                except BackendNotImplemented as error:
+                    handler_span.set(plan="not_implemented")
+                    if len(error.args) > 0:
+                        dispatch_logs[-1] += f", but raises not implemented: {error.args}"
+                    else:
+                        dispatch_logs[-1] += ", but raises not implemented"
+
+                except Exception as error:
+                    message = " [while dispatching {!r}]\n{}".format(
+                        self.request.operator, self._render_dispatch_log(dispatch_logs)
+                    )
+                    new_error = self._attempt_augmented_error_message(error, message)
+                    raise new_error.with_traceback(error.__traceback__) from None
+
+                if plan is not None and plan.final:
+                    handler_span.set(final=True)
+                    dispatch_logs.append(", final plan found")
+                    break
 
         if plan is None:
             msg = "No implementation found for {}\n{}".format(
@@ -1,11 +1,32 @@
+from __future__ import annotations
+
 from contextlib import ExitStack, contextmanager
+from typing import Any, Callable, Iterator
 
-__all__ = ["context", "context_enter", "context_exit"]
+__all__ = [
+    "context",
+    "context_enter",
+    "context_exit",
+    "active_contexts",
+    "push_context",
+    "pop_context",
+    "register_context_hook",
+    "unregister_context_hook",
+]
 
-from semantipy.semantics import Semantics
+from semantipy.semantics import Semantics, Text
 
 from .base import semantipy_op, SemanticOperationRequest
 
+# The contexts entered with ``with ctx:`` or ``with context(...):``, the innermost last.
+_context_stack: list[Semantics] = []
+
+# Called with ``(ctx, entered)`` when a context is entered or exited.
+_context_hooks: list[Callable[[Semantics, bool], None]] = []
+
+# The registered backends setting ``__semantic_context_dispatch__``, maintained by ``register_backend``.
+_context_dispatch_backends: list[Any] = []
+
 
 def _context_preprocessor(func, ctx) -> SemanticOperationRequest:
     return SemanticOperationRequest(operator=func, operand=ctx)
@@ -21,12 +42,76 @@ def context_exit(ctx: Semantics):
     raise NotImplementedError()
 
 
+def active_contexts() -> list[Semantics]:
+    """The contexts currently entered, the innermost last."""
+    return list(_context_stack)
+
+
+def push_context(ctx: Semantics) -> None:
+    """Enter a context without dispatching ``context_enter``. The context hooks are notified."""
+    _context_stack.append(ctx)
+    for hook in _context_hooks:
+        hook(ctx, True)
+
+
+def pop_context(ctx: Semantics) -> None:
+    """Exit a context without dispatching ``context_exit``. The context hooks are notified."""
+    for index in range(len(_context_stack) - 1, -1, -1):
+        if _context_stack[index] is ctx:
+            del _context_stack[index]
+            break
+    else:
+        _context_stack.remove(ctx)
+    for hook in _context_hooks:
+        hook(ctx, False)
+
+
+def register_context_hook(hook: Callable[[Semantics, bool], Any]) -> Callable[[Semantics, bool], Any]:
+    """Observe the contexts entered and exited. The hook is called with ``(ctx, entered)``."""
+    _context_hooks.append(hook)
+    return hook
+
+
+def unregister_context_hook(hook: Callable[[Semantics, bool], Any]) -> None:
+    _context_hooks.remove(hook)
+
+
+def _dispatch_required(ctx: Semantics) -> bool:
+    # The context types and the backends setting ``__semantic_context_dispatch__`` receive
+    # ``context_enter`` and ``context_exit`` requests. Otherwise, the contexts are only pushed on the stack.
+    return bool(_context_dispatch_backends) or type(ctx).__semantic_context_dispatch__
+
+
+def enter_context(ctx: Semantics) -> Any:
+    if _dispatch_required(ctx):
+        return context_enter(ctx)
+    push_context(ctx)
+
+
+def exit_context(ctx: Semantics) -> Any:
+    if _dispatch_required(ctx):
+        return context_exit(ctx)
+    pop_context(ctx)
+
+
+def _as_semantics(ctx: Any) -> Semantics:
+    if isinstance(ctx, Semantics):
+        return ctx
+    if isinstance(ctx, str):
+        return Text(ctx)
+    # Use the request object to cast the other values.
+    return SemanticOperationRequest(operator=context_enter, operand=ctx).operand
+
+
 @contextmanager
-def context(*ctx: Semantics | str):
-    # use request object to cast the input parameters
-    casted_ctx = SemanticOperationRequest(
-        operator=context_enter, operand=ctx[0], other_operands=list(ctx[1:])
-    ).operands()
+def context(*ctx: Semantics | str) -> Iterator[None]:
+    """Within the block, the operator calls take the contexts into account, e.g., as facts in the prompt.
+
+    The contexts are pushed on a context stack, which the backends read with :func:`active_contexts`
+    or observe with :func:`register_context_hook`. ``context_enter`` and ``context_exit`` are only dispatched
+    if a registered backend, or the type of the context, sets ``__semantic_context_dispatch__``.
+    """
+    casted_ctx = [_as_semantics(c) for c in ctx]
     with ExitStack() as es:
         for c in casted_ctx:
             es.enter_context(c)
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+__all__ = ["memoize", "MemoizedOperator", "results_not_cacheable"]
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Hashable, Iterator
+
+from pydantic import BaseModel
+
+from semantipy.semantics import Semantics
+
+from .base import SemanticOperator, SemanticOperationRequest
+from .context import active_contexts
+
+
+def _global_contexts() -> list[Semantics]:
+    # The contexts entered with ``with ctx:``.
+    return active_contexts()
+
+
+# The number of active ``results_not_cacheable`` contexts.
+_not_cacheable_depth = 0
+_not_cacheable_lock = threading.Lock()
+
+
+@contextmanager
+def results_not_cacheable() -> Iterator[None]:
+    """Within the context, the memoized operators neither read nor write their caches.
+
+    For the modes in which the operators return placeholders or futures instead of results,
+    e.g., :func:`dry_run` and :func:`deferred_batch`.
+    """
+    global _not_cacheable_depth
+    with _not_cacheable_lock:
+        _not_cacheable_depth += 1
+    try:
+        yield
+    finally:
+        with _not_cacheable_lock:
+            _not_cacheable_depth -= 1
+
+
+def canonical_key(value: Any) -> Hashable:
+    """A hashable key of a value, equal for values that render to the same request."""
+    if isinstance(value, str):
+        return str(value)
+    if isinstance(value, (list, tuple)):
+        return tuple(canonical_key(item) for item in value)
+    if isinstance(value, dict):
+        return ("dict",) + tuple(sorted((str(key), canonical_key(item)) for key, item in value.items()))
+    if isinstance(value, BaseModel):
+        return (type(value).__qualname__, canonical_key(value.model_dump()))
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return (type(value).__qualname__, repr(value))
+
+
+class _ResultCache:
+    """A thread-safe LRU cache with optional expiry.
+
+    Concurrent calls with the same key are computed only once: the others wait for the result.
+    """
+
+    def __init__(self, maxsize: int | None, ttl: float | None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Hashable, tuple[float | None, Any]] = OrderedDict()
+        self._pending: dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key: Hashable, compute) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at is None or time.monotonic() < expires_at:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            pending = self._pending.get(key)
+            if pending is None:
+                self.misses += 1
+                future: Future = Future()
+                self._pending[key] = future
+        if pending is not None:
+            self.hits += 1
+            return pending.result()
+
+        try:
+            value = compute()
+        except BaseException as error:
+            # Errors are not cached.
+            with self._lock:
+                del self._pending[key]
+            future.set_exception(error)
+            raise
+        with self._lock:
+            del self._pending[key]
+            if self.maxsize is None or self.maxsize > 0:
+                expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+                self._entries[key] = (expires_at, value)
+                self._entries.move_to_end(key)
+                while self.maxsize is not None and len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        future.set_result(value)
+        return value
+
+    def invalidate(self, key: Hashable) -> bool:
+        with self._lock:
+            return self._entries.pop(key, None) is not None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def info(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+            }
+
+
+class MemoizedOperator(SemanticOperator):
+    """An operator whose results are cached.
+
+    The results are keyed by the bound arguments, the return type, and all the active contexts
+    (those in the request, those attached to the operator, and those entered with ``with ctx:``).
+    The operators forked from it (e.g., with :meth:`context`) share the same cache.
+    The cache is neither read nor written within :func:`results_not_cacheable`, e.g., during a dry run.
+    """
+
+    def __init__(self, operator: SemanticOperator, ttl: float | None = None, maxsize: int | None = 128):
+        super().__init__(operator.func, operator.preprocessor)
+        self._contexts = operator._contexts.copy()
+        self._identifier = operator.identifier
+        self._cache = _ResultCache(maxsize=maxsize, ttl=ttl)
+
+    def key(self, *args, **kwargs) -> Hashable:
+        """The cache key of a call with the given arguments."""
+        request: SemanticOperationRequest = self.bind(*args, **kwargs)
+        contexts = request.contexts + self._contexts + _global_contexts()
+        return (
+            self.identifier,
+            canonical_key(request.operands()),
+            canonical_key(request.index),
+            canonical_key(request.return_type),
+            request.return_iterable,
+            canonical_key(contexts),
+        )
+
+    def __call__(self, *args, **kwargs):  # type: ignore
+        if _not_cacheable_depth:
+            return super().__call__(*args, **kwargs)
+        return self._cache.get_or_compute(
+            self.key(*args, **kwargs), lambda: super(MemoizedOperator, self).__call__(*args, **kwargs)
+        )
+
+    def fork(self) -> MemoizedOperator:
+        op = MemoizedOperator.__new__(MemoizedOperator)
+        SemanticOperator.__init__(op, self.func, self.preprocessor)
+        op._contexts = self._contexts.copy()
+        op._identifier = self.identifier
+        op._cache = self._cache
+        return op
+
+    def invalidate(self, *args, **kwargs) -> bool:
+        """Remove the cached result of a call with the given arguments. Return whether it was cached."""
+        return self._cache.invalidate(self.key(*args, **kwargs))
+
+    def cache_clear(self) -> None:
+        self._cache.clear()
+
+    def cache_info(self) -> dict[str, Any]:
+        return self._cache.info()
+
+    def __repr__(self) -> str:
+        return f"<memoized operator {self.func.__module__}.{self.func.__name__}>"
+
+
+def memoize(operator: SemanticOperator, ttl: float | None = None, maxsize: int | None = 128) -> MemoizedOperator:
+    """Cache the results of an operator.
+
+    For example, ``cached_resolve = semantipy.memoize(resolve, ttl=3600, maxsize=1024)``.
+    The least recently used results are evicted beyond ``maxsize`` (None for unlimited),
+    and the results expire after ``ttl`` seconds (None for never).
+    Use :meth:`MemoizedOperator.invalidate` or :meth:`MemoizedOperator.cache_clear` to invalidate them explicitly.
+    """
+    return MemoizedOperator(operator, ttl=ttl, maxsize=maxsize)
@@ -0,0 +1,247 @@
+"""Run the operations of a JSONL file of jobs, e.g., ``python -m semantipy run jobs.jsonl --out results.jsonl``.
+
+Each line of the input is a job::
+
+    {"id": "42", "operator": "contains", "args": ["intention to order a flight", "Book me a flight."]}
+
+``kwargs`` can be given as well. The types are written as ``{"$type": "<name>"}`` and the ``return_type``
+keyword argument as the name of the type, e.g., ``{"operator": "select", "args": ["It costs 5 dollars.",
+{"$type": "int"}]}`` or ``{"operator": "cast", "args": ["5"], "kwargs": {"return_type": "int"}}``.
+The id defaults to the line number.
+
+Each line of the output is a result, ``{"id": "42", "result": true}``, or an error, ``{"id": "42", "error": "..."}``.
+The lines of the input which are not valid JSON objects are reported as errors with the line number as id.
+The jobs can call the operators on data, e.g., ``apply``, ``cast``, ``select`` and ``contains``,
+but not ``context_enter`` and ``context_exit``.
+The results are written as soon as they are available, so they are not in the order of the jobs.
+"""
+
+from __future__ import annotations
+
+__all__ = ["JobRunSummary", "run_jobs"]
+
+import json
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Dict, Iterator, Set, Tuple
+
+from pydantic import BaseModel
+
+from semantipy import ops
+from semantipy.semantics import SemanticModel
+
+_logger = logging.getLogger(__name__)
+
+_type_names: Dict[str, type] = {"str": str, "int": int, "float": float, "bool": bool, "list": list, "dict": dict}
+
+# The operators a job can call. The context operators are excluded: they would change the state of all the jobs.
+_operators: Dict[str, ops.SemanticOperator] = {
+    operator.__name__: operator
+    for operator in (
+        ops.logical_unary,
+        ops.logical_binary,
+        ops.equals,
+        ops.contains,
+        ops.apply,
+        ops.resolve,
+        ops.cast,
+        ops.diff,
+        ops.select,
+        ops.select_iter,
+        ops.split,
+        ops.combine,
+    )
+}
+
+
+class JobRunSummary(SemanticModel):
+    """The statistics of a run of jobs."""
+
+    completed: int = 0
+    failed: int = 0
+    skipped: int = 0
+    elapsed: float = 0.0
+
+
+def _iter_jobs(path: Path) -> Iterator[Tuple[str, dict | None, str | None]]:
+    """The id, the job and the parse error of each line. The lines failing to parse are identified by their number."""
+    with open(path, "rb") as file:
+        for line_number, line in enumerate(file, 1):
+            if not line.strip():
+                continue
+            try:
+                # The lines are decoded one by one, so an invalid line does not stop the run.
+                job = json.loads(line)
+            except ValueError as error:
+                yield str(line_number), None, f"{type(error).__name__}: {error}"
+                continue
+            if not isinstance(job, dict):
+                yield str(line_number), None, f"ValueError: Expected a JSON object, got {type(job).__name__}"
+                continue
+            job_id = str(job.get("id", line_number))
+            if not isinstance(job.get("operator"), str) or job["operator"] not in _operators:
+                yield job_id, None, f"ValueError: Unknown operator: {job.get('operator')!r}"
+                continue
+            yield job_id, job, None
+
+
+def _count_jobs(path: Path) -> int:
+    with open(path, "rb") as file:
+        return sum(1 for line in file if line.strip())
+
+
+def _completed_ids(path: Path, retry_errors: bool) -> Set[str]:
+    """The ids of the results in the output, which is repaired if the last line is incomplete after a crash."""
+    completed: Set[str] = set()
+    if not path.exists():
+        return completed
+    with open(path, "rb+") as file:
+        valid_size = 0
+        for line in file:
+            if not line.endswith(b"\n"):
+                break
+            valid_size += len(line)
+            try:
+                result = json.loads(line)
+            except ValueError:
+                continue
+            if not isinstance(result, dict) or "id" not in result:
+                continue
+            if retry_errors and "error" in result:
+                completed.discard(str(result["id"]))
+            else:
+                completed.add(str(result["id"]))
+        file.truncate(valid_size)
+    return completed
+
+
+def _from_json(value: Any) -> Any:
+    if isinstance(value, dict) and set(value) == {"$type"}:
+        return _type_names[value["$type"]]
+    return value
+
+
+def _execute(job: dict) -> Any:
+    operator = _operators[job["operator"]]
+    args = [_from_json(arg) for arg in job.get("args", [])]
+    kwargs = {key: _from_json(value) for key, value in (job.get("kwargs") or {}).items()}
+    if isinstance(kwargs.get("return_type"), str):
+        kwargs["return_type"] = _type_names[kwargs["return_type"]]
+    return operator(*args, **kwargs)
+
+
+def _to_json(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, (list, tuple)):
+        return [_to_json(item) for item in value]
+    if isinstance(value, dict):
+        return {str(key): _to_json(item) for key, item in value.items()}
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+class _Progress:
+    def __init__(self, total: int | None, interval: float):
+        self.total = total
+        self.interval = interval
+        self.done = 0
+        self.start = time.monotonic()
+        self.last_report = self.start
+
+    def advance(self) -> None:
+        self.done += 1
+        if time.monotonic() - self.last_report >= self.interval:
+            self.report()
+
+    def report(self) -> None:
+        now = self.last_report = time.monotonic()
+        throughput = self.done / max(now - self.start, 1e-9)
+        if self.total is not None and throughput > 0:
+            eta = (self.total - self.done) / throughput
+            _logger.info("%d/%d jobs done, %.2f jobs/s, ETA %.0fs", self.done, self.total, throughput, eta)
+        else:
+            _logger.info("%d jobs done, %.2f jobs/s", self.done, throughput)
+
+
+def run_jobs(
+    input_path: str | os.PathLike,
+    output_path: str | os.PathLike,
+    *,
+    concurrency: int = 8,
+    checkpoint_every: int = 100,
+    checkpoint_interval: float = 10.0,
+    report_interval: float = 10.0,
+    retry_errors: bool = False,
+) -> JobRunSummary:
+    """Run the jobs of the input file and append their results to the output file.
+
+    At most ``concurrency`` jobs run at once, and the input is read only as fast as the jobs complete.
+    The output is flushed and synced to the disk every ``checkpoint_every`` results or ``checkpoint_interval``
+    seconds. If the output exists, the jobs with a result are skipped, so a crashed run resumes where it stopped.
+    With ``retry_errors``, the jobs that failed are run again.
+    """
+    input_path, output_path = Path(input_path), Path(output_path)
+    summary = JobRunSummary()
+    completed = _completed_ids(output_path, retry_errors)
+    progress = _Progress(max(_count_jobs(input_path) - len(completed), 0), report_interval)
+
+    with open(output_path, "a", encoding="utf-8") as output, ThreadPoolExecutor(max_workers=concurrency) as executor:
+        pending: Dict[Future, str] = {}
+        unsynced = 0
+        last_checkpoint = time.monotonic()
+
+        def checkpoint() -> None:
+            nonlocal unsynced, last_checkpoint
+            output.flush()
+            os.fsync(output.fileno())
+            unsynced, last_checkpoint = 0, time.monotonic()
+
+        def write(record: dict) -> None:
+            nonlocal unsynced
+            output.write(json.dumps(record, ensure_ascii=False) + "\n")
+            unsynced += 1
+            progress.advance()
+
+        def collect(futures) -> None:
+            for future in futures:
+                job_id = pending.pop(future)
+                try:
+                    record = {"id": job_id, "result": _to_json(future.result())}
+                    summary.completed += 1
+                except Exception as error:
+                    _logger.warning("Job %s failed: %s", job_id, error)
+                    record = {"id": job_id, "error": f"{type(error).__name__}: {error}"}
+                    summary.failed += 1
+                write(record)
+            if unsynced >= checkpoint_every or time.monotonic() - last_checkpoint >= checkpoint_interval:
+                checkpoint()
+
+        try:
+            for job_id, job, parse_error in _iter_jobs(input_path):
+                if job_id in completed:
+                    summary.skipped += 1
+                    continue
+                if parse_error is not None:
+                    _logger.warning("Job %s is invalid: %s", job_id, parse_error)
+                    summary.failed += 1
+                    write({"id": job_id, "error": parse_error})
+                    continue
+                if len(pending) >= concurrency:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+                pending[executor.submit(_execute, job)] = job_id
+        finally:
+            # If the run is interrupted, the submitted jobs are still written before the error propagates.
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+            checkpoint()
+
+    summary.elapsed = time.monotonic() - progress.start
+    progress.report()
+    return summary
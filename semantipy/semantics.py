@@ -9,7 +9,7 @@ __all__ = [
     "Exemplar",
 ]
 
-from typing import Callable, TYPE_CHECKING, Any, Union, Literal
+from typing import Callable, TYPE_CHECKING, Any, ClassVar, Union, Literal
 from typing_extensions import Self
 
 from pydantic import GetCoreSchemaHandler, BaseModel, ConfigDict
@@ -21,6 +21,10 @@ if TYPE_CHECKING:
 
 class Semantics:
 
+    # Whether entering and exiting the object as a context dispatches ``context_enter`` and ``context_exit``.
+    # By default, the context is only pushed on the context stack, see ``semantipy.ops.context``.
+    __semantic_context_dispatch__: ClassVar[bool] = False
+
     @classmethod
     def __semantic_dependencies__(cls) -> list[type[SupportsSemanticFunction]]:
         """Return a list of backends that this backend depends on."""
@@ -36,14 +40,14 @@ class Semantics:
         return NotImplemented
 
     def __enter__(self: Self) -> Any:
-        from semantipy.ops import context_enter
+        from semantipy.ops.context import enter_context
 
-        return context_enter(self)
+        return enter_context(self)
 
     def __exit__(self: Self, exc_type, exc_val, exc_tb) -> None:
-        from semantipy.ops import context_exit
+        from semantipy.ops.context import exit_context
 
-        return context_exit(self)
+        return exit_context(self)
 
 
 class Text(str, Semantics):
@@ -59,15 +63,71 @@ class Text(str, Semantics):
 
 
 class SemanticList(list, Semantics):
-    """Semantics that are represented with a list."""
+    """Semantics that are represented with a list.
+
+    If `elementwise_threshold` is set, element-wise operators (`apply`, `cast` and `resolve`) on lists with
+    at least that many elements are executed on each element as a separate request, concurrently with up to
+    `elementwise_max_workers` threads. The results are reassembled into a `SemanticList`.
+    It's disabled by default: only enable it if the instructions apply to each element, e.g., "to uppercase",
+    not to the list as a whole, e.g., "sort alphabetically". Requests with an index are never split.
+    """
+
+    elementwise_threshold: ClassVar[int | None] = None
+    elementwise_max_workers: ClassVar[int] = 8
+
+    @classmethod
+    def __semantic_function__(
+        cls,
+        request: SemanticOperationRequest,
+        dispatcher: Dispatcher | None = None,
+        plan: BaseExecutionPlan | None = None,
+    ) -> BaseExecutionPlan:
+        from semantipy.impls.elementwise import elementwise_plan
 
-    pass
+        if not isinstance(request.operand, cls):
+            return NotImplemented
+        elementwise = elementwise_plan(
+            request,
+            list(request.operand),
+            SemanticList,
+            threshold=cls.elementwise_threshold,
+            max_workers=cls.elementwise_max_workers,
+            signer=cls.__name__,
+        )
+        return NotImplemented if elementwise is None else elementwise
 
 
 class SemanticDict(dict, Semantics):
-    """Semantics that are represented with a dictionary."""
+    """Semantics that are represented with a dictionary.
+
+    If `elementwise_threshold` is set, element-wise operators (`apply`, `cast` and `resolve`) are executed
+    on each value like `SemanticList`, and the results are reassembled into a `SemanticDict` with the same keys.
+    """
+
+    elementwise_threshold: ClassVar[int | None] = None
+    elementwise_max_workers: ClassVar[int] = 8
 
-    pass
+    @classmethod
+    def __semantic_function__(
+        cls,
+        request: SemanticOperationRequest,
+        dispatcher: Dispatcher | None = None,
+        plan: BaseExecutionPlan | None = None,
+    ) -> BaseExecutionPlan:
+        from semantipy.impls.elementwise import elementwise_plan
+
+        if not isinstance(request.operand, cls):
+            return NotImplemented
+        keys = list(request.operand.keys())
+        elementwise = elementwise_plan(
+            request,
+            list(request.operand.values()),
+            lambda results: SemanticDict(zip(keys, results)),
+            threshold=cls.elementwise_threshold,
+            max_workers=cls.elementwise_max_workers,
+            signer=cls.__name__,
+        )
+        return NotImplemented if elementwise is None else elementwise
 
 
 class SemanticModel(Semantics, BaseModel):
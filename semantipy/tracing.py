@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+__all__ = [
+    "Span",
+    "SpanExporter",
+    "InMemorySpanExporter",
+    "ChromeTraceExporter",
+    "configure_tracing",
+    "span",
+]
+
+import contextvars
+import itertools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator
+
+
+class Span:
+    """A timed step of the dispatch or the execution of an operation, e.g., a handler invocation.
+
+    The times are in nanoseconds from ``time.perf_counter_ns``.
+    """
+
+    __slots__ = ("name", "span_id", "parent_id", "start_ns", "end_ns", "thread_id", "attributes")
+
+    def __init__(self, name: str, span_id: int, parent_id: int | None, attributes: dict[str, Any]):
+        self.name = name
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.start_ns = time.perf_counter_ns()
+        self.end_ns: int | None = None
+        self.thread_id = threading.get_ident()
+        self.attributes = attributes
+
+    @property
+    def duration(self) -> float:
+        """Duration in seconds."""
+        end_ns = self.end_ns if self.end_ns is not None else time.perf_counter_ns()
+        return (end_ns - self.start_ns) / 1e9
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def __repr__(self) -> str:
+        return f"Span({self.name!r}, {self.duration * 1000:.3f}ms, {self.attributes})"
+
+
+class _NoopSpan:
+    """Yielded when tracing is disabled, so that the instrumented code needs no branching."""
+
+    __slots__ = ()
+
+    def set(self, **attributes: Any) -> None:
+        pass
+
+
+class SpanExporter:
+    """Receive the finished spans. Subclass it to send the spans elsewhere, e.g., to OpenTelemetry."""
+
+    def export(self, span: Span) -> None:
+        raise NotImplementedError()
+
+    def shutdown(self) -> None:
+        """Called when the exporter is replaced. Flush the buffered spans here."""
+        pass
+
+
+class InMemorySpanExporter(SpanExporter):
+    """Keep the finished spans in a list."""
+
+    def __init__(self):
+        self.spans: list[Span] = []
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def find(self, name: str) -> list[Span]:
+        with self._lock:
+            return [span for span in self.spans if span.name == name]
+
+
+class ChromeTraceExporter(InMemorySpanExporter):
+    """Write the spans to a JSON file in the Chrome trace event format,
+    which can be opened with ``chrome://tracing`` or https://ui.perfetto.dev.
+
+    The file is written on :meth:`write`, and when the exporter is shut down.
+    """
+
+    def __init__(self, path: Path | str):
+        super().__init__()
+        self.path = Path(path)
+
+    def to_trace_events(self) -> list[dict]:
+        pid = os.getpid()
+        with self._lock:
+            spans = list(self.spans)
+        return [
+            {
+                "name": span.name,
+                "cat": span.name.split(".")[0],
+                "ph": "X",
+                "ts": span.start_ns / 1000,
+                "dur": ((span.end_ns or span.start_ns) - span.start_ns) / 1000,
+                "pid": pid,
+                "tid": span.thread_id,
+                "args": {key: _json_value(value) for key, value in span.attributes.items()},
+            }
+            for span in spans
+        ]
+
+    def write(self) -> None:
+        with self.path.open("w", encoding="utf-8") as file:
+            json.dump({"traceEvents": self.to_trace_events(), "displayTimeUnit": "ms"}, file)
+
+    def shutdown(self) -> None:
+        self.write()
+
+
+def _json_value(value: Any) -> Any:
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return repr(value)
+
+
+_exporters: list[SpanExporter] = []
+_span_ids = itertools.count(1)
+_current_span: contextvars.ContextVar[Span | None] = contextvars.ContextVar("semantipy_current_span", default=None)
+_noop_span = _NoopSpan()
+
+
+def configure_tracing(*exporters: SpanExporter) -> None:
+    """Trace the dispatch and the execution of the operations, and send the spans to the exporters.
+
+    The previously configured exporters are shut down. Call without exporters to disable tracing.
+    """
+    global _exporters
+    previous, _exporters = _exporters, list(exporters)
+    for exporter in previous:
+        exporter.shutdown()
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Span | _NoopSpan]:
+    """Trace the enclosed block as a span. The span is nested in the currently open span of the same thread."""
+    if not _exporters:
+        yield _noop_span
+        return
+
+    parent = _current_span.get()
+    current = Span(name, next(_span_ids), parent.span_id if parent is not None else None, attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as error:
+        current.attributes["error"] = type(error).__name__
+        raise
+    finally:
+        current.end_ns = time.perf_counter_ns()
+        _current_span.reset(token)
+        for exporter in _exporters:
+            exporter.export(current)
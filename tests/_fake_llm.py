@@ -0,0 +1,153 @@
+import json
+import math
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, List, Optional
+
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import RunnableLambda
+
+
+class FakeChatModel(BaseChatModel):
+    """A chat model that answers with a function of the input messages, for offline tests.
+
+    The keyword arguments of the calls (e.g., ``max_tokens`` and ``stop``) are recorded in ``invoke_kwargs``.
+    """
+
+    responder: Callable[[List[BaseMessage]], Any]
+    calls: List[List[BaseMessage]] = []
+    invoke_kwargs: List[dict] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        self.calls.append(messages)
+        self.invoke_kwargs.append(dict(kwargs, stop=stop))
+        response = self.responder(messages)
+        # The responder can return a message, e.g., with the response metadata.
+        message = response if isinstance(response, BaseMessage) else AIMessage(content=response)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def logprobs_message(content: str, top_logprobs: List[tuple] = (), token_probability: float = 1.0) -> AIMessage:
+    """A message with the log-probabilities of its first token in the OpenAI format.
+
+    ``top_logprobs`` are the ``(token, probability)`` alternatives, and ``token_probability`` the probability
+    of the output token."""
+    metadata = {
+        "logprobs": {
+            "content": [
+                {
+                    "token": content,
+                    "logprob": math.log(token_probability),
+                    "top_logprobs": [{"token": token, "logprob": math.log(p)} for token, p in top_logprobs],
+                }
+            ]
+        }
+    }
+    return AIMessage(content=content, response_metadata=metadata)
+
+
+class StandInOpenAIServer:
+    """A local HTTP server with the endpoints of the OpenAI API used by the tests.
+
+    ``POST /v1/chat/completions`` answers with ``responder(messages)``, where the messages are the JSON payload.
+    If tools are given, the response is used as the arguments of a call of the first tool.
+    The requested paths are recorded in ``paths``.
+    """
+
+    def __init__(self, responder: Callable[[List[dict]], str] = lambda messages: "OK"):
+        self.responder = responder
+        self.paths: List[str] = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _reply(self, payload: dict) -> None:
+                body = json.dumps(payload).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                server.paths.append(self.path)
+                self._reply({"object": "list", "data": []})
+
+            def do_POST(self):
+                server.paths.append(self.path)
+                request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                message = {"role": "assistant", "content": server.responder(request["messages"])}
+                if request.get("tools"):
+                    # Answer with a call of the first tool, whose arguments are the response.
+                    message["tool_calls"] = [
+                        {
+                            "id": "call-test",
+                            "type": "function",
+                            "function": {
+                                "name": request["tools"][0]["function"]["name"],
+                                "arguments": message["content"],
+                            },
+                        }
+                    ]
+                    message["content"] = None
+                self._reply(
+                    {
+                        "id": "chatcmpl-test",
+                        "object": "chat.completion",
+                        "created": 0,
+                        "model": request["model"],
+                        "choices": [
+                            {
+                                "index": 0,
+                                "message": message,
+                                "finish_reason": "stop",
+                            }
+                        ],
+                        "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+                    }
+                )
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}/v1"
+
+    def __enter__(self) -> "StandInOpenAIServer":
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class FakeStructuredChatModel(FakeChatModel):
+    """A fake chat model with structured outputs: the response of ``structured_responder`` is the parsed output."""
+
+    structured_responder: Callable[[List[BaseMessage]], Any]
+    structured_calls: List[Any] = []
+
+    def with_structured_output(self, schema: Any, **kwargs: Any):
+        def invoke(messages):
+            self.structured_calls.append(schema)
+            return self.structured_responder(messages)
+
+        return RunnableLambda(invoke)
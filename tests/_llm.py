@@ -4,6 +4,8 @@ import dotenv
 import pytest
 from langchain_openai import AzureChatOpenAI
 
+from semantipy.impls.lm.replay import RecordReplayChatModel
+
 
 def load_env():
     # In case of a local environment, load the .env file
@@ -18,7 +20,14 @@ def load_env():
 def llm():
     load_env()
 
-    return AzureChatOpenAI(
+    # Set SEMANTIPY_TRANSCRIPT to record the responses to a transcript file,
+    # or to replay them offline with SEMANTIPY_TRANSCRIPT_MODE=replay.
+    transcript = os.environ.get("SEMANTIPY_TRANSCRIPT")
+    transcript_mode = os.environ.get("SEMANTIPY_TRANSCRIPT_MODE", "auto")
+    if transcript and transcript_mode == "replay":
+        return RecordReplayChatModel(path=transcript, mode="replay")
+
+    model = AzureChatOpenAI(
         temperature=0.0,
         azure_deployment=os.environ["AZURE_DEPLOYMENT"],
         azure_endpoint=os.environ["AZURE_ENDPOINT"],
@@ -26,3 +35,6 @@ def llm():
         api_key=os.environ["AZURE_API_KEY"],
         max_retries=3,
     )
+    if transcript:
+        return RecordReplayChatModel(model=model, path=transcript, mode=transcript_mode)
+    return model
@@ -0,0 +1,58 @@
+from semantipy.impls.base import BaseBackend, BackendNotImplemented, register_backend, unregister_backend
+from semantipy.impls.lm.backend import configure_lm
+from semantipy.ops import context, resolve
+from semantipy.ops.context import active_contexts, register_context_hook, unregister_context_hook
+from semantipy.semantics import Text
+from semantipy.tracing import InMemorySpanExporter, configure_tracing
+
+from _fake_llm import FakeChatModel
+
+
+class ContextDispatchBackend(BaseBackend):
+    __semantic_context_dispatch__ = True
+    requests = []
+
+    @classmethod
+    def __semantic_function__(cls, request, dispatcher=None, plan=None):
+        cls.requests.append(request.operator)
+        raise BackendNotImplemented()
+
+
+def test_context_stack():
+    events = []
+    hook = register_context_hook(lambda ctx, entered: events.append((str(ctx), entered)))
+    exporter = InMemorySpanExporter()
+    configure_tracing(exporter)
+    try:
+        with context("outer"):
+            with Text("inner"):
+                assert active_contexts() == ["outer", "inner"]
+            assert active_contexts() == ["outer"]
+    finally:
+        configure_tracing()
+        unregister_context_hook(hook)
+    assert active_contexts() == []
+    assert events == [("outer", True), ("inner", True), ("inner", False), ("outer", False)]
+    # The contexts are not dispatched.
+    assert exporter.find("dispatch") == []
+
+
+def test_context_in_prompt():
+    llm = FakeChatModel(responder=lambda messages: "2 billion", calls=[])
+    configure_lm(llm)
+    with context("China has a population of 2 billion in 2050."):
+        assert resolve("What's the population of China in 2050?") == "2 billion"
+    assert "2 billion in 2050" in llm.calls[-1][-1].content
+
+
+def test_context_dispatch():
+    ContextDispatchBackend.requests = []
+    register_backend(ContextDispatchBackend)
+    try:
+        with context("some context"):
+            # The language model backend still maintains the stack.
+            assert active_contexts() == ["some context"]
+    finally:
+        unregister_backend(ContextDispatchBackend)
+    assert [operator.__name__ for operator in ContextDispatchBackend.requests] == ["context_enter", "context_exit"]
+    assert active_contexts() == []
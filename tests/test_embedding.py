@@ -0,0 +1,72 @@
+import pytest
+
+from semantipy.impls.base import list_backends
+from semantipy.impls.embedding import (
+    EmbeddingBackend,
+    calibrate_embedding_thresholds,
+    configure_embedding,
+    embedding_decisions,
+)
+from semantipy.impls.lm.backend import configure_lm
+from semantipy.impls.metrics import get_metrics, reset_metrics
+from semantipy.ops import contains, equals
+
+from _fake_llm import FakeChatModel
+
+VECTORS = {
+    "intention to order a flight": [1.0, 0.0, 0.0],
+    "I want to book a flight from Seattle to London": [0.9, 0.1, 0.0],
+    "What's the weather in London?": [0.1, 0.0, 1.0],
+    "Can I change my seat?": [0.6, 0.6, 0.0],
+}
+
+
+def embed(texts):
+    embed.calls.append(texts)
+    return [VECTORS[text] for text in texts]
+
+
+@pytest.fixture(autouse=True)
+def reset_embedding():
+    reset_metrics()
+    embed.calls = []
+    yield
+    configure_embedding(None, thresholds={contains: (0.3, 0.85)})
+
+
+def test_embedding_backend():
+    llm = FakeChatModel(responder=lambda messages: "**Answer:** False", calls=[])
+    configure_lm(llm)
+    configure_embedding(embed)
+    assert EmbeddingBackend in list_backends()
+
+    intent = "intention to order a flight"
+    assert contains(intent, "I want to book a flight from Seattle to London") is True
+    assert contains(intent, "What's the weather in London?") is False
+    assert llm.calls == []
+    # The embedding of the intent is cached.
+    assert sum(texts.count(intent) for texts in embed.calls) == 1
+
+    # Ambiguous: the language model decides.
+    assert contains(intent, "Can I change my seat?") is False
+    assert len(llm.calls) == 1
+    metrics = get_metrics("embedding")
+    assert metrics["embedding.calls_saved{operator=contains}"] == 2
+    assert metrics["embedding.ambiguous"] == 1
+
+    configure_embedding(None)
+    assert EmbeddingBackend not in list_backends()
+
+
+def test_embedding_batch_and_calibration():
+    configure_embedding(embed)
+    intent = "intention to order a flight"
+    pairs = [(intent, text) for text in VECTORS if text != intent]
+    assert embedding_decisions(contains, pairs) == [True, False, None]
+    assert len(embed.calls) == 2
+
+    reject, accept = calibrate_embedding_thresholds(
+        contains, [(s, t, answer) for (s, t), answer in zip(pairs, [True, False, True])]
+    )
+    assert reject <= accept
+    assert embedding_decisions(contains, pairs) == [True, False, True]
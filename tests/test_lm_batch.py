@@ -0,0 +1,76 @@
+import json
+from concurrent.futures import Future
+
+import pytest
+
+from semantipy.impls.lm.backend import configure_lm
+from semantipy.impls.lm.batch import LocalBatchClient, deferred_batch
+from semantipy.impls.lm.generation import GenerationPolicy, configure_generation_policy
+from semantipy.ops import apply, contains
+from semantipy.ops.base import CompactRequest
+from semantipy.semantics import SemanticList
+
+from _fake_llm import FakeChatModel, logprobs_message
+
+
+def test_deferred_batch(tmp_path):
+    online = FakeChatModel(responder=lambda messages: "Online", calls=[])
+    configure_lm(online)
+    offline = FakeChatModel(responder=lambda messages: "Hallo", invoke_kwargs=[], calls=[])
+
+    with deferred_batch(
+        LocalBatchClient(offline), model="gpt-4o-mini", directory=tmp_path, poll_interval=0.01
+    ) as batch:
+        futures = [apply(greeting, "Translate to German.") for greeting in ("Hello", "Hi")]
+        # Answered locally, without the language model.
+        assert contains("flight", "Book a flight.") is True
+        assert all(isinstance(future, Future) and not future.done() for future in futures)
+        assert len(batch) == 2
+        # The pending calls keep compact requests, not the plans.
+        assert all(isinstance(entry.request, CompactRequest) for entry, _ in batch._pending.values())
+
+    assert [future.result() for future in futures] == ["Hallo", "Hallo"]
+    assert online.calls == [] and len(offline.calls) == 2
+    requests = [json.loads(line) for line in batch.path.read_text().splitlines()]
+    assert [request["custom_id"] for request in requests] == ["request-0", "request-1"]
+    assert requests[0]["url"] == "/v1/chat/completions"
+    assert requests[0]["body"]["model"] == "gpt-4o-mini"
+    assert requests[0]["body"]["messages"][0]["role"] == "system"
+
+
+def test_deferred_batch_elementwise(tmp_path):
+    offline = FakeChatModel(responder=lambda messages: "Hallo", calls=[])
+    SemanticList.elementwise_threshold = 2
+    try:
+        with deferred_batch(LocalBatchClient(offline), model="gpt-4o-mini", directory=tmp_path, poll_interval=0.01):
+            future = apply(SemanticList(["Hello", "Hi"]), "Translate to German.")
+    finally:
+        SemanticList.elementwise_threshold = None
+    # One future for the whole list, resolved once all the elements are.
+    assert isinstance(future, Future)
+    result = future.result()
+    assert isinstance(result, SemanticList) and result == ["Hallo", "Hallo"]
+    assert len(offline.calls) == 2
+
+
+def test_deferred_batch_errors(tmp_path):
+    configure_generation_policy(GenerationPolicy.short_boolean(), return_type=bool)
+    try:
+        offline = FakeChatModel(
+            responder=lambda messages: logprobs_message("False", [("True", 0.7), ("False", 0.3)]),
+            invoke_kwargs=[],
+            calls=[],
+        )
+        client = LocalBatchClient(offline)
+        with deferred_batch(client, model="gpt-4o-mini", directory=tmp_path, poll_interval=0.01):
+            answer = contains("fruit", "Apples are red.")
+        assert answer.result() is True
+        assert offline.invoke_kwargs[-1]["max_tokens"] == 1
+
+        offline.responder = lambda messages: "Maybe"
+        with deferred_batch(client, model="gpt-4o-mini", directory=tmp_path, poll_interval=0.01):
+            answer = contains("fruit", "Apples are red.")
+        with pytest.raises(ValueError):
+            answer.result()
+    finally:
+        configure_generation_policy(None, return_type=bool)
@@ -0,0 +1,74 @@
+import pytest
+
+from semantipy.impls.lm.backend import configure_lm
+from semantipy.impls.lm.cascade import CascadePolicy, configure_cascade, get_escalation_rate
+from semantipy.impls.lm.generation import GenerationPolicy, configure_generation_policy
+from semantipy.impls.metrics import get_metrics, reset_metrics
+from semantipy.ops import contains, equals
+
+from _fake_llm import FakeChatModel, logprobs_message
+
+
+@pytest.fixture(autouse=True)
+def reset_cascades():
+    reset_metrics()
+    yield
+    configure_cascade(None)
+    configure_cascade(None, operator=contains)
+    configure_generation_policy(None, return_type=bool)
+
+
+def test_cascade_parse():
+    cheap = FakeChatModel(responder=lambda messages: "**Answer:** True", calls=[])
+    expensive = FakeChatModel(responder=lambda messages: "**Answer:** False", calls=[])
+    configure_lm(expensive)
+    configure_cascade(CascadePolicy(lm=cheap))
+
+    assert contains("fruit", "Apples are red.") is True
+    assert len(cheap.calls) == 1 and len(expensive.calls) == 0
+
+    # The output of the cheap model fails to parse.
+    cheap.responder = lambda messages: "It depends."
+    assert contains("fruit", "Pears are green.") is False
+    assert len(expensive.calls) == 1
+    assert get_escalation_rate() == 0.5
+    assert get_escalation_rate(contains) == 0.5
+    assert get_escalation_rate(equals) is None
+
+
+def test_cascade_logprobs_thresholds():
+    configure_generation_policy(GenerationPolicy.short_boolean(), return_type=bool)
+    cheap = FakeChatModel(
+        responder=lambda messages: logprobs_message("True", [("True", 0.85), ("False", 0.15)]),
+        calls=[],
+        invoke_kwargs=[],
+    )
+    expensive = FakeChatModel(responder=lambda messages: "False", calls=[])
+    configure_lm(expensive)
+    policy = CascadePolicy(lm=cheap, confidence="logprobs", threshold=0.9)
+    configure_cascade(policy)
+    configure_cascade(policy.model_copy(update={"threshold": 0.8}), operator=contains)
+
+    assert contains("fruit", "Apples are red.") is True
+    assert cheap.invoke_kwargs[-1]["logprobs"] is True
+    assert len(expensive.calls) == 0
+    # The same confidence is below the default threshold.
+    assert equals("one", "1") is False
+    assert len(expensive.calls) == 1
+    metrics = get_metrics("lm.cascade")
+    assert metrics["lm.cascade.calls"] == 2
+    assert metrics["lm.cascade.escalations{operator=equals}"] == 1
+
+
+def test_cascade_consistency():
+    answers = iter(["**Answer:** True", "**Answer:** False", "**Answer:** True"] * 2)
+    cheap = FakeChatModel(responder=lambda messages: next(answers), calls=[])
+    expensive = FakeChatModel(responder=lambda messages: "**Answer:** False", calls=[])
+    configure_lm(expensive)
+    configure_cascade(CascadePolicy(lm=cheap, confidence="consistency", samples=3, threshold=0.6))
+    assert contains("fruit", "Apples are red.") is True
+    assert len(cheap.calls) == 3 and len(expensive.calls) == 0
+
+    configure_cascade(CascadePolicy(lm=cheap, confidence="consistency", samples=3, threshold=0.9))
+    assert contains("fruit", "Apples are red.") is False
+    assert len(expensive.calls) == 1
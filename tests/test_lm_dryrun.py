@@ -0,0 +1,47 @@
+import pytest
+
+from semantipy.impls.lm import backend
+from semantipy.impls.lm.backend import configure_lm
+from semantipy.impls.lm.dryrun import dry_run, placeholder_value
+from semantipy.ops import equals, resolve, select, select_iter
+from semantipy.semantics import Exemplar, Text
+
+from _fake_llm import FakeChatModel
+
+
+@pytest.fixture(autouse=True)
+def restore_lm():
+    previous_lm = backend._lm
+    yield
+    # The fake model configured by a test does not leak into the other tests.
+    backend._lm = previous_lm
+
+
+def _offline(messages):
+    raise AssertionError("The language model should not be called in a dry run.")
+
+
+def test_placeholder_value():
+    assert placeholder_value(None) == ""
+    assert isinstance(placeholder_value(Text), Text)
+    assert placeholder_value(bool) is False
+    assert placeholder_value(int) == 0
+    assert placeholder_value(int, return_iterable=True) == []
+    assert isinstance(placeholder_value(Exemplar), Exemplar)
+
+
+def test_dry_run():
+    configure_lm(FakeChatModel(responder=_offline, calls=[]))
+
+    with dry_run() as report:
+        assert equals("a", "b") is False
+        assert equals("c", "d") is False
+        assert select("Natalia sold 48 + 24 = 72 clips.", int) == 0
+        assert select_iter("1, 2, 3", "all numbers", int) == []
+        assert resolve("What's the capital of Russia?") == ""
+
+    assert report.usage["equals"].calls == 2
+    assert report.usage["select"].calls == 1
+    assert report.total_calls == 5
+    assert report.usage["equals"].prompt_tokens > report.usage["select"].prompt_tokens > 0
+    assert report.summary().splitlines()[-1].split()[:2] == ["Total", "5"]
@@ -0,0 +1,81 @@
+import threading
+
+import numpy as np
+
+from semantipy.impls.lm.backend import LMExecutionPlan
+from semantipy.impls.lm.exemplars import ExemplarStore
+from semantipy.ops import context, select
+from semantipy.semantics import Exemplar
+
+
+def _store(**kwargs):
+    store = ExemplarStore(k=2, **kwargs)
+    store.add(select.bind("Amanda has 24 apples.", "Person name"), "Amanda")
+    store.add(select.bind("The flight departs from Seattle at 9am.", "Departure city"), "Seattle")
+    store.add(select.bind("Order #1234 was shipped to London.", "Order number"), "1234")
+    store.add(select.bind("The hotel in Paris costs 200 euros per night.", "Price"), "200 euros")
+    return store
+
+
+def test_bm25_selection():
+    store = _store()
+    selected = store.select(select.bind("My flight to London departs at 10am.", "Departure time"))
+    assert [exemplar.output for exemplar in selected] == ["1234", "Seattle"]
+
+    assert store.select(select.bind("anything", "else"), k=10)[-1].output == "Amanda"
+    assert store.select(select.bind("anything", "else"), k=0) == []
+    assert ExemplarStore().select(select.bind("anything", "else")) == []
+
+
+def test_concurrent_add_and_select():
+    store = _store()
+    errors = []
+
+    def add():
+        for i in range(200):
+            store.add(select.bind(f"Flight {i} departs from Seattle.", "Departure city"), "Seattle")
+
+    def query():
+        try:
+            for _ in range(200):
+                store.select(select.bind("My flight departs from Seattle.", "Departure city"))
+        except Exception as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=add)] + [threading.Thread(target=query) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert len(store.scores(select.bind("Seattle", "city"))) == 204
+
+
+def test_embedding_selection():
+    def embedding(texts):
+        # Bag of letters
+        return np.array([[text.lower().count(chr(ord("a") + i)) for i in range(26)] for text in texts])
+
+    store = _store(embedding=embedding)
+    selected = store.select(select.bind("Amanda has 24 bananas.", "Person name"), k=1)
+    assert [exemplar.output for exemplar in selected] == ["Amanda"]
+    store.add(select.bind("Amanda has 25 bananas.", "Person name"), "Amanda again")
+    assert store.select(select.bind("Amanda has 24 bananas.", "Person name"), k=1)[0].output == "Amanda again"
+
+
+def test_store_as_context():
+    store = _store()
+    request = select.bind("Ship order #5678 to Tokyo.", "Order number")
+
+    plan = select.context(store).compile("Ship order #5678 to Tokyo.", "Order number")
+    assert isinstance(plan, LMExecutionPlan)
+    assert [exemplar.output for exemplar in plan.prompt.user_exemplars] == [e.output for e in store.select(request)]
+    assert not plan.prompt.user_contexts
+
+    with context(store, Exemplar(input="some input", output="some output"), "some context"):
+        plan = select.compile("Ship order #5678 to Tokyo.", "Order number")
+    assert len(plan.prompt.user_exemplars) == 3
+    assert plan.prompt.user_contexts == ["some context"]
+    messages = plan.lm_input()
+    assert "Order #1234" in messages[3].content
+    assert messages[5].content == "some input"
@@ -0,0 +1,56 @@
+import pytest
+
+from semantipy.impls.lm.backend import configure_lm
+from semantipy.impls.lm.generation import GenerationPolicy, configure_generation_policy, get_generation_policy
+from semantipy.ops import contains, equals, select
+
+from _fake_llm import FakeChatModel, logprobs_message
+
+
+@pytest.fixture(autouse=True)
+def reset_policies():
+    yield
+    configure_generation_policy(None, return_type=bool)
+    configure_generation_policy(None, operator=select, return_type=int)
+
+
+def test_policy_lookup():
+    short_number = GenerationPolicy.short_number()
+    configure_generation_policy(short_number, operator=select, return_type=int)
+    configure_generation_policy(GenerationPolicy.short_boolean(), return_type=bool)
+    assert get_generation_policy(select, int) is short_number
+    assert get_generation_policy(select, float) is None
+    assert get_generation_policy(equals, bool).max_tokens == 1
+
+
+def test_short_boolean():
+    configure_generation_policy(GenerationPolicy.short_boolean(logprobs=False), return_type=bool)
+    llm = FakeChatModel(responder=lambda messages: "False", calls=[], invoke_kwargs=[])
+    configure_lm(llm)
+
+    assert equals("one", "2") is False
+    assert llm.invoke_kwargs[-1]["max_tokens"] == 1
+    assert llm.invoke_kwargs[-1]["stop"] == ["\n"]
+    system = llm.calls[-1][0].content
+    assert "True or False" in system and "analysis" not in system
+
+
+def test_short_boolean_logprobs():
+    configure_generation_policy(GenerationPolicy.short_boolean(), return_type=bool)
+    # The sampled token disagrees with the most probable answer.
+    llm = FakeChatModel(
+        responder=lambda messages: logprobs_message("False", [("False", 0.3), (" True", 0.6), ("Yes", 0.1)]),
+        calls=[],
+        invoke_kwargs=[],
+    )
+    configure_lm(llm)
+    assert contains("fruit", "Apples are red.") is True
+    assert llm.invoke_kwargs[-1]["logprobs"] is True
+
+
+def test_short_number():
+    configure_generation_policy(GenerationPolicy.short_number(), operator=select, return_type=int)
+    llm = FakeChatModel(responder=lambda messages: "42", calls=[], invoke_kwargs=[])
+    configure_lm(llm)
+    assert select("Forty-two apples, 3 pears and 5 plums.", int) == 42
+    assert llm.invoke_kwargs[-1]["max_tokens"] == 16
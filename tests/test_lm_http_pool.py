@@ -0,0 +1,75 @@
+import pytest
+from langchain_openai import ChatOpenAI
+
+from semantipy.impls.lm import backend
+from semantipy.impls.lm.http_pool import (
+    HTTPPoolConfig,
+    configure_http_pool,
+    get_http_client,
+    get_http_pool_stats,
+    use_shared_http_client,
+)
+from semantipy.impls.metrics import get_metrics, reset_metrics
+from semantipy.ops import apply
+
+from _fake_llm import FakeChatModel, StandInOpenAIServer
+
+
+@pytest.fixture
+def server():
+    reset_metrics()
+    with StandInOpenAIServer(responder=lambda messages: "Bonjour") as server:
+        yield server
+    configure_http_pool(None)
+
+
+def test_shared_pool_across_models(server):
+    configure_http_pool(HTTPPoolConfig(max_keepalive_connections=4))
+    models = [ChatOpenAI(model=name, api_key="test", base_url=server.base_url) for name in ["small", "large"]]
+    for model in models:
+        assert use_shared_http_client(model)
+        assert model.root_client._client is get_http_client()
+
+    for model in models + models:
+        backend.configure_lm(model)
+        assert apply("hello", "translate to French") == "Bonjour"
+
+    assert server.paths == ["/v1/chat/completions"] * 4
+    metrics = get_metrics("http.")
+    assert metrics["http.requests"] == 4
+    # All the requests reuse one kept-alive connection.
+    assert metrics["http.connections_opened"] == 1
+    assert get_http_pool_stats() == {"connections": 1, "idle": 1, "active": 0}
+
+
+def test_configure_http_pool_injects_current_model(server):
+    model = ChatOpenAI(model="gpt-4o", api_key="test", base_url=server.base_url)
+    backend.configure_lm(model)
+    assert get_http_client() is None
+    configure_http_pool(HTTPPoolConfig())
+    assert model.root_client._client is get_http_client()
+
+    # Unsupported models are left as they are.
+    assert not use_shared_http_client(FakeChatModel(responder=lambda messages: "", calls=[]))
+
+
+def test_reconfigure_http_pool_keeps_models_working(server):
+    configure_http_pool(HTTPPoolConfig())
+    router_model = ChatOpenAI(model="small", api_key="test", base_url=server.base_url)
+    model = ChatOpenAI(model="large", api_key="test", base_url=server.base_url)
+    backend.configure_lm(model)
+    assert use_shared_http_client(router_model)
+    shared_client = get_http_client()
+
+    # All the connected models are moved to the new pool, not only the configured one.
+    configure_http_pool(HTTPPoolConfig(max_connections=10))
+    assert get_http_client() is not shared_client
+    assert model.root_client._client is router_model.root_client._client is get_http_client()
+    # The previous pool is closed.
+    assert shared_client.is_closed
+
+    # The models keep the pool after sharing stops.
+    configure_http_pool(None)
+    assert get_http_client() is None
+    assert apply("hello", "translate to French") == "Bonjour"
+    assert not model.root_client._client.is_closed
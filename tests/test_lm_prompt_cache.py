@@ -0,0 +1,83 @@
+import shutil
+from pathlib import Path
+
+import pytest
+
+from semantipy.ops import select
+from semantipy.semantics import Text
+from semantipy.impls.lm import template as template_module
+from semantipy.impls.lm.prompt_cache import configure_prompt_cache
+from semantipy.impls.lm.template import SemantipyPromptTemplate, get_template
+
+PROMPTS = Path(template_module.__file__).parent / "prompts"
+
+
+@pytest.fixture
+def prompt_cache(tmp_path):
+    cache = configure_prompt_cache(tmp_path / "cache")
+    template_module._loaded_templates.clear()
+    yield cache
+    configure_prompt_cache(None)
+    template_module._loaded_templates.clear()
+
+
+def _render(template):
+    return [message.content for message in template.input(select.bind(Text("a b c"), "b")).render()]
+
+
+def test_prompt_cache_roundtrip(prompt_cache):
+    expected = _render(SemantipyPromptTemplate.from_file("select.yaml"))
+    assert len(list((prompt_cache.directory / "templates").glob("select-*.pkl"))) == 1
+    assert list((prompt_cache.directory / "jinja").iterdir())
+
+    # A fresh process only has the disk cache.
+    template_module._loaded_templates.clear()
+    cached = SemantipyPromptTemplate.from_file("select.yaml")
+    assert cached._rendered_exemplars is not None
+    assert _render(cached) == expected
+
+
+def test_prompt_cache_invalidation(prompt_cache, tmp_path):
+    path = tmp_path / "select.yaml"
+    shutil.copy(PROMPTS / "select.yaml", path)
+    SemantipyPromptTemplate.from_file(path)
+
+    path.write_text(path.read_text().replace("task:", "task: Edited.", 1))
+    template_module._loaded_templates.clear()
+    assert SemantipyPromptTemplate.from_file(path).task.startswith("Edited.")
+    assert len(list((prompt_cache.directory / "templates").glob("select-*.pkl"))) == 2
+
+
+def test_prompt_cache_broken_entry(prompt_cache):
+    SemantipyPromptTemplate.from_file("equals.yaml")
+    for entry in (prompt_cache.directory / "templates").glob("equals-*.pkl"):
+        entry.write_bytes(b"broken")
+    template_module._loaded_templates.clear()
+    assert SemantipyPromptTemplate.from_file("equals.yaml").parser is not None
+
+
+def test_prompt_cache_schema_change(prompt_cache, monkeypatch):
+    SemantipyPromptTemplate.from_file("equals.yaml")
+    source = (PROMPTS / "equals.yaml").read_bytes()
+    schema = template_module._cache_schema(SemantipyPromptTemplate)
+    assert prompt_cache.load("SemantipyPromptTemplate/equals.yaml", source, schema) is not None
+
+    # The entries pickled with other classes are never loaded.
+    assert prompt_cache.load("SemantipyPromptTemplate/equals.yaml", source, "other classes") is None
+    monkeypatch.setattr(template_module, "_cache_schema", lambda template_type: "other classes")
+    template_module._loaded_templates.clear()
+    assert SemantipyPromptTemplate.from_file("equals.yaml").parser is not None
+    assert len(list((prompt_cache.directory / "templates").glob("equals-*.pkl"))) == 2
+
+
+def test_loaded_templates_are_copies():
+    template = SemantipyPromptTemplate.from_file("equals.yaml")
+    template.task = Text("Modified.")
+    assert SemantipyPromptTemplate.from_file("equals.yaml").task != "Modified."
+
+    # The lists are shared, but can not be modified.
+    template = SemantipyPromptTemplate.from_file("contains.yaml")
+    with pytest.raises(AttributeError):
+        template.exemplars.append(template.exemplars[0])
+    assert SemantipyPromptTemplate.from_file("contains.yaml")._rendered_exemplars[0] is template.exemplars
+    assert get_template("main.jinja2") is get_template("main.jinja2")
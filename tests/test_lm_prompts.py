@@ -189,6 +189,38 @@ def test_yaml_parsers():
     assert equals_template.input(equals.bind("123", "123")).parser.parse(Text("**Answer:** False")) is False
 
 
+def test_stable_prefix_layout():
+    template = SemantipyPromptTemplate.from_file("equals.yaml").model_copy(update={"layout": "stable_prefix"})
+    plain = template.input(equals.bind("some content", "some other content"))
+    with_contexts = template.input(
+        SemanticOperationRequest(
+            operator=equals,
+            operand="other content",
+            guest_operand="more content",
+            contexts=[
+                Exemplar(input=equals.bind("content 1", "content 2"), output="**Answer:** False"),
+                "some additional context",
+            ],
+        )
+    )
+
+    prefix_length = plain.stable_prefix_length()
+    assert prefix_length == with_contexts.stable_prefix_length() == 5
+    plain_messages, context_messages = plain.render(), with_contexts.render()
+    assert [m.content for m in plain_messages[:prefix_length]] == [m.content for m in context_messages[:prefix_length]]
+    assert len(plain_messages) == prefix_length + 1
+    assert len(context_messages) == prefix_length + 3
+    assert "some additional context" in context_messages[-1].content
+
+    # The default layout moves system exemplars into the system message when user exemplars are present.
+    default = SemantipyPromptTemplate.from_file("equals.yaml")
+    assert default.stable_prefix_length() == 0
+    user_exemplar = SemanticOperationRequest(
+        operator=equals, operand="a", guest_operand="b", contexts=[Exemplar(input="x", output="y")]
+    )
+    assert default.input(equals.bind("a", "b")).render()[0].content != default.input(user_exemplar).render()[0].content
+
+
 test_main_jinja2()
 test_yamls()
 test_yaml_parsers()
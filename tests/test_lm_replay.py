@@ -0,0 +1,34 @@
+import time
+
+import pytest
+
+from semantipy.impls.lm.backend import configure_lm
+from semantipy.impls.lm.replay import RecordReplayChatModel, TranscriptStore
+from semantipy.ops import equals
+
+from _fake_llm import FakeChatModel
+
+
+def test_record_replay(tmp_path):
+    transcript = tmp_path / "transcript.jsonl"
+    fake = FakeChatModel(responder=lambda messages: "**Answer:** True")
+
+    configure_lm(RecordReplayChatModel(model=fake, path=str(transcript), mode="record", store_messages=True))
+    assert equals("banana", "香蕉") is True
+    assert len(fake.calls) == 1
+    assert len(TranscriptStore(transcript)) == 1
+
+    # Replay without any model.
+    configure_lm(RecordReplayChatModel(path=str(transcript), mode="replay", simulated_latency=0.2))
+    start_time = time.perf_counter()
+    assert equals("banana", "香蕉") is True
+    assert time.perf_counter() - start_time >= 0.2
+    with pytest.raises(LookupError):
+        equals("apple", "苹果")
+
+    # Auto mode records the missing prompts only.
+    configure_lm(RecordReplayChatModel(model=fake, path=str(transcript), mode="auto"))
+    assert equals("banana", "香蕉") is True
+    assert equals("apple", "苹果") is True
+    assert len(fake.calls) == 2
+    assert len(transcript.read_text().splitlines()) == 2
@@ -0,0 +1,121 @@
+import time
+
+import pytest
+
+from semantipy.impls.lm.backend import configure_lm, LMBackend
+from semantipy.impls.lm.retry import (
+    CircuitBreaker,
+    CircuitOpenError,
+    RetryPolicy,
+    configure_circuit_breaker,
+    configure_retry_policy,
+)
+from semantipy.impls.metrics import get_metrics, reset_metrics
+from semantipy.ops import equals, resolve
+
+from _fake_llm import FakeChatModel
+
+
+@pytest.fixture(autouse=True)
+def reset_policies():
+    reset_metrics()
+    yield
+    configure_retry_policy(None)
+    configure_retry_policy(None, operator=equals)
+    configure_circuit_breaker(None)
+
+
+def _scripted(*answers):
+    """Answer with the scripted answers in turn. Exceptions are raised."""
+    remaining = list(answers)
+
+    def responder(messages):
+        answer = remaining.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        if isinstance(answer, float):
+            time.sleep(answer)
+            return "**Answer:** True"
+        return answer
+
+    return responder
+
+
+def test_no_policy():
+    configure_lm(FakeChatModel(responder=_scripted(ConnectionError("down"))))
+    with pytest.raises(ConnectionError):
+        equals("a", "b")
+
+
+def test_retry():
+    configure_retry_policy(RetryPolicy(initial_backoff=0.01))
+    configure_lm(FakeChatModel(responder=_scripted(ConnectionError("down"), TimeoutError(), "**Answer:** True")))
+    plan = LMBackend.__semantic_function__(equals.bind("a", "b"))
+    assert plan.execute() is True
+    assert [sign.split(" failed")[0] for sign in plan.list_signs()[1:]] == [
+        "[RetryPolicy] attempt 1",
+        "[RetryPolicy] attempt 2",
+    ]
+    assert get_metrics("lm.retries") == {"lm.retries": 2, "lm.retries{operator=equals}": 2}
+
+    # Not retryable, or running out of attempts
+    configure_lm(FakeChatModel(responder=_scripted(KeyError("bug"))))
+    with pytest.raises(KeyError):
+        equals("a", "b")
+    configure_lm(FakeChatModel(responder=_scripted(*[ConnectionError("down")] * 3)))
+    with pytest.raises(ConnectionError):
+        equals("a", "b")
+
+
+def test_timeout():
+    configure_retry_policy(RetryPolicy(max_attempts=2, initial_backoff=0.01, timeout=0.1), operator=equals)
+    configure_lm(FakeChatModel(responder=_scripted(1.0, "**Answer:** False")))
+    assert equals("a", "b") is False
+    assert get_metrics("lm.timeouts")["lm.timeouts{operator=equals}"] == 1
+
+    # The policy is per operator
+    configure_lm(FakeChatModel(responder=_scripted(0.3)))
+    assert resolve("What's the answer?") == "True"
+
+
+def test_parse_retry():
+    configure_retry_policy(RetryPolicy(parse_retries=1))
+    model = FakeChatModel(responder=_scripted("I don't know.", "**Answer:** False"))
+    configure_lm(model)
+    assert equals("a", "b") is False
+    assert model.calls[-1][-2].content == "I don't know."
+    assert "could not be parsed" in model.calls[-1][-1].content
+    assert get_metrics("lm.parse_retries")["lm.parse_retries"] == 1
+
+    configure_lm(FakeChatModel(responder=_scripted("I don't know.", "Still don't know.")))
+    with pytest.raises(ValueError):
+        equals("a", "b")
+
+
+def test_circuit_breaker():
+    configure_circuit_breaker(CircuitBreaker(failure_threshold=2, reset_timeout=0.2))
+    model = FakeChatModel(responder=_scripted(ConnectionError(), ConnectionError(), "**Answer:** True"))
+    configure_lm(model)
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            equals("a", "b")
+    with pytest.raises(CircuitOpenError):
+        equals("a", "b")
+    assert len(model.calls) == 2
+    assert get_metrics("lm.circuit_breaker") == {"lm.circuit_breaker.opened": 1, "lm.circuit_breaker.rejected": 1}
+
+    time.sleep(0.2)
+    assert equals("a", "b") is True
+    assert len(model.calls) == 3
+
+
+def test_circuit_breaker_ignores_permanent_errors():
+    configure_circuit_breaker(CircuitBreaker(failure_threshold=2, reset_timeout=0.2))
+    model = FakeChatModel(responder=_scripted(ValueError(), ValueError(), "**Answer:** True"), calls=[])
+    configure_lm(model)
+    # Errors which are not transient, e.g., invalid requests, do not open the circuit.
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            equals("a", "b")
+    assert equals("a", "b") is True
+    assert get_metrics("lm.circuit_breaker") == {}
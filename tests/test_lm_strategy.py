@@ -0,0 +1,105 @@
+import pytest
+
+from semantipy.impls.lm.backend import configure_lm
+from semantipy.impls.lm.edits import EditScriptError, apply_edit_script
+from semantipy.impls.lm.strategy import configure_strategy
+from semantipy.impls.metrics import get_metrics, reset_metrics
+from semantipy.ops import apply, select, select_iter
+
+from _fake_llm import FakeChatModel
+
+DOCUMENT = "The meeting is on Monday.\nThe agenda has three items.\nLunch is provided."
+
+
+@pytest.fixture(autouse=True)
+def reset_strategies():
+    reset_metrics()
+    yield
+    configure_strategy(apply, None)
+
+
+def test_apply_edit_script():
+    script = "<<<<<<< SEARCH\non Monday\n=======\non Tuesday\n>>>>>>> REPLACE\n"
+    assert apply_edit_script(DOCUMENT, script) == DOCUMENT.replace("Monday", "Tuesday")
+    with pytest.raises(EditScriptError):
+        apply_edit_script(DOCUMENT, "The meeting is on Tuesday.")
+    with pytest.raises(EditScriptError):
+        apply_edit_script(DOCUMENT, "<<<<<<< SEARCH\nWednesday\n=======\nThursday\n>>>>>>> REPLACE")
+    with pytest.raises(EditScriptError):
+        apply_edit_script(DOCUMENT, "<<<<<<< SEARCH\nThe\n=======\nA\n>>>>>>> REPLACE")
+
+
+def test_apply_edit_strategy():
+    llm = FakeChatModel(
+        responder=lambda messages: "<<<<<<< SEARCH\nthree items\n=======\nfour items\n>>>>>>> REPLACE",
+        calls=[],
+    )
+    configure_lm(llm)
+    configure_strategy(apply, "edit", min_operand_length=20)
+    assert apply(DOCUMENT, "Add one more item to the agenda.") == DOCUMENT.replace("three", "four")
+    assert "SEARCH" in llm.calls[-1][0].content
+
+    # Short operands are rewritten as a whole.
+    llm.responder = lambda messages: "Hi!"
+    assert apply("Hello!", "Make it informal.") == "Hi!"
+    assert "SEARCH" not in llm.calls[-1][0].content
+
+
+def test_apply_edit_strategy_fallback():
+    def responder(messages):
+        if "SEARCH" in messages[0].content:
+            return "<<<<<<< SEARCH\nFriday\n=======\nSaturday\n>>>>>>> REPLACE"
+        return "Rewritten."
+
+    llm = FakeChatModel(responder=responder, calls=[])
+    configure_lm(llm)
+    configure_strategy(apply, "edit")
+    assert apply(DOCUMENT, "Move the meeting to Saturday.") == "Rewritten."
+    assert len(llm.calls) == 2
+    assert get_metrics("lm.strategy.fallbacks")["lm.strategy.fallbacks"] == 1
+
+
+def test_unknown_strategy():
+    with pytest.raises(ValueError):
+        configure_strategy(select, "edit")
+
+
+REPORT = "Revenue grew 12% in 2023. Costs were flat.\nThe board approved a dividend.\n\nHeadcount is 240."
+
+
+def test_select_span_strategy():
+    llm = FakeChatModel(responder=lambda messages: "**Segments:** 1-2", calls=[])
+    configure_lm(llm)
+    configure_strategy(select, "span")
+    configure_strategy(select_iter, "span")
+    try:
+        result = select(REPORT, "the financial results")
+        assert result == "Revenue grew 12% in 2023. Costs were flat."
+        assert "[3] The board approved a dividend." in llm.calls[-1][-1].content
+
+        llm.responder = lambda messages: "**Segments:** 2, 4"
+        assert select_iter(REPORT, "flat or stable things") == ["Costs were flat.", "Headcount is 240."]
+        llm.responder = lambda messages: "**Segments:** none"
+        assert select_iter(REPORT, "anything about Mars") == []
+
+        # Numbers are not selected as spans.
+        llm.responder = lambda messages: "12"
+        assert select(REPORT, "revenue growth", int) == 12
+    finally:
+        configure_strategy(select, None)
+        configure_strategy(select_iter, None)
+
+
+def test_select_span_strategy_fallback():
+    def responder(messages):
+        if "Segments" in messages[0].content:
+            return "**Segments:** 9"
+        return "The board approved a dividend."
+
+    configure_lm(FakeChatModel(responder=responder, calls=[]))
+    configure_strategy(select, "span")
+    try:
+        assert select(REPORT, "the decision") == "The board approved a dividend."
+        assert get_metrics("lm.strategy.fallbacks")["lm.strategy.fallbacks"] == 1
+    finally:
+        configure_strategy(select, None)
@@ -0,0 +1,101 @@
+import json
+from typing import List
+
+import pytest
+from langchain_openai import ChatOpenAI
+
+from semantipy.impls.lm.backend import configure_lm
+from semantipy.impls.lm.strategy import configure_strategy
+from semantipy.impls.lm.structured import configure_structured_output, output_schema
+from semantipy.impls.lm.template import RegexOutputParser
+from semantipy.impls.metrics import get_metrics, reset_metrics
+from semantipy.ops import cast, equals, select, select_iter
+from semantipy.semantics import SemanticModel, Text
+
+from _fake_llm import FakeChatModel, FakeStructuredChatModel, StandInOpenAIServer
+
+
+class Person(SemanticModel):
+    name: str
+    age: int
+
+
+@pytest.fixture(autouse=True)
+def structured_output():
+    reset_metrics()
+    configure_structured_output(True)
+    yield
+    configure_structured_output(False)
+
+
+def test_output_schema():
+    assert output_schema(Text) is None
+    assert output_schema(None) is None
+    assert output_schema(object) is None
+    assert output_schema(int).model_json_schema()["properties"]["value"]["type"] == "integer"
+    assert output_schema(Text, multi=True).model_validate({"value": ["a", "b"]}).value == ["a", "b"]
+    assert output_schema(Person).model_validate({"value": {"name": "Ann", "age": 3}}).value == Person(name="Ann", age=3)
+
+
+def test_structured_output():
+    llm = FakeStructuredChatModel(
+        responder=lambda messages: "unused",
+        structured_responder=lambda messages: {"value": {"name": "Natalia", "age": "31"}},
+        calls=[],
+        structured_calls=[],
+    )
+    configure_lm(llm)
+    assert cast("Natalia is 31 years old.", Person) == Person(name="Natalia", age=31)
+    assert llm.structured_calls[0]["properties"]["value"]["$ref"].endswith("Person")
+    assert not llm.calls
+
+    # Plain texts are asked as free text.
+    assert select("Natalia is 31 years old.", "name") == "unused"
+    assert len(llm.calls) == 1
+
+
+def test_structured_output_span_strategy():
+    llm = FakeStructuredChatModel(
+        responder=lambda messages: "**Segments:** 1, 3",
+        structured_responder=lambda messages: {"value": ["1, 3"]},
+        calls=[],
+        structured_calls=[],
+    )
+    configure_lm(llm)
+    configure_strategy(select_iter, "span")
+    try:
+        # The segment numbers are sliced from the operand by the span parser, not asked as a structured output.
+        assert select_iter("First.\nSecond.\nThird.", "the odd sentences") == ["First.", "Third."]
+        assert not llm.structured_calls
+    finally:
+        configure_strategy(select_iter, None)
+
+
+def test_structured_output_fallback():
+    configure_lm(FakeChatModel(responder=lambda messages: "**Answer:** True", calls=[]))
+    assert equals("one", "1") is True
+    assert get_metrics("lm.structured_output.fallbacks")["lm.structured_output.fallbacks"] == 1
+
+
+def test_structured_output_validation_error():
+    llm = FakeStructuredChatModel(
+        responder=lambda messages: "unused",
+        structured_responder=lambda messages: {"value": "not a number"},
+        calls=[],
+        structured_calls=[],
+    )
+    configure_lm(llm)
+    with pytest.raises(ValueError):
+        cast("a lot", int)
+
+
+def test_structured_output_tool_calling():
+    with StandInOpenAIServer(responder=lambda messages: json.dumps({"value": ["Paris", "Rome"]})) as server:
+        configure_lm(ChatOpenAI(model="gpt-4o", api_key="test", base_url=server.base_url))
+        assert select_iter("Paris and Rome are capitals.", "cities") == ["Paris", "Rome"]
+
+
+def test_regex_parser_pydantic_return_type():
+    parser = RegexOutputParser(pattern=r"([\s\S]+)", return_type=Person)
+    assert parser.parse('{"name": "Ann", "age": 3}') == Person(name="Ann", age=3)
+    assert parser.parse("{'name': 'Ann', 'age': 3}") == Person(name="Ann", age=3)
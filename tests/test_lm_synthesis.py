@@ -0,0 +1,88 @@
+import json
+
+import pytest
+
+from semantipy.impls.base import list_backends
+from semantipy.impls.lm.backend import configure_lm
+from semantipy.impls.lm.synthesis import (
+    SynthesisBackend,
+    SynthesisPolicy,
+    configure_synthesis,
+    get_synthesized_programs,
+)
+from semantipy.impls.metrics import get_metrics, reset_metrics
+from semantipy.ops import select
+
+from _fake_llm import FakeChatModel
+
+SENTENCES = [f"Word{index} follows the others here." for index in range(8)]
+
+
+def first_word_program(code: str = "def solve(operand):\n    return operand.split()[0]\n"):
+    def responder(messages):
+        content = messages[-1].content
+        if "Write a Python function" in content:
+            return json.dumps({"entrypoint": "solve", "content": code, "intent": "The first word."})
+        return content.split("**Original content:** ")[1].split()[0]
+
+    return responder
+
+
+@pytest.fixture(autouse=True)
+def reset_synthesis():
+    reset_metrics()
+    yield
+    configure_synthesis(None, clear=True)
+
+
+def test_synthesis_replaces_lm():
+    llm = FakeChatModel(responder=first_word_program(), calls=[])
+    configure_lm(llm)
+    configure_synthesis(SynthesisPolicy(min_observations=3, spot_check_rate=0.0))
+    assert SynthesisBackend in list_backends()
+
+    for sentence in SENTENCES[:3]:
+        assert select(sentence, "the first word") == sentence.split()[0]
+    # Three answers and the synthesis.
+    assert len(llm.calls) == 4
+    assert len(get_synthesized_programs()) == 1
+
+    for sentence in SENTENCES[3:]:
+        assert select(sentence, "the first word") == sentence.split()[0]
+    assert len(llm.calls) == 4
+    assert get_metrics("synthesis")["synthesis.calls_saved"] == 5
+
+    # Other selectors are different tasks.
+    select(SENTENCES[0], "the last word")
+    assert len(llm.calls) == 5
+
+    configure_synthesis(None)
+    assert SynthesisBackend not in list_backends()
+
+
+def test_synthesis_rejects_wrong_program():
+    llm = FakeChatModel(responder=first_word_program("def solve(operand):\n    return operand\n"), calls=[])
+    configure_lm(llm)
+    configure_synthesis(SynthesisPolicy(min_observations=2, max_attempts=1))
+    for sentence in SENTENCES:
+        select(sentence, "the first word")
+    assert get_synthesized_programs() == {}
+    metrics = get_metrics("synthesis")
+    assert metrics["synthesis.attempts"] == 1
+    assert metrics["synthesis.rejected"] == 1
+    assert len(llm.calls) == len(SENTENCES) + 1
+
+
+def test_synthesis_spot_check():
+    llm = FakeChatModel(responder=first_word_program(), calls=[])
+    configure_lm(llm)
+    configure_synthesis(SynthesisPolicy(min_observations=2, spot_check_rate=1.0, max_attempts=1))
+    for sentence in SENTENCES[:2]:
+        select(sentence, "the first word")
+    assert len(get_synthesized_programs()) == 1
+
+    # The language model changes its mind. The program is dropped.
+    llm.responder = lambda messages: "here"
+    assert select(SENTENCES[2], "the first word") == "here"
+    assert get_metrics("synthesis")["synthesis.spot_check_failures"] == 1
+    assert get_synthesized_programs() == {}
@@ -0,0 +1,102 @@
+import pytest
+
+from semantipy.impls.lm import backend
+from semantipy.impls.lm.backend import configure_lm, LMBackend, LMExecutionPlan
+from semantipy.impls.lm.template import SemantipyPromptTemplate
+from semantipy.impls.lm.tokens import (
+    configure_token_budget,
+    configure_tokenizer,
+    estimate_tokens,
+    PromptTooLarge,
+    TokenBudget,
+)
+from semantipy.ops import select_iter, equals, SemanticOperationRequest
+from semantipy.semantics import Exemplar
+
+from _fake_llm import FakeChatModel
+
+
+@pytest.fixture(autouse=True)
+def reset_budget():
+    previous_lm = backend._lm
+    yield
+    configure_token_budget(None)
+    configure_tokenizer(None)
+    # The fake model configured by a test does not leak into the other tests.
+    backend._lm = previous_lm
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("hello world") == 3
+    assert estimate_tokens("a, b, c") == 5
+
+    configure_tokenizer(lambda text: len(text.split()))
+    assert estimate_tokens("a, b, c") == 3
+
+
+def test_estimate_plan_tokens():
+    plan = LMBackend.__semantic_function__(equals.bind("some content", "other content"))
+    assert isinstance(plan, LMExecutionPlan)
+    assert 100 < plan.estimate_tokens() < 500
+
+
+def test_budget_drop_exemplars():
+    request = SemanticOperationRequest(
+        operator=equals,
+        operand="some content",
+        guest_operand="other content",
+        contexts=[Exemplar(input=equals.bind("a", "b"), output="**Answer:** False"), "some context"],
+    )
+    plan = LMBackend.__semantic_function__(request)
+    full = plan.estimate_tokens()
+
+    (fitted,) = TokenBudget(max_prompt_tokens=full - 1).fit(plan)
+    assert len(fitted.prompt.exemplars) == 1
+    assert fitted.prompt.user_contexts == ["some context"]
+    assert fitted.list_signs()[-1].startswith("[TokenBudget] shrunk with drop_exemplars")
+
+    (fitted,) = TokenBudget(max_prompt_tokens=full - 1, strategies=["drop_contexts"]).fit(plan)
+    assert len(fitted.prompt.exemplars) == 2
+    assert fitted.prompt.user_contexts == []
+
+    with pytest.raises(PromptTooLarge):
+        TokenBudget(max_prompt_tokens=10).fit(plan)
+
+
+def test_budget_chunk():
+    content = "\n".join(f"line {i}: " + "word " * 20 for i in range(20))
+    plan = LMBackend.__semantic_function__(select_iter.bind(content, "line numbers", int))
+    plans = TokenBudget(max_prompt_tokens=plan.estimate_tokens() // 2, strategies=["chunk"]).fit(plan)
+    assert len(plans) > 2
+    assert "".join(p.prompt.user_input.operand for p in plans) == content
+
+    configure_lm(FakeChatModel(responder=lambda messages: "1\n2", calls=[]))
+    configure_token_budget(TokenBudget(max_prompt_tokens=plan.estimate_tokens() // 2))
+    assert plan.execute() == [1, 2] * len(plans)
+
+
+def test_budget_renders_once(monkeypatch):
+    renders = []
+    render = SemantipyPromptTemplate.render
+    monkeypatch.setattr(SemantipyPromptTemplate, "render", lambda self: renders.append(self) or render(self))
+
+    configure_lm(FakeChatModel(responder=lambda messages: "**Answer:** True", calls=[]))
+    configure_token_budget(TokenBudget(max_prompt_tokens=10000))
+    assert LMBackend.__semantic_function__(equals.bind("some content", "other content")).execute() is True
+    assert len(renders) == 1
+
+    request = SemanticOperationRequest(
+        operator=equals,
+        operand="some content",
+        guest_operand="other content",
+        contexts=[Exemplar(input=equals.bind("a", "b"), output="**Answer:** False")],
+        return_type=bool,
+    )
+    plan = LMBackend.__semantic_function__(request)
+    configure_token_budget(TokenBudget(max_prompt_tokens=plan.estimate_tokens() - 1))
+    renders.clear()
+    assert plan.execute() is True
+    # The full prompt (cached by the estimate above) is not rendered again, the shrunk one is rendered once.
+    assert len(renders) == 1
+    assert len(renders[0].exemplars) == len(plan.prompt.exemplars) - 1
@@ -0,0 +1,36 @@
+from langchain_openai import ChatOpenAI
+
+from semantipy.impls.lm import backend, template
+from semantipy.impls.lm.warmup import get_warmup_status, warmup
+from semantipy.ops import equals, select
+
+from _fake_llm import FakeChatModel, StandInOpenAIServer
+
+
+def test_warmup_prompts():
+    backend.configure_lm(FakeChatModel(responder=lambda messages: "", calls=[]))
+    template._loaded_templates.clear()
+    status = warmup([equals, select])
+    assert status.ok and get_warmup_status() is status
+    assert set(status.durations) == {"prompts", "model"}
+    assert {key[1].rsplit("/", 1)[-1] for key in template._loaded_templates} == {"equals.yaml", "select.yaml"}
+
+
+def test_warmup_background_connect():
+    with StandInOpenAIServer() as server:
+        backend.configure_lm(ChatOpenAI(model="gpt-4o", api_key="test", base_url=server.base_url))
+        status = warmup([equals], connect=True, background=True)
+        assert status.wait(timeout=10)
+        assert status.ok
+        assert server.paths == ["/v1/models"]
+
+
+def test_warmup_errors():
+    backend.configure_lm(FakeChatModel(responder=lambda messages: "", calls=[]))
+    status = warmup([equals], connect=True)
+    # The fake model has no HTTP client to connect, which is not an error.
+    assert status.ok
+
+    status = warmup([object()])
+    assert status.ready and not status.ok
+    assert "prompts" in status.errors
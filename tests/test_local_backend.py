@@ -0,0 +1,51 @@
+import pytest
+
+from semantipy.impls.base import BackendNotImplemented
+from semantipy.impls.local import LocalBackend
+from semantipy.impls.lm.backend import configure_lm, LMExecutionPlan
+from semantipy.impls.metrics import get_metrics, reset_metrics
+from semantipy.ops import cast, combine, contains, context, equals, resolve, select
+from semantipy.semantics import SemanticDict, SemanticList
+
+from _fake_llm import FakeChatModel
+
+
+def test_local_backend():
+    reset_metrics()
+    configure_lm(FakeChatModel(responder=lambda messages: "**Answer:** False", calls=[]))
+
+    assert equals("banana", "banana") is True
+    assert contains("Flight", "I want to book a flight.") is True
+    assert combine(SemanticList([1, 2]), SemanticList([3])) == [1, 2, 3]
+    assert combine(SemanticDict(a=1), SemanticDict(b=2), SemanticDict(a=3)) == {"a": 3, "b": 2}
+    assert select("Natalia sold 72 clips altogether.", int) == 72
+    assert select("The price is -3.5 dollars.", float) == -3.5
+    assert cast(" 123 ", int) == 123
+    assert cast("1e3", float) == 1000.0
+    assert cast("True", bool) is True
+    assert get_metrics("local.calls_saved")["local.calls_saved"] == 9
+    assert get_metrics("local.calls_saved")["local.calls_saved{operator=select}"] == 2
+
+    # Fall through to the language model
+    assert equals("banana", "香蕉") is False
+    assert contains("intention to order a flight", "I want to book a hotel in London") is False
+    # Only whole words are matched.
+    for word, text in [("cat", "Please concatenate the files."), ("art", "We had a party."), ("no", "I know.")]:
+        assert isinstance(contains.compile(word, text), LMExecutionPlan)
+    assert isinstance(select.compile("Natalia sold 48+24 = 72 clips.", int), LMExecutionPlan)
+    assert isinstance(select.compile("It costs 3.5 dollars.", int), LMExecutionPlan)
+    assert isinstance(select.compile("Natalia sold 72 clips.", "the number"), LMExecutionPlan)
+    assert isinstance(cast.compile("123.0", int), LMExecutionPlan)
+    assert isinstance(resolve.compile("1 + 1"), LMExecutionPlan)
+    with context("All numbers are in hexadecimal."):
+        assert isinstance(select.compile("Natalia sold 72 clips.", int), LMExecutionPlan)
+        assert isinstance(equals.compile("banana", "banana"), LMExecutionPlan)
+        assert isinstance(contains.compile("flight", "Book a flight."), LMExecutionPlan)
+    assert get_metrics("local.calls_saved")["local.calls_saved"] == 9
+
+
+def test_local_backend_not_implemented():
+    with pytest.raises(BackendNotImplemented):
+        LocalBackend.__semantic_function__(equals.bind("a", "b"))
+    with pytest.raises(BackendNotImplemented):
+        LocalBackend.__semantic_function__(resolve.bind("1 + 1"))
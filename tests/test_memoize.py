@@ -0,0 +1,100 @@
+import threading
+import time
+
+import semantipy
+from semantipy.impls.lm.backend import configure_lm
+from semantipy.impls.lm.batch import LocalBatchClient, deferred_batch
+from semantipy.impls.lm.dryrun import dry_run
+from semantipy.ops import apply, context
+from semantipy.semantics import Text
+
+from _fake_llm import FakeChatModel
+
+
+def _counting_lm(delay: float = 0.0):
+    counter = iter(range(1000))
+
+    def responder(messages):
+        time.sleep(delay)
+        return f"answer {next(counter)}"
+
+    llm = FakeChatModel(responder=responder, calls=[])
+    configure_lm(llm)
+    return llm
+
+
+def test_memoize_hits_and_keys():
+    llm = _counting_lm()
+    cached_apply = semantipy.memoize(apply, maxsize=8)
+
+    first = cached_apply("hello", "translate to French")
+    assert cached_apply("hello", "translate to French") == first
+    assert cached_apply(Text("hello"), "translate to French") == first
+    assert cached_apply("hello", "translate to German") != first
+    assert len(llm.calls) == 2
+
+    # The contexts are a part of the key.
+    assert cached_apply.context("Be formal.")("hello", "translate to French") != first
+    with context("Be informal."):
+        assert cached_apply("hello", "translate to French") != first
+    assert len(llm.calls) == 4
+    assert cached_apply.cache_info()["size"] == 4
+
+    assert cached_apply.invalidate("hello", "translate to French")
+    assert cached_apply("hello", "translate to French") != first
+
+
+def test_memoize_bypassed_in_dry_run_and_batch(tmp_path):
+    llm = _counting_lm()
+    cached_apply = semantipy.memoize(apply)
+
+    with dry_run():
+        cached_apply("hello", "translate to French")
+    with deferred_batch(LocalBatchClient(llm), model="gpt-4o-mini", directory=tmp_path, poll_interval=0.01):
+        future = cached_apply("hello", "translate to French")
+    with semantipy.results_not_cacheable():
+        cached_apply("hello", "translate to French")
+    assert cached_apply.cache_info()["size"] == 0
+
+    assert future.result() == "answer 0"
+
+    # The placeholders and the futures are not returned later.
+    assert cached_apply("hello", "translate to French") == "answer 2"
+    assert cached_apply.cache_info() == {"hits": 0, "misses": 1, "size": 1, "maxsize": 128, "ttl": None}
+
+
+def test_memoize_lru_and_ttl():
+    llm = _counting_lm()
+    cached_apply = apply.memoize(ttl=0.2, maxsize=2)
+
+    cached_apply("a", "upper")
+    cached_apply("b", "upper")
+    cached_apply("a", "upper")
+    cached_apply("c", "upper")  # evicts "b"
+    cached_apply("a", "upper")
+    assert len(llm.calls) == 3
+    cached_apply("b", "upper")
+    assert len(llm.calls) == 4
+
+    time.sleep(0.25)
+    cached_apply("b", "upper")
+    assert len(llm.calls) == 5
+
+    cached_apply.cache_clear()
+    assert cached_apply.cache_info()["size"] == 0
+
+
+def test_memoize_concurrent_calls():
+    llm = _counting_lm(delay=0.1)
+    cached_apply = semantipy.memoize(apply)
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cached_apply("hello", "translate to French"))) for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(set(results)) == 1
+    assert len(llm.calls) == 1
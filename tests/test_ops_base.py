@@ -8,7 +8,7 @@ from semantipy.impls.base import (
     register_backend,
     unregister_backend,
 )
-from semantipy.ops.base import Dispatcher, SemanticOperationRequest, semantipy_op
+from semantipy.ops.base import CompactRequest, Dispatcher, SemanticOperationRequest, semantipy_op
 from semantipy.semantics import Text
 
 
@@ -175,3 +175,25 @@ def test_semantipy_op():
     assert dummy_op(Text("a"), Text("b")) == "dummy_op"
 
     unregister_backend(BackendF)
+
+
+def test_compact_request():
+    request = dummy_op.bind("a", "b")
+    compact = CompactRequest.from_request(request)
+    assert compact.to_request() == request
+    assert compact.operands() == ["a", "b"]
+    assert compact.other_operands is CompactRequest(operator=dummy_op, operand=Text("c")).other_operands
+
+    # Secondary operands are shared across requests
+    first, second = dummy_op.bind_compact("a", "selector"), dummy_op.bind_compact("b", "selector")
+    assert first.guest_operand is second.guest_operand
+    assert first != second
+    CompactRequest.clear_interned()
+    assert dummy_op.bind_compact("c", "selector").guest_operand is not first.guest_operand
+
+    with_contexts = dummy_op.context(Text("some context")).bind_compact("a", "b")
+    assert with_contexts.contexts == ("some context",)
+
+    register_backend(BackendF)
+    assert Dispatcher(compact).dispatch().execute() == "dummy_op"
+    unregister_backend(BackendF)
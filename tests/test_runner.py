@@ -0,0 +1,103 @@
+import json
+
+import pytest
+
+from semantipy.__main__ import main
+from semantipy.impls.lm.backend import configure_lm
+from semantipy.ops import active_contexts
+from semantipy import runner
+from semantipy.runner import run_jobs
+
+from _fake_llm import FakeChatModel
+
+JOBS = [
+    {"id": "a", "operator": "contains", "args": ["flight", "Book a flight to London."]},
+    {"id": "b", "operator": "select", "args": ["It costs 5 dollars.", {"$type": "int"}]},
+    {"id": "c", "operator": "apply", "args": ["Hello", "Translate to French."]},
+    {"id": "d", "operator": "memoize", "args": []},
+    {"id": "e", "operator": "context_enter", "args": ["Answer in German."]},
+]
+
+
+def write_jobs(path, jobs):
+    path.write_text("".join(json.dumps(job) + "\n" for job in jobs))
+
+
+def read_results(path):
+    return {record.get("id"): record for record in map(json.loads, path.read_text().splitlines())}
+
+
+def test_run_jobs(tmp_path):
+    llm = FakeChatModel(responder=lambda messages: "Bonjour", calls=[])
+    configure_lm(llm)
+    jobs, out = tmp_path / "jobs.jsonl", tmp_path / "results.jsonl"
+    write_jobs(jobs, JOBS)
+
+    summary = run_jobs(jobs, out, concurrency=2)
+    assert (summary.completed, summary.failed, summary.skipped) == (3, 2, 0)
+    results = read_results(out)
+    assert results["a"]["result"] is True
+    assert results["b"]["result"] == 5
+    assert results["c"]["result"] == "Bonjour"
+    assert "Unknown operator" in results["d"]["error"]
+    # The context operators would change the other jobs.
+    assert "Unknown operator" in results["e"]["error"]
+    assert active_contexts() == []
+    assert len(llm.calls) == 1
+
+
+def test_run_jobs_resume(tmp_path):
+    llm = FakeChatModel(responder=lambda messages: "Bonjour", calls=[])
+    configure_lm(llm)
+    jobs, out = tmp_path / "jobs.jsonl", tmp_path / "results.jsonl"
+    write_jobs(jobs, JOBS[:3])
+    # A crash while the result of "c" was written.
+    out.write_text('{"id": "a", "result": true}\n{"id": "b", "error": "Timeout"}\n{"id": "c", "res')
+
+    summary = run_jobs(jobs, out)
+    assert (summary.completed, summary.skipped) == (1, 2)
+    assert read_results(out)["c"]["result"] == "Bonjour"
+
+    assert main(["run", str(jobs), "--out", str(out), "--retry-errors"]) == 0
+    assert read_results(out)["b"]["result"] == 5
+    assert len(out.read_text().splitlines()) == 4
+
+
+def test_run_jobs_invalid_lines(tmp_path):
+    configure_lm(FakeChatModel(responder=lambda messages: "Bonjour", calls=[]))
+    jobs, out = tmp_path / "jobs.jsonl", tmp_path / "results.jsonl"
+    jobs.write_text(json.dumps(JOBS[0]) + "\n{not json\n[1, 2]\n")
+    # A result without id is ignored when resuming.
+    out.write_text('{"result": true}\n')
+
+    summary = run_jobs(jobs, out)
+    assert (summary.completed, summary.failed) == (1, 2)
+    results = read_results(out)
+    assert results["a"]["result"] is True
+    assert results["2"]["error"].startswith("JSONDecodeError")
+    assert "Expected a JSON object" in results["3"]["error"]
+
+    # The lines which are not valid UTF-8 are errors as well.
+    jobs.write_bytes(json.dumps(JOBS[2]).encode() + b"\n\xff\n")
+    run_jobs(jobs, tmp_path / "other_results.jsonl")
+    results = read_results(tmp_path / "other_results.jsonl")
+    assert results["c"]["result"] == "Bonjour"
+    assert results["2"]["error"].startswith("UnicodeDecodeError")
+
+
+def test_run_jobs_interrupted(tmp_path, monkeypatch):
+    configure_lm(FakeChatModel(responder=lambda messages: "Bonjour", calls=[]))
+    jobs, out = tmp_path / "jobs.jsonl", tmp_path / "results.jsonl"
+    write_jobs(jobs, JOBS[2:3])
+
+    original_iter_jobs = runner._iter_jobs
+
+    def iter_jobs(path):
+        yield from original_iter_jobs(path)
+        raise KeyboardInterrupt()
+
+    monkeypatch.setattr(runner, "_iter_jobs", iter_jobs)
+    with pytest.raises(KeyboardInterrupt):
+        run_jobs(jobs, out)
+    # The jobs submitted before the interruption are written.
+    assert read_results(out)["c"]["result"] == "Bonjour"
@@ -0,0 +1,82 @@
+import re
+import time
+
+import pytest
+
+from semantipy.impls.elementwise import ElementwisePlan
+from semantipy.impls.lm.backend import configure_lm, LMExecutionPlan
+from semantipy.ops import apply, cast, combine, resolve
+from semantipy.semantics import SemanticDict, SemanticList
+
+from _fake_llm import FakeChatModel
+
+
+@pytest.fixture
+def elementwise():
+    SemanticList.elementwise_threshold = SemanticDict.elementwise_threshold = 2
+    try:
+        yield
+    finally:
+        SemanticList.elementwise_threshold = SemanticDict.elementwise_threshold = None
+
+
+def _uppercase(messages):
+    time.sleep(0.1)
+    return re.search(r"\*\*Original content:\*\* (.*)", messages[-1].content).group(1).upper()
+
+
+def test_elementwise_list(elementwise):
+    model = FakeChatModel(responder=_uppercase)
+    configure_lm(model)
+
+    fruits = SemanticList(["apple", "banana", "cherry", "durian", "elderberry", "fig", "grape", "honeydew"])
+    plan = apply.compile(fruits, "to uppercase")
+    assert isinstance(plan, ElementwisePlan)
+    assert plan.list_signs() == ["[SemanticList] element-wise over 8 elements"]
+
+    start_time = time.perf_counter()
+    result = plan.execute()
+    assert time.perf_counter() - start_time < 0.5
+    assert isinstance(result, SemanticList)
+    assert result == [fruit.upper() for fruit in fruits]
+    assert len(model.calls) == 8
+
+
+def test_elementwise_dict(elementwise):
+    configure_lm(FakeChatModel(responder=_uppercase))
+    result = apply(SemanticDict(a="apple", b="banana"), "to uppercase")
+    assert isinstance(result, SemanticDict)
+    assert result == {"a": "APPLE", "b": "BANANA"}
+
+    # Sub-requests are dispatched to all handlers, including the deterministic ones.
+    assert cast(SemanticDict(a="1", b="2"), int) == {"a": 1, "b": 2}
+
+
+def test_elementwise_disabled_by_default():
+    assert isinstance(apply.compile(SemanticList(["b", "a"]), "sort alphabetically"), LMExecutionPlan)
+    assert isinstance(resolve.compile(SemanticList(["1 + 1", "2 + 2"])), LMExecutionPlan)
+
+
+def test_elementwise_threshold(elementwise):
+    assert isinstance(apply.compile(SemanticList(["apple"]), "to uppercase"), LMExecutionPlan)
+    assert isinstance(resolve.compile(SemanticList(["1 + 1", "2 + 2"])), ElementwisePlan)
+    # Not element-wise
+    assert combine(SemanticList([1]), SemanticList([2])) == [1, 2]
+    assert isinstance(cast.compile(SemanticList(["1", "2"]), list), LMExecutionPlan)
+
+    # The index and the container guest operands refer to the container as a whole.
+    assert isinstance(apply.compile(SemanticList(["a", "b"]), "the second item", "remove"), LMExecutionPlan)
+    assert isinstance(apply.compile(SemanticList(["a", "b"]), SemanticList(["c"])), LMExecutionPlan)
+
+    SemanticList.elementwise_threshold = 3
+    assert isinstance(resolve.compile(SemanticList(["1 + 1", "2 + 2"])), LMExecutionPlan)
+
+
+class _StaticFunctionList(SemanticList):
+    @staticmethod
+    def __semantic_function__(request, dispatcher=None, plan=None):
+        return NotImplemented
+
+
+def test_static_semantic_function():
+    assert combine(_StaticFunctionList([1]), SemanticList([2])) == [1, 2]
@@ -0,0 +1,43 @@
+import json
+
+from semantipy.impls.lm.backend import configure_lm
+from semantipy.ops import apply, equals
+from semantipy.tracing import ChromeTraceExporter, InMemorySpanExporter, configure_tracing, span
+
+from _fake_llm import FakeChatModel
+
+
+def test_tracing_spans(tmp_path):
+    configure_lm(FakeChatModel(responder=lambda messages: "Bonjour", calls=[]))
+    exporter = InMemorySpanExporter()
+    chrome = ChromeTraceExporter(tmp_path / "trace.json")
+    configure_tracing(exporter, chrome)
+    try:
+        apply("hello", "translate to French")
+        equals("same", "same")
+    finally:
+        configure_tracing()
+
+    names = [s.name for s in exporter.spans]
+    for name in ["bind", "dispatch", "handler.LMBackend", "execute", "lm.render", "lm.invoke", "lm.parse", "operator"]:
+        assert name in names
+
+    # apply is not answered locally, while equals of identical strings is.
+    local_spans = exporter.find("handler.LocalBackend")
+    assert [s.attributes["plan"] for s in local_spans] == ["not_implemented", "created"]
+    assert local_spans[1].attributes["final"]
+
+    operator_span = exporter.find("operator")[0]
+    dispatch_span = exporter.find("dispatch")[0]
+    assert dispatch_span.parent_id == operator_span.span_id
+    assert exporter.find("handler.LMBackend")[0].parent_id == dispatch_span.span_id
+    assert operator_span.duration >= dispatch_span.duration
+
+    events = json.loads((tmp_path / "trace.json").read_text())["traceEvents"]
+    assert len(events) == len(exporter.spans)
+    assert all(event["ph"] == "X" and event["dur"] >= 0 for event in events)
+
+
+def test_tracing_disabled():
+    with span("anything") as current:
+        current.set(ignored=True)